@@ -0,0 +1,142 @@
+"""
+Benchmark: bulk user provisioning (POST /users/bulk) at 100k users
+
+Runs the API in-process (TestClient) against a temporary database where part
+of the payload already exists, and compares:
+- POST /users, one request per user (measured on --single-sample users and
+  extrapolated)
+- POST /users/bulk, JSON response
+- POST /users/bulk, NDJSON streaming (Accept: application/x-ndjson)
+- DatabaseClient.insert_users alone (no HTTP / validation)
+
+Each run checks the per-item outcome counts (created, already existing,
+repeated in the request). Exit code 1 on a wrong count.
+
+USO:
+    python scripts/benchmark_bulk_users.py
+    python scripts/benchmark_bulk_users.py --users 200000 --existing 0.2
+"""
+
+import sys
+import json
+import time
+import random
+import sqlite3
+import argparse
+import logging
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+logging.basicConfig(level=logging.WARNING)
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from fastapi.testclient import TestClient
+
+import src.db.client as db_module
+from scripts.seed_db import create_tables
+from src.config import settings
+from src.db.client import DatabaseClient
+from src.main import app
+
+
+def build_payload(prefix: str, users: int, existing: float, repeated: float, rng: random.Random) -> Tuple[
+    List[Dict], List[Tuple[str, str]], Dict[str, int]
+]:
+    """Payload items, users to pre-create and the expected outcome counts"""
+    ids = [f"{prefix}_{n:07d}" for n in range(users)]
+    pre_created = [(user_id, "Existing") for user_id in ids if rng.random() < existing]
+    items = [{"user_id": user_id, "name": f"User {n}"} for n, user_id in enumerate(ids)]
+    repeats = [dict(rng.choice(items)) for _ in range(int(users * repeated))]
+    items += repeats
+    rng.shuffle(items)
+    expected = {
+        "created": users - len(pre_created),
+        "already exists": len(pre_created),
+        "repeated in request": len(repeats),
+    }
+    return items, pre_created, expected
+
+
+def count_outcomes(results: List[Dict]) -> Dict[str, int]:
+    counts = {"created": 0, "already exists": 0, "repeated in request": 0}
+    for result in results:
+        counts[result["reason"] or "created"] += 1
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do cadastro em lote de usuarios")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--existing", type=float, default=0.1, help="Fracao do lote ja cadastrada")
+    parser.add_argument("--repeated", type=float, default=0.01, help="Fracao de itens repetidos no lote")
+    parser.add_argument("--single-sample", type=int, default=2000, help="Usuarios medidos via POST /users")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    settings.users_bulk_max_items = max(settings.users_bulk_max_items, int(args.users * (1 + args.repeated)) + 1)
+    rng = random.Random(args.seed)
+    failures = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "customers.db")
+        conn = sqlite3.connect(db_path)
+        create_tables(conn)
+        conn.close()
+        client = DatabaseClient(db_path)
+        db_module.db_client = client   # the endpoints resolve the singleton per request
+        http = TestClient(app)
+
+        print(f"\n{'modo':<28} {'usuarios/s':>12} {'total s':>9}   ({args.users} usuarios, "
+              f"{args.existing:.0%} existentes, {args.repeated:.0%} repetidos)")
+
+        start = time.perf_counter()
+        for n in range(args.single_sample):
+            http.post("/users", json={"user_id": f"single_{n}", "name": f"User {n}"})
+        per_user = (time.perf_counter() - start) / args.single_sample
+        print(f"{'POST /users (1 por vez)':<28} {1 / per_user:>12,.0f} {per_user * args.users:>9.1f}   (estimado)")
+
+        def bulk_json(items):
+            response = http.post("/users/bulk", json={"users": items})
+            return response.json()["results"]
+
+        def bulk_ndjson(items):
+            response = http.post("/users/bulk", json={"users": items}, headers={"Accept": "application/x-ndjson"})
+            return [json.loads(line) for line in response.iter_lines() if line]
+
+        def db_only(items):
+            outcomes = client.insert_users([(item["user_id"], item["name"]) for item in items])
+            reasons = {"created": None, "exists": "already exists", "repeated": "repeated in request"}
+            return [{"reason": reasons[outcome]} for outcome in outcomes]
+
+        for label, prefix, run in (
+            ("POST /users/bulk (JSON)", "json", bulk_json),
+            ("POST /users/bulk (NDJSON)", "ndjson", bulk_ndjson),
+            ("insert_users (so o banco)", "db", db_only),
+        ):
+            items, pre_created, expected = build_payload(prefix, args.users, args.existing, args.repeated, rng)
+            client.insert_users(pre_created)
+            start = time.perf_counter()
+            results = run(items)
+            elapsed = time.perf_counter() - start
+            counts = count_outcomes(results)
+            ok = counts == expected and len(results) == len(items)
+            print(f"{label:<28} {len(items) / elapsed:>12,.0f} {elapsed:>9.2f}   "
+                  f"{'[OK]' if ok else '[ERRO]'} {counts}")
+            if not ok:
+                failures.append(f"{label}: {counts} != {expected}")
+
+        client.close()
+
+    if failures:
+        print("\n[ERRO] " + "; ".join(failures))
+        return 1
+    print("\n[OK] Resultados por item corretos")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
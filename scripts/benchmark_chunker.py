@@ -0,0 +1,136 @@
+"""
+Benchmark: parse_html_sections (passada unica sobre lxml) vs parser legado
+
+Gera paginas HTML sinteticas com N headers H2/H3. Em cada layout, o conteudo
+de cada secao fica dentro de containers aninhados:
+- flat:   <div><h2/><div><div><p/>...</div></div></div>, secoes irmas
+- nested: cada secao abre um <div> que so fecha a cada --group secoes, de
+          modo que containers englobam as secoes seguintes (comum em page
+          builders). O parser legado re-extrai o texto desses containers a
+          cada header -> custo ~ N x tamanho do container (quadratico
+          quando um container engloba a pagina toda).
+
+Reporta tempo total, tempo por header e tamanho total do texto extraido
+(o legado duplica texto de containers aninhados).
+
+USO:
+    python scripts/benchmark_chunker.py
+    python scripts/benchmark_chunker.py --sizes 100 1000 10000 20000 --legacy-limit 2000
+"""
+
+import sys
+import re
+import time
+import argparse
+import logging
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+logging.basicConfig(level=logging.WARNING)
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.rag.semantic_chunker import parse_html_sections
+
+PARAGRAPH = "A taxa no débito é de 1,37% e o dinheiro cai na hora na conta InfinitePay. "
+
+
+def legacy_parse_html_sections(html_content: bytes, source_url: str) -> list:
+    """Copia do parser anterior (find_next + get_text por elemento), para comparacao"""
+    soup = BeautifulSoup(html_content, 'lxml')
+    for element in soup(['script', 'style', 'nav', 'footer', 'header']):
+        element.decompose()
+
+    sections = []
+    headers = soup.find_all(['h2', 'h3'])
+    for i, header in enumerate(headers):
+        header_text = header.get_text(strip=True)
+        if not header_text:
+            continue
+        content_parts = [header_text]
+        next_header = headers[i + 1] if i < len(headers) - 1 else None
+        current = header.find_next()
+        while current:
+            if next_header and current == next_header:
+                break
+            if hasattr(current, 'name') and current.name in ['h1', 'h2', 'h3'] and current != header:
+                break
+            if hasattr(current, 'name') and current.name in ['p', 'div', 'li', 'ul', 'ol', 'span', 'a']:
+                text = current.get_text(strip=True, separator=' ')
+                if text and len(text) > 3:
+                    content_parts.append(text)
+            current = current.find_next()
+        content = re.sub(r'\s+', ' ', ' '.join(content_parts)).strip()
+        if len(content) >= 50:
+            sections.append({'content': content, 'header': header_text, 'level': header.name, 'source': source_url})
+    return sections
+
+
+def synthetic_page(n_headers: int, layout: str, group: int) -> bytes:
+    parts = ["<html><head><style>p{}</style></head><body><nav><a>Menu</a></nav>"]
+    open_wrappers = 0
+    for i in range(n_headers):
+        level = "h2" if i % 3 == 0 else "h3"
+        section = (
+            f"<{level}>Seção {i}</{level}>"
+            f"<div><div><p>{PARAGRAPH * 2}</p><ul><li><span>Item {i}</span> com <a href='#'>link</a></li></ul></div></div>"
+        )
+        if layout == "nested":
+            parts.append(f"<div class='s{i}'>{section}")
+            open_wrappers += 1
+            if open_wrappers == group:
+                parts.append("</div>" * open_wrappers)
+                open_wrappers = 0
+        else:
+            parts.append(f"<div class='s{i}'>{section}</div>")
+    parts.append("</div>" * open_wrappers)
+    parts.append("<footer>Rodapé</footer></body></html>")
+    return "".join(parts).encode("utf-8")
+
+
+def time_parser(parser, html: bytes) -> tuple:
+    start = time.perf_counter()
+    sections = parser(html, "https://www.infinitepay.io/bench")
+    return time.perf_counter() - start, sections
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do parser de secoes")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--layouts", nargs="+", default=["flat", "nested"], choices=["flat", "nested"])
+    parser.add_argument("--group", type=int, default=200, help="Secoes por container no layout nested")
+    parser.add_argument("--legacy-limit", type=int, default=2000, help="Maior N em que o legado roda")
+    args = parser.parse_args()
+
+    print("\n" + "=" * 80)
+    print("BENCHMARK: parse_html_sections")
+    print("=" * 80)
+    print(f"\n{'layout':>7} {'headers':>8} {'KiB':>8} {'parser':>7} {'total s':>9} {'us/header':>10} {'sections':>9} {'text KiB':>9}")
+    print("-" * 76)
+
+    try:
+        for layout in args.layouts:
+            for size in args.sizes:
+                html = synthetic_page(size, layout, args.group)
+                runs = [("lxml", parse_html_sections)]
+                if size <= args.legacy_limit:
+                    runs.append(("legacy", legacy_parse_html_sections))
+
+                for name, fn in runs:
+                    elapsed, sections = time_parser(fn, html)
+                    text_kib = sum(len(s['content']) for s in sections) / 1024
+                    print(
+                        f"{layout:>7} {size:>8} {len(html) / 1024:>8.0f} {name:>7} {elapsed:>9.3f} "
+                        f"{elapsed / size * 1e6:>10.1f} {len(sections):>9} {text_kib:>9.0f}"
+                    )
+        return 0
+    except Exception as e:
+        print(f"\n[ERRO] Benchmark falhou: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+"""
+Benchmark: support database access under parallel load
+
+Builds a synthetic customers database (same schema as scripts/seed_db.py) in
+a temp dir and runs support-agent style traffic from N threads:
+- reads: get_user + get_transactions + get_cards (one "support lookup")
+- writes: create_user, interleaved from a fraction of the threads
+
+Compares the legacy access path (new connection per call, rollback journal)
+with the pooled DatabaseClient (WAL, busy_timeout, cached statements):
+throughput, latency p50 / p99 and "database is locked" errors.
+
+USO:
+    python scripts/benchmark_db.py
+    python scripts/benchmark_db.py --threads 1 8 32 --seconds 3 --write-ratio 0.1
+"""
+
+import sys
+import time
+import random
+import sqlite3
+import argparse
+import itertools
+import logging
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+logging.basicConfig(level=logging.WARNING)
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from scripts.seed_db import create_tables
+from src.db.client import DatabaseClient
+
+# User IDs for create_user, unique across runs
+NEW_IDS = itertools.count()
+
+
+class LegacyClient:
+    """Connection per call, default journal (the access path before pooling)"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+
+    def _query(self, sql: str, params: tuple) -> list:
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        try:
+            return [dict(row) for row in conn.execute(sql, params).fetchall()]
+        finally:
+            conn.close()
+
+    def get_user(self, user_id):
+        rows = self._query("SELECT * FROM users WHERE user_id = ?", (user_id,))
+        return rows[0] if rows else None
+
+    def get_transactions(self, user_id, limit=5):
+        return self._query(
+            "SELECT * FROM transactions WHERE user_id = ? ORDER BY created_at DESC LIMIT ?", (user_id, limit)
+        )
+
+    def get_cards(self, user_id):
+        return self._query("SELECT * FROM cards WHERE user_id = ?", (user_id,))
+
+    def create_user(self, user_id, name):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT INTO users (user_id, name, email, account_status, plan, balance, created_at) "
+                    "VALUES (?, ?, '', 'active', 'basic', 0.0, ?)",
+                    (user_id, name, datetime.now().isoformat())
+                )
+        finally:
+            conn.close()
+
+
+def build_database(path: str, users: int, tx_per_user: int) -> None:
+    conn = sqlite3.connect(path)
+    create_tables(conn)
+    now = datetime.now().isoformat()
+    conn.executemany(
+        "INSERT INTO users (user_id, name, email, account_status, plan, balance, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [(f"u{i}", f"User {i}", f"u{i}@example.com", "active", "basic", 100.0, now) for i in range(users)]
+    )
+    conn.executemany(
+        "INSERT INTO transactions (transaction_id, user_id, amount, type, status, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+        [(f"t{i}_{j}", f"u{i}", 10.0 * j, "pix", "completed", f"2024-01-{1 + j % 28:02d}")
+         for i in range(users) for j in range(tx_per_user)]
+    )
+    conn.executemany(
+        "INSERT INTO cards VALUES (?, ?, ?, ?, ?, ?)",
+        [(f"c{i}", f"u{i}", f"{i % 10000:04d}", "active", 1000.0, 0.0) for i in range(users)]
+    )
+    conn.commit()
+    conn.close()
+
+
+def run_load(client, users: int, threads: int, seconds: float, write_ratio: float) -> dict:
+    latencies = [[] for _ in range(threads)]
+    errors = [0] * threads
+    writes = [0] * threads
+    deadline = time.perf_counter() + seconds
+
+    def worker(n: int):
+        rng = random.Random(n)
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                if rng.random() < write_ratio:
+                    client.create_user(f"new_{next(NEW_IDS)}", "Bench")
+                    writes[n] += 1
+                else:
+                    user_id = f"u{rng.randrange(users)}"
+                    client.get_user(user_id)
+                    client.get_transactions(user_id)
+                    client.get_cards(user_id)
+            except sqlite3.OperationalError:
+                errors[n] += 1
+                continue
+            latencies[n].append(time.perf_counter() - start)
+
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+
+    samples = np.array([sample for per_thread in latencies for sample in per_thread])
+    return {
+        "ops": len(samples) / seconds,
+        "p50": float(np.percentile(samples, 50) * 1000) if len(samples) else 0.0,
+        "p99": float(np.percentile(samples, 99) * 1000) if len(samples) else 0.0,
+        "writes": sum(writes),
+        "errors": sum(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do acesso ao SQLite sob carga paralela")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--write-ratio", type=float, default=0.1)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--tx-per-user", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"\nBanco sintetico: {args.users} usuarios, {args.users * args.tx_per_user} transacoes")
+        print(f"Carga: lookup de suporte (user + transacoes + cartoes), {args.write_ratio:.0%} create_user\n")
+        print(f"{'acesso':<10} {'threads':>7} {'ops/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'writes':>7} {'locked':>7}")
+
+        for label in ("legacy", "pool"):
+            db_path = str(Path(tmp) / f"{label}.db")
+            build_database(db_path, args.users, args.tx_per_user)
+            client = LegacyClient(db_path) if label == "legacy" else DatabaseClient(db_path, pool_size=max(args.threads))
+            for threads in args.threads:
+                result = run_load(client, args.users, threads, args.seconds, args.write_ratio)
+                print(
+                    f"{label:<10} {threads:>7} {result['ops']:>9.0f} {result['p50']:>8.2f} "
+                    f"{result['p99']:>8.2f} {result['writes']:>7} {result['errors']:>7}"
+                )
+            if label == "pool":
+                client.close()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+"""
+Benchmark: HNSW recall vs latency for the Chroma backend
+
+For each synthetic corpus size and HNSW parameter combination:
+1. Builds an in-memory Chroma collection with the given space / M / ef_construction
+2. Sweeps ef_search, one collection per value: the loaded index keeps the
+   ef_search it was created with (modify() only updates the stored config)
+3. Compares results with exact (brute force) search -> recall@k, p50/p99 latency
+
+Synthetic corpora are sampled from the embeddings of the current collection
+(plus gaussian noise, renormalized), so the vector distribution matches ours.
+Use --random to run without a populated ChromaDB.
+
+USO:
+    python scripts/benchmark_hnsw.py
+    python scripts/benchmark_hnsw.py --sizes 1000 10000 100000 1000000 --m 16 32 --ef-search 10 50 200
+"""
+
+import sys
+import time
+import argparse
+import logging
+from pathlib import Path
+
+import numpy as np
+import chromadb
+
+logging.basicConfig(level=logging.WARNING)
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.rag.quantization import normalize
+
+# Rows scored at a time for exact ground truth (bounds memory at 1M x 1536)
+EXACT_BLOCK_ROWS = 65536
+
+
+def load_base_vectors(use_random: bool, dims: int) -> np.ndarray:
+    """Stored embeddings from ChromaDB (or random unit vectors)"""
+    if use_random:
+        return normalize(np.random.default_rng(0).normal(size=(1000, dims)))
+
+    from src.rag.store import current_collection_name, get_chroma_client
+    data = get_chroma_client().get_collection(current_collection_name()).get(include=["embeddings"])
+    vectors = np.asarray(data["embeddings"], dtype=np.float32)
+    return normalize(vectors[:, :dims])
+
+
+def synthetic_corpus(base: np.ndarray, size: int, noise: float, seed: int) -> np.ndarray:
+    """Samples `size` vectors around the stored embeddings"""
+    rng = np.random.default_rng(seed)
+    rows = rng.integers(0, len(base), size=size)
+    corpus = base[rows] + rng.normal(scale=noise, size=(size, base.shape[1])).astype(np.float32)
+    return normalize(corpus)
+
+
+def exact_top_k(corpus: np.ndarray, queries: np.ndarray, k: int) -> list:
+    """Ground truth by brute force (dot product on unit vectors ranks l2/cosine/ip identically)"""
+    best_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+    best_ids = np.zeros((len(queries), k), dtype=np.int64)
+
+    for start in range(0, len(corpus), EXACT_BLOCK_ROWS):
+        block_scores = queries @ corpus[start:start + EXACT_BLOCK_ROWS].T
+        scores = np.concatenate([best_scores, block_scores], axis=1)
+        ids = np.concatenate(
+            [best_ids, np.arange(start, start + block_scores.shape[1])[None, :].repeat(len(queries), 0)],
+            axis=1
+        )
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        best_scores = np.take_along_axis(scores, top, axis=1)
+        best_ids = np.take_along_axis(ids, top, axis=1)
+
+    return [set(row.tolist()) for row in best_ids]
+
+
+def build_collection(client, corpus: np.ndarray, space: str, m: int, ef_construction: int, ef_search: int):
+    name = f"bench_{space}_{m}_{ef_construction}_{ef_search}_{len(corpus)}"
+    try:
+        client.delete_collection(name)
+    except Exception:
+        pass
+
+    collection = client.create_collection(
+        name,
+        metadata={
+            "hnsw:space": space,
+            "hnsw:M": m,
+            "hnsw:construction_ef": ef_construction,
+            "hnsw:search_ef": ef_search,
+        }
+    )
+    hnsw = collection.configuration["hnsw"]
+    assert (hnsw["max_neighbors"], hnsw["ef_construction"], hnsw["ef_search"]) == (m, ef_construction, ef_search), \
+        f"collection built with {hnsw}, expected M={m} ef_construction={ef_construction} ef_search={ef_search}"
+    batch = client.get_max_batch_size()
+    start = time.perf_counter()
+    for i in range(0, len(corpus), batch):
+        chunk = corpus[i:i + batch]
+        collection.add(ids=[str(j) for j in range(i, i + len(chunk))], embeddings=chunk.tolist())
+    return collection, time.perf_counter() - start
+
+
+def run(args) -> None:
+    base = load_base_vectors(args.random, args.dims)
+    client = chromadb.EphemeralClient()
+    k = args.k
+
+    print(f"\nBase vectors: {len(base)} x {base.shape[1]} | space={args.space} | k={k} | queries={args.queries}\n")
+    print(f"{'size':>9} {'M':>4} {'ef_c':>5} {'ef_s':>5} {'build s':>8} {'recall@k':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    print("-" * 64)
+
+    for size in args.sizes:
+        corpus = synthetic_corpus(base, size, args.noise, seed=size)
+        queries = synthetic_corpus(base, args.queries, args.noise, seed=size + 1)
+        truth = exact_top_k(corpus, queries, k)
+
+        for m in args.m:
+            for ef_construction in args.ef_construction:
+                for ef_search in args.ef_search:
+                    collection, build_seconds = build_collection(
+                        client, corpus, args.space, m, ef_construction, ef_search
+                    )
+
+                    latencies = []
+                    recalls = []
+                    for qi, query in enumerate(queries):
+                        start = time.perf_counter()
+                        result = collection.query(query_embeddings=[query.tolist()], n_results=k, include=[])
+                        latencies.append(time.perf_counter() - start)
+                        found = {int(doc_id) for doc_id in result["ids"][0]}
+                        recalls.append(len(found & truth[qi]) / k)
+
+                    print(
+                        f"{size:>9} {m:>4} {ef_construction:>5} {ef_search:>5} {build_seconds:>8.1f} "
+                        f"{np.mean(recalls):>9.3f} {np.percentile(latencies, 50) * 1000:>8.2f} "
+                        f"{np.percentile(latencies, 99) * 1000:>8.2f}"
+                    )
+                    client.delete_collection(collection.name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HNSW recall vs latency benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--space", default="l2", choices=["l2", "cosine", "ip"])
+    parser.add_argument("--m", type=int, nargs="+", default=[8, 16, 32])
+    parser.add_argument("--ef-construction", type=int, nargs="+", default=[100, 200])
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[10, 50, 100])
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dims", type=int, default=1536, help="Truncate vectors (Matryoshka)")
+    parser.add_argument("--noise", type=float, default=0.02, help="Noise added to sampled vectors")
+    parser.add_argument("--random", action="store_true", help="Use random vectors instead of stored ones")
+    args = parser.parse_args()
+
+    print("\n" + "=" * 80)
+    print("BENCHMARK: HNSW recall vs latency")
+    print("=" * 80)
+
+    try:
+        run(args)
+        return 0
+    except Exception as e:
+        print(f"\n[ERRO] Benchmark falhou: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
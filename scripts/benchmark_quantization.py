@@ -0,0 +1,125 @@
+"""
+Benchmark: embedding storage modes (float32 / float16 / int8) and reduced dimensions
+
+Compares, on our real RAG queries, each storage mode against exact float32
+search over the full-dimension vectors stored in ChromaDB:
+- recall@k (overlap with the exact top-k)
+- search latency (p50 / p99)
+- vector memory
+
+Reduced dimensions are simulated by truncating + renormalizing the stored
+text-embedding-3 vectors, which is what the API does for `dimensions=`.
+
+USO:
+    python scripts/benchmark_quantization.py
+    python scripts/benchmark_quantization.py --k 5 --dims 1536 512 256 --rescore 20
+"""
+
+import sys
+import time
+import argparse
+import logging
+from pathlib import Path
+
+import numpy as np
+
+logging.basicConfig(level=logging.WARNING)
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from scripts.comprehensive_test import TEST_SCENARIOS
+from src.rag.ingest import create_chroma_client
+from src.rag.embeddings import create_embeddings
+from src.rag.quantization import QuantizedIndex, STORAGE_MODES, normalize
+from src.rag.store import current_collection_name
+
+
+def rag_queries() -> list:
+    """Real product questions from the comprehensive test suite"""
+    queries = []
+    for name, scenario in TEST_SCENARIOS.items():
+        if name.startswith("RAG"):
+            queries.extend(test["q"] for test in scenario["tests"])
+    return queries
+
+
+def truncate(vectors: np.ndarray, dims: int) -> np.ndarray:
+    """Matryoshka truncation (equivalent to requesting `dimensions=dims`)"""
+    return normalize(vectors[:, :dims])
+
+
+def percentile_ms(samples: list, pct: float) -> float:
+    return float(np.percentile(samples, pct) * 1000)
+
+
+def run(k: int, dims_list: list, rescore: int, repeat: int) -> None:
+    collection = create_chroma_client().get_collection(current_collection_name())
+    data = collection.get(include=["embeddings"])
+    ids = data["ids"]
+    stored = normalize(np.asarray(data["embeddings"], dtype=np.float32))
+
+    queries = rag_queries()
+    query_vectors = normalize(np.asarray(create_embeddings().embed_documents(queries), dtype=np.float32))
+
+    # Ground truth: exact float32 search on the full stored vectors
+    exact_scores = query_vectors @ stored.T
+    ground_truth = [set(np.argsort(-row)[:k]) for row in exact_scores]
+
+    print(f"\nCorpus: {len(ids)} vectors x {stored.shape[1]} dims | {len(queries)} queries | k={k}\n")
+    print(f"{'dims':>6} {'mode':>8} {'rescore':>8} {'recall@k':>9} {'p50 ms':>8} {'p99 ms':>8} {'memory':>10}")
+    print("-" * 64)
+
+    for dims in dims_list:
+        vectors = truncate(stored, dims)
+        queries_d = truncate(query_vectors, dims)
+
+        for mode in STORAGE_MODES:
+            index = QuantizedIndex.from_float(ids, vectors, mode)
+            id_to_row = {doc_id: i for i, doc_id in enumerate(ids)}
+
+            for rescore_k in sorted({0, rescore}):
+                latencies = []
+                recalls = []
+                for qi, query in enumerate(queries_d):
+                    for _ in range(repeat):
+                        start = time.perf_counter()
+                        candidates = index.search(query, top_k=max(k, rescore_k))
+                        rows = [id_to_row[doc_id] for doc_id, _ in candidates]
+                        if rescore_k:
+                            # Float re-scoring of the candidates (full stored precision)
+                            exact = stored[rows] @ query_vectors[qi]
+                            rows = [rows[i] for i in np.argsort(-exact)]
+                        latencies.append(time.perf_counter() - start)
+                    recalls.append(len(set(rows[:k]) & ground_truth[qi]) / k)
+
+                print(
+                    f"{dims:>6} {mode:>8} {rescore_k:>8} {np.mean(recalls):>9.3f} "
+                    f"{percentile_ms(latencies, 50):>8.3f} {percentile_ms(latencies, 99):>8.3f} "
+                    f"{index.nbytes / 1024:>8.0f}KB"
+                )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark embedding storage modes")
+    parser.add_argument("--k", type=int, default=5, help="Top-k for recall (default: 5)")
+    parser.add_argument("--dims", type=int, nargs="+", default=[1536, 1024, 512, 256])
+    parser.add_argument("--rescore", type=int, default=20, help="Float re-scoring candidates")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed repetitions per query")
+    args = parser.parse_args()
+
+    print("\n" + "=" * 80)
+    print("BENCHMARK: Quantized embedding storage")
+    print("=" * 80)
+
+    try:
+        run(args.k, args.dims, args.rescore, args.repeat)
+        return 0
+    except Exception as e:
+        print(f"\n[ERRO] Benchmark falhou: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,195 @@
+"""
+Benchmark: query plans and lookup latency on a large customers database
+
+Loads a synthetic database with millions of transactions (skewed: a few busy
+merchants hold most of them) at the pre-index schema version, then:
+1. Shows the plans and latency of the support lookups without indexes
+2. Applies the remaining migrations (indexes) and times the index build
+3. Asserts EXPLAIN QUERY PLAN uses the indexes: no full "SCAN" of the table,
+   no "USE TEMP B-TREE" sort for ORDER BY created_at DESC, and window
+   aggregates answered from the covering index alone
+4. Measures p50 / p99 through the pooled DatabaseClient and asserts p99 stays
+   under --max-p99-ms
+
+Exit code 1 if any assertion fails (usable in CI).
+
+USO:
+    python scripts/benchmark_query_plan.py
+    python scripts/benchmark_query_plan.py --transactions 5000000 --users 200000 --max-p99-ms 2
+"""
+
+import sys
+import time
+import random
+import sqlite3
+import argparse
+import logging
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+import numpy as np
+
+logging.basicConfig(level=logging.WARNING)
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.db.client import CARDS_SQL, SUMMARY_SQL, TRANSACTIONS_SQL, DatabaseClient
+from src.db.migrations import LATEST_VERSION, migrate
+
+# Schema version before the lookup indexes
+UNINDEXED_VERSION = 2
+
+TYPES = ["pix_in", "pix_out", "card_sale", "payout", "transfer"]
+STATUSES = ["completed"] * 17 + ["failed", "failed", "pending"]
+
+# Lookups checked against the plan: (name, sql, params, expected index, temp sort allowed)
+# The summary sorts its few (type, status) groups, never the transactions
+LOOKUPS = [
+    ("transacoes recentes", TRANSACTIONS_SQL, ("u0", 5), "idx_transactions_user_activity", False),
+    ("cartoes", CARDS_SQL, ("u0",), "idx_cards_user", False),
+    (
+        "resumo por periodo",
+        SUMMARY_SQL.format(where="user_id = ? AND created_at >= ?"),
+        ("u0", "2024-01-01"),
+        "COVERING INDEX idx_transactions_user_activity",
+        True,
+    ),
+]
+
+
+def pick_user(rng: random.Random, users: int) -> str:
+    """Skewed user choice: low ids are the busy merchants"""
+    return f"u{int(users * rng.random() ** 3)}"
+
+
+def build_database(path: str, users: int, transactions: int, seed: int) -> float:
+    """Loads the synthetic data at UNINDEXED_VERSION; returns the load time"""
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    conn = sqlite3.connect(path)
+    migrate(conn, target=UNINDEXED_VERSION)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+
+    now = time.time()
+    created = datetime.fromtimestamp(now - 400 * 86400).isoformat(timespec="seconds")
+    with conn:
+        conn.executemany(
+            "INSERT INTO users (user_id, name, email, plan, balance, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            ((f"u{i}", f"User {i}", f"u{i}@example.com", "basic", 100.0, created) for i in range(users))
+        )
+        conn.executemany(
+            "INSERT INTO transactions (transaction_id, user_id, type, amount, status, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                (
+                    f"t{i}", pick_user(rng, users), rng.choice(TYPES), round(rng.uniform(1, 5000), 2),
+                    rng.choice(STATUSES),
+                    datetime.fromtimestamp(now - rng.random() * 365 * 86400).isoformat(timespec="seconds"),
+                )
+                for i in range(transactions)
+            )
+        )
+        conn.executemany(
+            "INSERT INTO cards VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                (f"c{i}_{n}", f"u{i}", f"{rng.randrange(10000):04d}", "active", 5000.0, 0.0)
+                for i in range(users) for n in range(rng.choice((0, 1, 1, 2)))
+            )
+        )
+    conn.close()
+    return time.perf_counter() - start
+
+
+def query_plan(conn: sqlite3.Connection, sql: str, params: tuple) -> List[str]:
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+
+def plan_uses_index(details: List[str], index: str, allow_temp_sort: bool = False) -> bool:
+    """Index lookup, no full table scan and (unless allowed) no temporary sort"""
+    uses_index = any(index in detail for detail in details)
+    scans = any(
+        detail.startswith("SCAN") or ("TEMP B-TREE" in detail and not allow_temp_sort) for detail in details
+    )
+    return uses_index and not scans
+
+
+def measure(func: Callable[[str], object], rng: random.Random, users: int, queries: int) -> Tuple[float, float]:
+    """p50 / p99 in milliseconds"""
+    samples = []
+    for _ in range(queries):
+        user_id = pick_user(rng, users)
+        start = time.perf_counter()
+        func(user_id)
+        samples.append(time.perf_counter() - start)
+    return float(np.percentile(samples, 50) * 1000), float(np.percentile(samples, 99) * 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de planos de consulta e latencia no customers.db")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--transactions", type=int, default=2_000_000)
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--baseline-queries", type=int, default=20, help="Consultas medidas sem indices")
+    parser.add_argument("--max-p99-ms", type=float, default=5.0)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "customers.db")
+        print(f"\nCarregando {args.users} usuarios e {args.transactions} transacoes...")
+        load_time = build_database(db_path, args.users, args.transactions, args.seed)
+        print(f"[OK] Carga em {load_time:.1f}s ({args.transactions / load_time:,.0f} transacoes/s)")
+
+        conn = sqlite3.connect(db_path)
+        print(f"\n--- Schema v{UNINDEXED_VERSION} (sem indices) ---")
+        for name, sql, params, _, _ in LOOKUPS:
+            print(f"{name}: {' | '.join(query_plan(conn, sql, params))}")
+        client = DatabaseClient(db_path, pool_size=1)
+        p50, p99 = measure(client.get_transactions, random.Random(args.seed), args.users, args.baseline_queries)
+        print(f"get_transactions: p50 {p50:.2f} ms, p99 {p99:.2f} ms ({args.baseline_queries} consultas)")
+        client.close()
+
+        start = time.perf_counter()
+        version = migrate(conn)
+        print(f"\n--- Schema v{version} (indices criados em {time.perf_counter() - start:.1f}s) ---")
+        for name, sql, params, index, allow_temp_sort in LOOKUPS:
+            details = query_plan(conn, sql, params)
+            ok = plan_uses_index(details, index, allow_temp_sort)
+            print(f"{'[OK]' if ok else '[ERRO]'} {name}: {' | '.join(details)}")
+            if not ok:
+                failures.append(f"plano de '{name}' nao usa {index}")
+        conn.close()
+
+        client = DatabaseClient(db_path, pool_size=1)
+        rng = random.Random(args.seed)
+        month_ago = datetime.fromtimestamp(time.time() - 30 * 86400).isoformat()
+        lookups = (
+            ("get_transactions", client.get_transactions),
+            ("get_user_snapshot", client.get_user_snapshot),
+            ("get_transaction_summary", lambda user_id: client.get_transaction_summary(user_id, start=month_ago)),
+        )
+        for name, func in lookups:
+            p50, p99 = measure(func, rng, args.users, args.queries)
+            ok = p99 <= args.max_p99_ms
+            print(f"{'[OK]' if ok else '[ERRO]'} {name}: p50 {p50:.3f} ms, p99 {p99:.3f} ms ({args.queries} consultas)")
+            if not ok:
+                failures.append(f"{name} p99 {p99:.2f} ms > {args.max_p99_ms} ms")
+        client.close()
+
+    if version != LATEST_VERSION:
+        failures.append(f"schema na versao {version}, esperado {LATEST_VERSION}")
+    if failures:
+        print("\n[ERRO] " + "; ".join(failures))
+        return 1
+    print("\n[OK] Consultas indexadas e p99 dentro do limite")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
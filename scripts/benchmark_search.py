@@ -0,0 +1,188 @@
+"""
+Benchmark: full-text transaction search (FTS5) at millions of rows
+
+Generates a synthetic customers database (scripts/generate_customers.py) and
+compares, for skewed user traffic (busy merchants are searched most):
+- FTS5: DatabaseClient.search_transactions (bm25, keyset pagination)
+- LIKE: user-scoped `counterparty/failure_reason LIKE '%...%'` over the
+  user index (the only option without FTS)
+
+Also measures a deep page via keyset vs OFFSET for the busiest merchant and
+the insert cost of the sync triggers (row by row vs set-based).
+
+Exit code 1 if FTS p99 exceeds --max-p99-ms.
+
+USO:
+    python scripts/benchmark_search.py
+    python scripts/benchmark_search.py --users 300000 --queries 2000
+"""
+
+import sys
+import time
+import random
+import sqlite3
+import argparse
+import logging
+import tempfile
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+import numpy as np
+
+logging.basicConfig(level=logging.WARNING)
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from scripts.generate_customers import COUNTERPARTIES, FAILURE_REASONS, generate
+from src.db.client import DatabaseClient
+
+LIKE_SQL = """
+    SELECT * FROM transactions
+    WHERE user_id = ? AND (counterparty LIKE ? OR failure_reason LIKE ?)
+    ORDER BY created_at DESC
+    LIMIT ?
+"""
+
+PAGE_SIZE = 10
+
+
+def sample_queries(rng: random.Random, count: int) -> List[str]:
+    """Counterparty names (mixed case) and failure reason keywords"""
+    queries = []
+    for _ in range(count):
+        if rng.random() < 0.8:
+            name = rng.choice(COUNTERPARTIES)
+            queries.append(name.lower() if rng.random() < 0.5 else name)
+        else:
+            queries.append(rng.choice(FAILURE_REASONS[0]).split()[0])
+    return queries
+
+
+def percentiles(samples: List[float]) -> Tuple[float, float]:
+    return float(np.percentile(samples, 50) * 1000), float(np.percentile(samples, 99) * 1000)
+
+
+def timed(func: Callable, calls: List[tuple]) -> List[float]:
+    samples = []
+    for args in calls:
+        start = time.perf_counter()
+        func(*args)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da busca textual (FTS5) em transacoes")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--mean-transactions", type=float, default=20.0)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--deep-page", type=int, default=50, help="Pagina medida na paginacao profunda")
+    parser.add_argument("--max-p99-ms", type=float, default=50.0)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "customers.db")
+        print(f"\nGerando {args.users} usuarios...")
+        result = generate(db_path, args.users, seed=args.seed, mean_transactions=args.mean_transactions)
+        print(
+            f"[OK] {result['transactions']} transacoes; indices + FTS + ANALYZE em {result['index_seconds']:.1f}s"
+        )
+
+        conn = sqlite3.connect(db_path)
+        busiest, busiest_count = conn.execute(
+            "SELECT user_id, COUNT(*) FROM transactions GROUP BY user_id ORDER BY 2 DESC LIMIT 1"
+        ).fetchone()
+        try:
+            fts_bytes = conn.execute(
+                "SELECT SUM(pgsize) FROM dbstat WHERE name LIKE 'transactions_fts%'"
+            ).fetchone()[0]
+            print(f"Indice FTS: {fts_bytes / 1e6:.0f} MB")
+        except sqlite3.OperationalError:
+            pass   # SQLite built without dbstat
+
+        rng = random.Random(args.seed)
+        users = [f"u{int(args.users * rng.random() ** 3):09d}" for _ in range(args.queries)]
+        calls = list(zip(users, sample_queries(rng, args.queries)))
+
+        client = DatabaseClient(db_path, pool_size=1)
+        fts = timed(lambda user_id, text: client.search_transactions(user_id, text, limit=PAGE_SIZE), calls)
+
+        def like(user_id, text):
+            pattern = f"%{text}%"
+            return conn.execute(LIKE_SQL, (user_id, pattern, pattern, PAGE_SIZE)).fetchall()
+
+        scan = timed(like, calls)
+
+        print(f"\n{'busca':<8} {'p50 ms':>8} {'p99 ms':>8}   ({args.queries} consultas, pagina de {PAGE_SIZE})")
+        for label, samples in (("FTS5", fts), ("LIKE", scan)):
+            p50, p99 = percentiles(samples)
+            print(f"{label:<8} {p50:>8.3f} {p99:>8.3f}")
+
+        # Deep pagination on the busiest merchant: keyset cursor vs OFFSET
+        print(f"\nPaginacao profunda ({busiest}, {busiest_count} transacoes), pagina {args.deep_page}:")
+        cursor = None
+        start = time.perf_counter()
+        for page in range(args.deep_page):
+            page_start = time.perf_counter()
+            found = client.search_transactions(busiest, "cliente", limit=PAGE_SIZE, cursor=cursor)
+            cursor = found["next_cursor"]
+            if cursor is None:
+                break
+        keyset_page = time.perf_counter() - page_start
+        print(f"  keyset: {keyset_page * 1000:.2f} ms/pagina ({(time.perf_counter() - start) * 1000:.0f} ms total)")
+        start = time.perf_counter()
+        conn.execute(
+            LIKE_SQL.replace("LIMIT ?", "LIMIT ? OFFSET ?"),
+            (busiest, "%cliente%", "%cliente%", PAGE_SIZE, PAGE_SIZE * (args.deep_page - 1))
+        ).fetchall()
+        print(f"  LIKE + OFFSET: {(time.perf_counter() - start) * 1000:.2f} ms/pagina")
+
+        # Write cost of the sync triggers: row by row (a statement savepoint,
+        # hence an FTS flush, per row), set-based, and with no triggers
+        rows = [
+            (f"bench_{i}", busiest, "pix_out", 10.0, "completed", None, "2030-01-01T00:00:00", f"Loja {i % 100}")
+            for i in range(20000)
+        ]
+        insert_sql = "INSERT INTO transactions VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+        conn.execute("CREATE TEMP TABLE staged AS SELECT * FROM transactions WHERE 0")
+
+        def row_by_row():
+            conn.executemany(insert_sql, rows)
+
+        def set_based():
+            conn.executemany("INSERT INTO staged VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            conn.execute("INSERT INTO transactions SELECT * FROM staged")
+            conn.execute("DELETE FROM staged")
+
+        print(f"\nInsercao de {len(rows)} transacoes:")
+        for label, load in (("executemany + triggers", row_by_row), ("INSERT ... SELECT + triggers", set_based),
+                            ("executemany sem triggers", row_by_row)):
+            if label.endswith("sem triggers"):
+                with conn:
+                    for (name,) in conn.execute(
+                        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'transactions_fts_%'"
+                    ).fetchall():
+                        conn.execute(f"DROP TRIGGER {name}")
+            start = time.perf_counter()
+            with conn:
+                load()
+            elapsed = time.perf_counter() - start
+            with conn:
+                conn.execute("DELETE FROM transactions WHERE transaction_id LIKE 'bench\\_%' ESCAPE '\\'")
+            print(f"  {label:<30} {len(rows) / elapsed:>10,.0f}/s")
+        client.close()
+        conn.close()
+
+    p99 = percentiles(fts)[1]
+    if p99 > args.max_p99_ms:
+        print(f"\n[ERRO] FTS p99 {p99:.2f} ms > {args.max_p99_ms} ms")
+        return 1
+    print(f"\n[OK] FTS p99 {p99:.2f} ms (limite {args.max_p99_ms} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,272 @@
+"""
+Gerador de dados sinteticos do customers.db para testes de carga
+
+Gera N usuarios (milhoes) com distribuicoes realistas:
+- plano, status da conta (com motivo de bloqueio) e saldo (log-normal,
+  parte dos comerciantes zerada)
+- transacoes por usuario com cauda pesada (Lomax/Pareto): a maioria tem
+  poucas, alguns comerciantes tem milhares
+- tipo, valor (log-normal), status e motivo de falha das transacoes
+- 0-3 cartoes por usuario (cartoes de contas bloqueadas bloqueados)
+
+Reprodutivel: a mesma --seed (e --as-of) gera exatamente o mesmo banco.
+
+Carga em massa: schema via migracoes, indices secundarios e triggers da busca
+textual removidos antes da carga e recriados no fim (indice FTS reconstruido),
+`executemany` em lotes de --batch-size usuarios com uma transacao por lote,
+journal desligado durante a carga. IDs com zero a esquerda mantem as chaves
+primarias (TEXT) em ordem de insercao.
+
+USO:
+    python scripts/generate_customers.py --users 1000000 --db data/load_test.db
+    python scripts/generate_customers.py --users 50000 --mean-transactions 40 --seed 7 --replace
+"""
+
+import sys
+import time
+import sqlite3
+import argparse
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.db.migrations import migrate, rebuild_transaction_search
+
+PLANS = (["basic", "premium", "enterprise"], [0.72, 0.24, 0.04])
+ACCOUNT_STATUSES = (["active", "blocked", "pending", "inactive"], [0.92, 0.03, 0.03, 0.02])
+BLOCK_REASONS = [
+    "Suspicious Activity Detected", "Atividade fraudulenta detectada",
+    "Chargeback excessivo", "Documentacao pendente",
+]
+TRANSACTION_TYPES = (["pix_in", "pix_out", "card_sale", "payout", "transfer"], [0.24, 0.24, 0.32, 0.1, 0.1])
+TRANSACTION_STATUSES = (["completed", "failed", "pending"], [0.9, 0.07, 0.03])
+FAILURE_REASONS = (
+    ["Insufficient funds", "Account blocked", "Limit exceeded", "Invalid Pix key", "Issuer timeout"],
+    [0.45, 0.1, 0.2, 0.15, 0.1],
+)
+COUNTERPARTIES = [f"{kind} {n}" for kind in ("Cliente", "Loja", "Fornecedor") for n in range(100)] + [
+    "InfinitePay Settlement"
+]
+CARDS_PER_USER = ([0, 1, 2, 3], [0.3, 0.45, 0.2, 0.05])
+
+# Share of users with zero balance / no transactions at all
+ZERO_BALANCE_SHARE = 0.1
+NO_HISTORY_SHARE = 0.1
+
+DAY = 86400
+
+
+def _iso(epochs: np.ndarray) -> List[str]:
+    """Epoch seconds -> 'YYYY-MM-DDTHH:MM:SS' (vectorized)"""
+    return np.datetime_as_string(epochs.astype("datetime64[s]")).tolist()
+
+
+def _choice(rng: np.random.Generator, spec: Tuple[list, list], size: int) -> np.ndarray:
+    values, weights = spec
+    return np.asarray(values, dtype=object)[rng.choice(len(values), size=size, p=weights)]
+
+
+def generate_batch(
+    rng: np.random.Generator,
+    first_user: int,
+    count: int,
+    first_transaction: int,
+    now: int,
+    mean_transactions: float,
+    tail: float,
+    max_transactions: int,
+) -> Dict[str, Iterable[tuple]]:
+    """
+    Rows for users [first_user, first_user + count)
+
+    Returns:
+        {'users', 'transactions', 'cards'}: row tuple iterables for executemany
+    """
+    user_numbers = np.arange(first_user, first_user + count)
+    user_ids = np.char.add("u", np.char.zfill(user_numbers.astype(str), 9))
+    user_created = now - rng.integers(30 * DAY, 3 * 365 * DAY, size=count)
+    statuses = _choice(rng, ACCOUNT_STATUSES, count)
+    blocked = statuses == "blocked"
+    balances = np.round(rng.lognormal(6.0, 2.0, size=count), 2)
+    balances[(rng.random(count) < ZERO_BALANCE_SHARE) | blocked] = 0.0
+    block_reasons = np.full(count, None, dtype=object)
+    block_reasons[blocked] = rng.choice(np.asarray(BLOCK_REASONS, dtype=object), size=int(blocked.sum()))
+    user_id_list = user_ids.tolist()
+    users = zip(
+        user_id_list,
+        [f"User {n}" for n in user_numbers.tolist()],
+        [f"{user_id}@example.com" for user_id in user_id_list],
+        statuses.tolist(),
+        _choice(rng, PLANS, count).tolist(),
+        balances.tolist(),
+        _iso(user_created),
+        block_reasons.tolist(),
+    )
+
+    # Heavy tail: Lomax with mean `mean_transactions` (tail > 1)
+    per_user = np.floor(rng.pareto(tail, size=count) * mean_transactions * (tail - 1)).astype(np.int64)
+    per_user = np.minimum(per_user, max_transactions)
+    per_user[rng.random(count) < NO_HISTORY_SHARE] = 0
+    total = int(per_user.sum())
+    owner = np.repeat(np.arange(count), per_user)
+    transaction_numbers = np.arange(first_transaction, first_transaction + total)
+    transaction_statuses = _choice(rng, TRANSACTION_STATUSES, total)
+    failed = transaction_statuses == "failed"
+    failure_reasons = np.full(total, None, dtype=object)
+    failure_reasons[failed] = _choice(rng, FAILURE_REASONS, int(failed.sum()))
+    created = user_created[owner] + (rng.random(total) * (now - user_created[owner])).astype(np.int64)
+    transactions = zip(
+        np.char.add("tx", np.char.zfill(transaction_numbers.astype(str), 11)).tolist(),
+        user_ids[owner].tolist(),
+        _choice(rng, TRANSACTION_TYPES, total).tolist(),
+        np.round(rng.lognormal(4.5, 1.3, size=total), 2).tolist(),
+        transaction_statuses.tolist(),
+        failure_reasons.tolist(),
+        _iso(created),
+        np.asarray(COUNTERPARTIES, dtype=object)[rng.integers(len(COUNTERPARTIES), size=total)].tolist(),
+    )
+
+    cards_per_user = _choice(rng, CARDS_PER_USER, count).astype(np.int64)
+    card_owner = np.repeat(np.arange(count), cards_per_user)
+    card_count = len(card_owner)
+    limits = np.round(rng.lognormal(8.0, 0.8, size=card_count), -2)
+    card_statuses = np.where(blocked[card_owner] | (rng.random(card_count) < 0.03), "blocked", "active")
+    # Position of each card among its owner's cards (0, 1, 2)
+    card_index = np.arange(card_count) - np.repeat(np.cumsum(cards_per_user) - cards_per_user, cards_per_user)
+    card_user_ids = user_ids[card_owner].tolist()
+    cards = zip(
+        [f"card_{user_id}_{n}" for user_id, n in zip(card_user_ids, card_index.tolist())],
+        card_user_ids,
+        np.char.zfill(rng.integers(10000, size=card_count).astype(str), 4).tolist(),
+        card_statuses.tolist(),
+        limits.tolist(),
+        np.round(limits * rng.random(card_count), 2).tolist(),
+    )
+
+    return {"users": users, "transactions": transactions, "cards": cards}
+
+
+def _deferred_schema(conn: sqlite3.Connection) -> List[Tuple[str, str, str]]:
+    """(type, name, sql) of the explicit indexes and triggers on the loaded tables"""
+    return conn.execute("""
+        SELECT type, name, sql FROM sqlite_master
+        WHERE type IN ('index', 'trigger') AND sql IS NOT NULL AND tbl_name IN ('users', 'transactions', 'cards')
+    """).fetchall()
+
+
+def generate(
+    db_path: str,
+    users: int,
+    seed: int = 42,
+    batch_size: int = 20000,
+    mean_transactions: float = 20.0,
+    tail: float = 1.5,
+    max_transactions: int = 50000,
+    as_of: Optional[date] = None,
+) -> Dict[str, float]:
+    """
+    Bulk-loads a synthetic database into `db_path` (migrated schema)
+
+    Timestamps are spread up to `as_of` (default: today, UTC): the same seed
+    and as_of always produce the same rows.
+
+    Returns:
+        Row counts and timings: users, transactions, cards, load_seconds,
+        index_seconds
+    """
+    rng = np.random.default_rng(seed)
+    as_of = as_of or datetime.now(timezone.utc).date()
+    now = int(datetime(as_of.year, as_of.month, as_of.day, tzinfo=timezone.utc).timestamp())
+    conn = sqlite3.connect(db_path)
+    migrate(conn)
+
+    deferred = _deferred_schema(conn)
+    for kind, name, _ in deferred:
+        conn.execute(f"DROP {kind.upper()} {name}")
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA cache_size = -262144")
+
+    counts = {"users": 0, "transactions": 0, "cards": 0}
+    start = time.perf_counter()
+    for first_user in range(0, users, batch_size):
+        batch = generate_batch(
+            rng, first_user, min(batch_size, users - first_user), counts["transactions"],
+            now, mean_transactions, tail, max_transactions,
+        )
+        with conn:
+            counts["users"] += conn.executemany(
+                "INSERT INTO users (user_id, name, email, account_status, plan, balance, created_at, block_reason) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", batch["users"]
+            ).rowcount
+            counts["transactions"] += conn.executemany(
+                "INSERT INTO transactions (transaction_id, user_id, type, amount, status, failure_reason, "
+                "created_at, counterparty) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", batch["transactions"]
+            ).rowcount
+            counts["cards"] += conn.executemany(
+                "INSERT INTO cards (id, user_id, last_4, status, limit_amount, used_amount) "
+                "VALUES (?, ?, ?, ?, ?, ?)", batch["cards"]
+            ).rowcount
+    load_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with conn:
+        for _, _, sql in deferred:
+            conn.execute(sql)
+        # The search index missed every row while its triggers were off
+        rebuild_transaction_search(conn)
+    conn.execute("ANALYZE")
+    index_seconds = time.perf_counter() - start
+
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.close()
+    return {**counts, "load_seconds": load_seconds, "index_seconds": index_seconds}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera um customers.db sintetico em larga escala")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--db", default="data/load_test.db", help="Banco de destino (nunca o de producao)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=20000, help="Usuarios por transacao")
+    parser.add_argument("--mean-transactions", type=float, default=20.0, help="Media de transacoes por usuario")
+    parser.add_argument("--tail", type=float, default=1.5, help="Expoente da cauda (menor = mais pesada, > 1)")
+    parser.add_argument("--max-transactions", type=int, default=50000, help="Teto de transacoes por usuario")
+    parser.add_argument("--as-of", type=date.fromisoformat, default=None,
+                        help="Data de referencia YYYY-MM-DD (padrao: hoje)")
+    parser.add_argument("--replace", action="store_true", help="Apaga o banco de destino se existir")
+    args = parser.parse_args()
+
+    if args.tail <= 1:
+        print("[ERRO] --tail deve ser > 1 (media finita)")
+        return 1
+    db_path = Path(args.db)
+    if db_path.exists():
+        if not args.replace:
+            print(f"[ERRO] {db_path} ja existe (use --replace)")
+            return 1
+        for suffix in ("", "-wal", "-shm"):
+            Path(f"{db_path}{suffix}").unlink(missing_ok=True)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+
+    print(f"=== Gerando {args.users} usuarios (seed {args.seed}) em {db_path}...")
+    result = generate(
+        str(db_path), args.users, seed=args.seed, batch_size=args.batch_size,
+        mean_transactions=args.mean_transactions, tail=args.tail, max_transactions=args.max_transactions,
+        as_of=args.as_of,
+    )
+    rows = result["users"] + result["transactions"] + result["cards"]
+    print(f"[OK] {result['users']} usuarios, {result['transactions']} transacoes, {result['cards']} cartoes")
+    print(f"[OK] Carga: {result['load_seconds']:.1f}s ({rows / result['load_seconds']:,.0f} linhas/s)")
+    print(f"[OK] Indices + busca textual + ANALYZE: {result['index_seconds']:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+"""
+Export/import de um artifact pre-construido do indice RAG
+
+O artifact (.tar unico, sem compressao) contem embeddings, textos, metadata
+colunar e manifest. Pode ser:
+- servido direto via mmap: RAG_INDEX_ARTIFACT=<arquivo.tar>
+- importado numa nova versao da collection ChromaDB (troca blue/green)
+
+USO:
+    python scripts/index_artifact.py export [--output data/artifacts/x.tar] [--collection nome]
+    python scripts/index_artifact.py import data/artifacts/x.tar [--no-activate]
+    python scripts/index_artifact.py info data/artifacts/x.tar
+"""
+
+import sys
+import json
+import argparse
+import logging
+from pathlib import Path
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.rag.artifact import IndexArtifact, export_artifact, import_artifact
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export/import do artifact do indice RAG")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_cmd = commands.add_parser("export", help="Exporta a collection atual para um artifact")
+    export_cmd.add_argument("--output", help="Arquivo .tar (padrao: data/artifacts/<versao>.tar)")
+    export_cmd.add_argument("--collection", help="Collection a exportar (padrao: a atual)")
+
+    import_cmd = commands.add_parser("import", help="Importa um artifact numa nova versao da collection")
+    import_cmd.add_argument("path")
+    import_cmd.add_argument("--no-activate", action="store_true", help="Nao troca o ponteiro 'current'")
+
+    info_cmd = commands.add_parser("info", help="Mostra o manifest de um artifact")
+    info_cmd.add_argument("path")
+
+    args = parser.parse_args()
+
+    try:
+        if args.command == "export":
+            path = export_artifact(args.output, args.collection)
+            print(f"\n[SUCESSO] Artifact exportado: {path}")
+        elif args.command == "import":
+            name = import_artifact(args.path, activate=not args.no_activate)
+            print(f"\n[SUCESSO] Artifact importado na collection {name}")
+        else:
+            manifest = IndexArtifact(args.path).manifest
+            print(json.dumps({k: v for k, v in manifest.items() if k != "members"}, indent=2))
+        return 0
+    except Exception as e:
+        print(f"\n[ERRO] {args.command} falhou: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
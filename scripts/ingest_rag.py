@@ -2,13 +2,18 @@
 Script standalone para popular ChromaDB
 
 USO:
-    python scripts/ingest_rag.py
+    python scripts/ingest_rag.py          # incremental (so o que mudou)
+    python scripts/ingest_rag.py --full   # recria a collection do zero
+                                          # (embeddings ja pagos vem do data/embeddings.db)
+    python scripts/ingest_rag.py --crawl  # descobre as paginas via sitemap + links
+                                          # (retoma um crawl interrompido)
     
 Roda UMA VEZ durante desenvolvimento para popular ChromaDB.
 Depois, commita data/chromadb/ no Git para que container já venha com dados.
 """
 
 import sys
+import argparse
 import logging
 from pathlib import Path
 
@@ -22,20 +27,45 @@ logging.basicConfig(
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-from src.rag.ingest import ingest_documents
-
 
 def main():
     """Executa ingestão RAG"""
+    parser = argparse.ArgumentParser(description="Ingestao RAG para ChromaDB")
+    parser.add_argument("--full", action="store_true", help="Ignora o estado salvo e recria a collection")
+    parser.add_argument("--crawl", action="store_true", help="Modo crawl (sitemap + links) em vez da lista fixa de URLs")
+    parser.add_argument("--seed", help="URL raiz do crawl (padrao: CRAWL_SEED)")
+    args = parser.parse_args()
+    
+    from src.config import settings
+    if args.crawl:
+        settings.ingest_mode = "crawl"
+    if args.seed:
+        settings.crawl_seed = args.seed
+    
+    # Import tardio: os processos do parse pool ("spawn") re-importam este
+    # modulo, e assim nao carregam ChromaDB/LangChain a toa
+    from src.rag.ingest import ingest_documents
+    
     print("\n" + "="*80)
     print("SCRIPT: Ingestao RAG para ChromaDB")
     print("="*80 + "\n")
     
     try:
-        count = ingest_documents()
+        summary = ingest_documents(full_rebuild=args.full)
         
         print("\n" + "="*80)
-        print(f"[SUCESSO] {count} chunks ingeridos com sucesso!")
+        print(f"[SUCESSO] {summary.chunks_total} chunks na collection")
+        print(f"  Paginas: {summary.pages_total} "
+              f"({summary.pages_not_modified} 304, {summary.pages_unchanged} iguais, {summary.pages_changed} alteradas)")
+        print(f"  Chunks: {summary.chunks_unchanged} inalterados, "
+              f"{summary.chunks_added} adicionados, {summary.chunks_removed} removidos, "
+              f"{summary.chunks_deduplicated} quase-duplicados colapsados")
+        print(f"  Embeddings do cache: {summary.embeddings_from_cache}")
+        print(f"  Embeddings evitados: {summary.embedding_calls_avoided}")
+        print(f"  Duracao: {summary.duration:.1f}s")
+        print("  Etapas:")
+        for stage in summary.format_stages().split(" | "):
+            print(f"    {stage}")
         print("="*80)
         print("\nProximos passos:")
         print("  1. Verificar: ls data/chromadb/")
@@ -1,44 +1,25 @@
 """Script para popular banco SQLite com dados mock"""
-import sqlite3
+import sys
 from datetime import datetime, timedelta
 import random
 from pathlib import Path
 
-# Configuração
-DB_PATH = "./data/customers.db"
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.db.client import db_client
+from src.db.migrations import migrate
 
 
 def create_tables(conn):
-    """Cria tabelas se não existirem"""
-    cursor = conn.cursor()
-    
-    # Tabela users
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            user_id TEXT PRIMARY KEY,
-            name TEXT NOT NULL,
-            email TEXT NOT NULL,
-            account_status TEXT NOT NULL,
-            plan TEXT NOT NULL,
-            balance REAL DEFAULT 0.0,
-            created_at TEXT NOT NULL
-        )
-    """)
-    
-    # Tabela transactions
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS transactions (
-            transaction_id TEXT PRIMARY KEY,
-            user_id TEXT NOT NULL,
-            amount REAL NOT NULL,
-            type TEXT NOT NULL,
-            status TEXT NOT NULL,
-            created_at TEXT NOT NULL,
-            FOREIGN KEY (user_id) REFERENCES users(user_id)
-        )
-    """)
-    
-    conn.commit()
+    """
+    Cria/atualiza as tabelas via migracoes versionadas (src/db/migrations.py)
+
+    Returns:
+        Versao do schema apos migrar
+    """
+    return migrate(conn)
 
 
 def seed_users(conn):
@@ -69,19 +50,6 @@ def seed_users(conn):
         VALUES (?, ?, ?, ?, ?, ?, ?)
     """, users)
     
-    # Update block reason for blocked_user (if schema allowed, but for now we simulate via status)
-    # If we had a block_reason column, we'd update it here.
-    # checking schema... create_tables doesn't have block_reason.
-    # Let's add it dynamically if we want better realism, or just rely on 'blocked' status.
-    # The tool 'get_user_info' checks 'block_reason' column if status is blocked.
-    # We should ensure the table has it or the tool handles it.
-    # Looking at create_tables, it does NOT have block_reason.
-    # Let's alter table to add it safely.
-    try:
-        cursor.execute("ALTER TABLE users ADD COLUMN block_reason TEXT")
-    except sqlite3.OperationalError:
-        pass # Column likely exists
-        
     cursor.execute("UPDATE users SET block_reason = 'Suspicious Activity Detected' WHERE user_id = 'blocked_user'")
     
     conn.commit()
@@ -132,18 +100,17 @@ def seed_transactions(conn):
     # --- 4. New User: No transactions ---
     # (Intentionally empty)
     
+    # Upsert, not INSERT OR REPLACE: REPLACE deletes the old row without firing
+    # the FTS delete trigger (recursive_triggers is off) and corrupts the index
     cursor.executemany("""
-        INSERT OR REPLACE INTO transactions 
+        INSERT INTO transactions 
         (transaction_id, user_id, amount, type, status, created_at)
         VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT(transaction_id) DO UPDATE SET
+            user_id = excluded.user_id, amount = excluded.amount, type = excluded.type,
+            status = excluded.status, created_at = excluded.created_at
     """, transactions)
     
-    # Add failure reason for blocked user (schema update needed?)
-    try:
-        cursor.execute("ALTER TABLE transactions ADD COLUMN failure_reason TEXT")
-    except sqlite3.OperationalError:
-        pass
-        
     cursor.execute("UPDATE transactions SET failure_reason = 'Account Blocked' WHERE transaction_id = 'tx_blocked_1'")
     
     conn.commit()
@@ -157,31 +124,30 @@ def seed_if_empty():
     Chamado automaticamente no startup da aplicação
     """
     # Criar diretório data se não existir
-    Path("./data").mkdir(exist_ok=True)
-    
-    # Conectar ao banco
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+    Path(db_client.db_path).parent.mkdir(parents=True, exist_ok=True)
     
-    # Criar tabelas se não existirem
-    create_tables(conn)
-    
-    # Verificar se já tem dados
-    cursor.execute("SELECT COUNT(*) FROM users")
-    count = cursor.fetchone()[0]
-    
-    if count > 0:
-        print(f"[OK] Banco ja populado com {count} usuarios")
-        conn.close()
-        return
-    
-    print("=== Banco vazio, iniciando seed...")
-    
-    # Seed
-    seed_users(conn)
-    seed_transactions(conn)
+    # Conexão do pool (WAL, busy_timeout)
+    with db_client.connection() as conn:
+        cursor = conn.cursor()
+        
+        # Criar/migrar tabelas
+        version = create_tables(conn)
+        print(f"[OK] Schema na versao {version}")
+        
+        # Verificar se já tem dados
+        cursor.execute("SELECT COUNT(*) FROM users")
+        count = cursor.fetchone()[0]
+        
+        if count > 0:
+            print(f"[OK] Banco ja populado com {count} usuarios")
+            return
+        
+        print("=== Banco vazio, iniciando seed...")
+        
+        # Seed
+        seed_users(conn)
+        seed_transactions(conn)
     
-    conn.close()
     print("[OK] Seed completo!")
 
 
@@ -190,20 +156,17 @@ def main():
     print("=== Iniciando seed do banco de dados...")
     
     # Criar diretório data se não existir
-    Path("./data").mkdir(exist_ok=True)
+    Path(db_client.db_path).parent.mkdir(parents=True, exist_ok=True)
     
-    # Conectar ao banco
-    conn = sqlite3.connect(DB_PATH)
-    
-    # Criar tabelas
-    create_tables(conn)
-    print("[OK] Tabelas criadas")
-    
-    # Seed
-    seed_users(conn)
-    seed_transactions(conn)
+    with db_client.connection() as conn:
+        # Criar/migrar tabelas
+        version = create_tables(conn)
+        print(f"[OK] Tabelas criadas (schema v{version})")
+        
+        # Seed
+        seed_users(conn)
+        seed_transactions(conn)
     
-    conn.close()
     print("[OK] Seed completo!")
 
 
@@ -8,8 +8,12 @@ from langchain_openai import ChatOpenAI
 import logging
 import re
 from src.config import settings
-from src.tools.support_tools import get_user_info_tool, get_user_transactions_tool, get_user_cards_tool
-from src.utils.session_manager import session_manager
+from src.db.client import db_client
+from src.tools.support_tools import (
+    get_account_snapshot_tool,
+    get_transaction_summary_tool,
+    search_transactions_tool,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -24,9 +28,13 @@ You are a Data Retrieval Specialist for InfinitePay's customer support system.
 You have direct access to the user's account database.
 
 Your ONLY job is to:
-1. SECURITY: Always verify if the user exists (use get_user_info first).
-2. RETRIEVE: Get relevant data using available tools.
-3. DIAGNOSE: Explain WHY something happened based on the data.
+1. SECURITY: Always verify if the user exists (use get_account_snapshot first).
+2. RETRIEVE: get_account_snapshot returns profile, transactions and cards in ONE call.
+3. TOTALS: For sums/counts over a period ("how much did I sell this week?", "how many
+   transfers failed?") use get_transaction_summary. NEVER add up transactions yourself.
+4. SEARCH: For a specific payee/payer or failure reason ("my payment to Fornecedor ABC")
+   use search_transactions: it searches the whole history, not only the last 5.
+5. DIAGNOSE: Explain WHY something happened based on the data.
 
 You can check balances, transaction history, and card limits.
 
@@ -53,7 +61,7 @@ def create_support_agent() -> Agent:
         role=SUPPORT_AGENT_ROLE,
         goal=SUPPORT_AGENT_GOAL,
         backstory=SUPPORT_AGENT_BACKSTORY,
-        tools=[get_user_info_tool, get_user_transactions_tool, get_user_cards_tool],
+        tools=[get_account_snapshot_tool, get_transaction_summary_tool, search_transactions_tool],
         llm=llm,
         verbose=True,
         allow_delegation=False
@@ -64,19 +72,19 @@ def process_support_query(query: str, user_id: str, query_language: str = "Portu
     Process a support query for a specific user.
     Args:
         query_language: Target language for response
-    Uses session cache when available to reduce latency.
+    Prefills the user's name and balance from the DB read cache.
     """
     logger.info(f"Support Agent processing for {user_id}: '{query}'")
     
     try:
-        # Check session cache for user data
-        session_data = session_manager.get_session(user_id)
+        # Current profile from the DB read cache (invalidated on writes, so the
+        # balance is never a stale copy from an earlier request)
+        user = db_client.get_user(user_id)
         user_context = ""
         
-        if session_data and 'name' in session_data:
-            user_context = f"\nUSER CONTEXT (from session cache):\n- Name: {session_data['name']}\n"
-            if 'balance' in session_data:
-                user_context += f"- Last known balance: R$ {session_data['balance']:.2f}\n"
+        if user:
+            user_context = f"\nUSER CONTEXT:\n- Name: {user['name']}\n"
+            user_context += f"- Current balance: R$ {user['balance']:.2f}\n"
             user_context += "\nPlease address the user by their name when appropriate.\n"
         
         agent = create_support_agent()
@@ -86,14 +94,20 @@ def process_support_query(query: str, user_id: str, query_language: str = "Portu
 USER (ID: {user_id}): "{query}"
 {user_context}
 TASKS:
-1. CHECK 'get_user_info' (Always - to get latest data).
-2. IF NEEDED, check transactions/cards.
-3. DIAGNOSE based on DB data.
-4. RETURN RAW TEXT answer (No preamble).
-5. USE the user's NAME when addressing them if you know it.
+1. CALL 'get_account_snapshot' ONCE (Always - latest profile, transactions and cards).
+2. Do NOT call it again: everything is in that single result.
+3. Totals/counts over a period? CALL 'get_transaction_summary' with the period and
+   type/status filters and report its exact numbers.
+4. A specific counterparty or failure reason not in the snapshot? CALL 'search_transactions'
+   with just that name/reason.
+5. DIAGNOSE based on DB data.
+6. RETURN RAW TEXT answer (No preamble).
+7. USE the user's NAME when addressing them if you know it.
 
 Example:
-"Why failed?" -> Check Transac -> Status 'failed' reason -> Return reason.
+"Why failed?" -> Snapshot -> Transaction status 'failed' reason -> Return reason.
+"Quanto vendi esta semana?" -> get_transaction_summary(period="this_week", transaction_type="card_sale") -> total.
+"E o pagamento para Fornecedor ABC?" -> search_transactions(query="Fornecedor ABC") -> status/reason.
 
 RULES:
 - User not found? Say "Cannot access account".
@@ -114,9 +128,6 @@ RULES:
         )
         result = crew.kickoff()
         
-        # Update session with user data if we got it from tools
-        # (The tools themselves will update the session, but we ensure it's there)
-        
         return {
             "response": str(result),
             "agent": "support",
@@ -31,15 +31,136 @@ class Settings(BaseSettings):
         description="Path to SQLite database"
     )
     
+    # SQLite connection pool (support database)
+    sqlite_pool_size: int = Field(default=8, description="Max pooled connections per database")
+    sqlite_busy_timeout_ms: int = Field(default=5000, description="How long a connection waits on a locked database")
+    sqlite_synchronous: str = Field(default="NORMAL", description="PRAGMA synchronous (NORMAL is durable with WAL except on power loss)")
+    sqlite_cache_size_kib: int = Field(default=16384, description="Page cache per connection (KiB)")
+    sqlite_mmap_size: int = Field(default=268435456, description="Bytes of the database file read through mmap")
+    sqlite_statement_cache: int = Field(default=128, description="Prepared statements cached per connection")
+
+    # Read cache (user, cards and recent transactions; see src/db/cache.py)
+    db_read_cache_enabled: bool = Field(default=True, description="Serve repeated per-user reads from memory")
+    db_read_cache_max_entries: int = Field(default=10000, description="Cached lookups kept (least recently used evicted)")
+
+    # Group commit (DatabaseClient.acreate_user)
+    sqlite_group_commit_window_ms: float = Field(default=2.0, description="How long a sign-up waits for others to share its commit")
+    sqlite_group_commit_max_batch: int = Field(default=256, description="Sign-ups per grouped transaction")
+
+    # Bulk user provisioning (POST /users/bulk)
+    users_bulk_max_items: int = Field(default=100000, description="Max users per bulk request")
+
+    # In-memory read replica (see src/db/replica.py)
+    sqlite_memory_replica: bool = Field(default=False, description="Serve reads from an in-memory copy of the database")
+    sqlite_replica_refresh_seconds: float = Field(
+        default=5.0,
+        description="Max replica lag: how often the file is checked for commits and copied again (0: never)"
+    )
+    
     # LLM Config
     default_model: str = Field(default="gpt-4o-mini", description="Default LLM model")
     embedding_model: str = Field(
         default="text-embedding-3-small",
         description="Embedding model"
     )
+    embedding_dimensions: int | None = Field(
+        default=None,
+        description="Reduced embedding dimensions requested from the model (None = model default)"
+    )
     max_tokens: int = Field(default=1000, description="Max tokens per response")
     temperature: float = Field(default=0.7, description="LLM Temperature")
     
+    # Vector storage
+    embedding_storage: str = Field(
+        default="float32",
+        description="Serving precision for stored vectors: float32, float16 or int8"
+    )
+    quantized_rescore_candidates: int = Field(
+        default=20,
+        description="Top quantized candidates re-scored in float precision (0 disables)"
+    )
+    
+    # Embedding store (ingestion)
+    embedding_cache_path: str = Field(
+        default="./data/embeddings.db",
+        description="SQLite store of embeddings keyed by hash(model, dimensions, text)"
+    )
+    embedding_batch_size: int = Field(default=512, description="Texts per embeddings API request")
+    embedding_max_concurrency: int = Field(default=4, description="Concurrent embeddings API requests")
+    embedding_max_retries: int = Field(default=6, description="Attempts per embeddings request (rate limits, 5xx)")
+    
+    # Near-duplicate chunk detection (ingestion)
+    dedup_enabled: bool = Field(default=True, description="Collapse near-duplicate chunks across pages")
+    dedup_threshold: float = Field(default=0.85, description="Estimated Jaccard similarity to treat chunks as duplicates")
+    dedup_shingle_size: int = Field(default=5, description="Words per shingle")
+    dedup_num_perm: int = Field(default=128, description="MinHash permutations")
+    dedup_bands: int = Field(default=16, description="LSH bands (num_perm must be a multiple)")
+    
+    # Ingestion fetching
+    ingest_max_workers: int = Field(default=8, description="Concurrent URL fetches during ingestion")
+    ingest_per_host_limit: int = Field(default=4, description="Concurrent fetches per host")
+    ingest_fetch_timeout: float = Field(default=30.0, description="Per-request timeout (seconds)")
+    ingest_max_retries: int = Field(default=3, description="Fetch attempts per URL")
+    ingest_backoff_base: float = Field(default=1.0, description="Base of exponential retry backoff (seconds)")
+    ingest_parse_workers: int | None = Field(
+        default=None,
+        description="Processes parsing/chunking HTML during ingestion (None = CPU count)"
+    )
+    ingest_parse_pool_min_pages: int = Field(
+        default=8,
+        description="Below this many URLs pages are parsed in-process (pool startup would dominate)"
+    )
+    ingest_queue_size: int = Field(default=16, description="Items buffered between streaming ingestion stages")
+    ingest_batch_size: int = Field(default=256, description="Chunks per embedding/upsert batch")
+    ingest_state_path: str = Field(
+        default="./data/ingest_state.db",
+        description="SQLite file with per-URL validators and chunk hashes (incremental ingestion)"
+    )
+    
+    # Crawler mode (ingestion)
+    ingest_mode: str = Field(
+        default="urls",
+        description="Ingestion source: 'urls' (fixed INFINITEPAY_URLS list) or 'crawl' (sitemap + links)"
+    )
+    crawl_seed: str = Field(default="https://www.infinitepay.io", description="Root URL the crawler starts from")
+    crawl_use_sitemap: bool = Field(default=True, description="Seed the crawl from robots.txt sitemaps or /sitemap.xml")
+    crawl_path_prefix: str | None = Field(default=None, description="Only crawl paths under this prefix (e.g. /ajuda)")
+    crawl_max_pages: int = Field(default=5000, description="Frontier size limit")
+    crawl_max_depth: int = Field(default=5, description="Link hops followed from the seeds")
+    crawl_delay: float = Field(default=0.5, description="Min seconds between request starts per host (robots Crawl-delay wins if larger)")
+    crawl_respect_robots: bool = Field(default=True, description="Honor robots.txt Disallow/Crawl-delay")
+    
+    # HNSW index (applied when the collection is created by ingestion)
+    hnsw_space: str = Field(default="l2", description="HNSW distance: l2, cosine or ip")
+    hnsw_m: int = Field(default=16, description="HNSW max neighbours per node (M)")
+    hnsw_construction_ef: int = Field(default=100, description="HNSW ef at construction time")
+    hnsw_search_ef: int = Field(default=100, description="HNSW ef at query time (Chroma default; measure with scripts/benchmark_hnsw.py before lowering)")
+    
+    # Prebuilt index artifact (serve from a memory-mapped file instead of ChromaDB)
+    rag_index_artifact: str | None = Field(
+        default=None,
+        description="Path of an index artifact (scripts/index_artifact.py export) to serve searches from"
+    )
+    
+    # Collection versions (blue/green re-indexing)
+    rag_collection_grace_seconds: float = Field(
+        default=600.0,
+        description="How long a replaced collection version is kept for in-flight searches before deletion"
+    )
+    
+    # RAG context
+    rag_context_token_budget: int = Field(
+        default=2500,
+        description="Max tokens of retrieved context sent to the LLM per search"
+    )
+    
+    # RAG warmup
+    rag_warmup_enabled: bool = Field(default=True, description="Warm up RAG searcher at startup")
+    rag_warmup_queries: list[str] = Field(
+        default=["taxas da maquininha", "Pix InfinitePay"],
+        description="Queries executed at startup to load the index before readiness"
+    )
+    
     class Config:
         env_file = ".env"
         case_sensitive = False
@@ -27,11 +27,12 @@ def create_support_agent():
         Your job is to gather relevant user information efficiently.
         
         TOOL USAGE GUIDELINES:
-        - get_user_info: Check account status, balance, plan. ALWAYS use for any user query.
-        - get_user_transactions: Use ONLY if query mentions: payments, transfers, transactions, purchases, history.
-        - get_user_cards: Use ONLY if query mentions: card, cartão, limit, spending.
-        
-        DO NOT use all tools blindly. Be selective based on the query."""
+        - get_account_snapshot: Account status, balance, recent transactions and cards in ONE call.
+          Call it exactly once per query; report only the parts relevant to the query.
+        - get_transaction_summary: Exact totals/counts by type and status over a period
+          (e.g. this_week, 30d, last_month). Use it for "how much / how many" questions.
+        - search_transactions: Whole-history search by counterparty or failure reason
+          (e.g. "Fornecedor ABC"). Use it when the query names a specific payee/payer."""
     
     return agent
 
@@ -64,8 +65,13 @@ Query: "{query}"
 OBJECTIVE: Gather user financial data to answer the query.
 
 MANDATORY ACTIONS:
-1. EXECUTE tool `get_user_info` to get the CURRENT BALANCE and status. (CRITICAL)
-2. EXECUTE tool `get_user_transactions` IF the query mentions history/spending.
+1. EXECUTE tool `get_account_snapshot` ONCE to get the CURRENT BALANCE, status,
+   transactions and cards. (CRITICAL)
+2. Report the transactions/cards only IF the query mentions history/spending/cards.
+3. IF the query asks for totals or counts over a period, EXECUTE `get_transaction_summary`
+   with that period and report its numbers (never sum transactions yourself).
+4. IF the query names a counterparty or failure reason, EXECUTE `search_transactions`
+   with just that name/reason.
 
 OUTPUT GUIDELINES:
 - You MUST report the exact numbers found in the tool output.
@@ -0,0 +1,217 @@
+"""
+Read Cache Module
+Bounded read-through cache for per-user lookups (user, cards, recent
+transactions, snapshots).
+
+Entries are keyed by (kind, user_id, *args) and evicted least-recently-used.
+Staleness is handled two ways:
+- Writes made through DatabaseClient invalidate the affected users only
+  (`sync()` once the write lock is held, `written()` after the commit)
+- Commits from any other connection or process are detected with
+  `PRAGMA data_version` on a dedicated, read-only-in-practice connection:
+  its value changes whenever someone else commits, and the whole cache is
+  dropped (the change cannot be attributed to a user)
+
+The watcher also sees the client's own commits, so `written()` moves its
+saved version forward. Nobody else can commit between `sync()` and the
+client's commit (BEGIN IMMEDIATE holds the write lock); a commit between
+that and `written()` changes the writing connection's own data_version
+(which ignores its own commits) and flushes the cache instead of being
+absorbed.
+
+A load that races with an invalidation is returned but not stored, so a
+value read before a write can never be cached after it.
+"""
+
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Hashable, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Loaders return this to skip caching (e.g. a database error turned into a default)
+UNCACHEABLE = object()
+
+
+def _copy(value: Any) -> Any:
+    """
+    Copy of a cached value: rows (dicts of scalars), lists of rows, or dicts
+    of those. ~10x cheaper than copy.deepcopy, which would cost as much as
+    the indexed query it replaces.
+    """
+    if isinstance(value, list):
+        return [dict(row) for row in value]
+    if isinstance(value, dict):
+        return {key: _copy(item) if isinstance(item, (dict, list)) else item for key, item in value.items()}
+    return value
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0       # dropped by the size bound
+    invalidations: int = 0   # users invalidated by writes through the client
+    flushes: int = 0         # full drops (external commit seen via data_version, invalidate())
+
+
+class ReadCache:
+    """
+    LRU read-through cache invalidated by writes and by `PRAGMA data_version`
+
+    Values are copied on the way in and out: callers may mutate what they
+    get back.
+    """
+
+    def __init__(self, db_path: Optional[str], max_entries: int):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.stats = CacheStats()
+        self._entries: "OrderedDict[Tuple, Any]" = OrderedDict()
+        self._keys_by_user: Dict[Hashable, Set[Tuple]] = {}
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._watcher: Optional[sqlite3.Connection] = None
+        self._data_version: Optional[int] = None
+
+    def get(self, kind: str, user_id: str, *args: Hashable, load: Callable[[], Any]) -> Any:
+        """Cached value for (kind, user_id, *args), calling `load` on a miss"""
+        key = (kind, user_id) + args
+        with self._lock:
+            self._check_external_writes()
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.stats.hits += 1
+                return _copy(self._entries[key])
+            self.stats.misses += 1
+            generation = self._generation
+
+        value = load()
+        if value is UNCACHEABLE:
+            return None
+
+        with self._lock:
+            if generation == self._generation:
+                self._store(key, user_id, _copy(value))
+        return value
+
+    def invalidate(self, *user_ids: str) -> None:
+        """Drops the entries of these users (every entry when none is given)"""
+        with self._lock:
+            self._generation += 1
+            if not user_ids:
+                self._flush()
+                return
+            self._drop_users(user_ids)
+
+    def sync(self, conn: sqlite3.Connection) -> Optional[int]:
+        """
+        Applies outside commits seen so far (call inside the write
+        transaction, once it holds the write lock)
+
+        Returns:
+            The writing connection's data_version, for `written()`
+            (None if unavailable)
+        """
+        with self._lock:
+            self._check_external_writes()
+        try:
+            return conn.execute("PRAGMA data_version").fetchone()[0]
+        except sqlite3.Error:
+            return None
+
+    def written(
+        self, *user_ids: str, conn: Optional[sqlite3.Connection] = None, seen: Optional[int] = None
+    ) -> None:
+        """
+        After a write through the client: drops these users (every user when
+        none is given) and takes the resulting data_version as already seen,
+        unless someone else committed after us (`conn`'s data_version is no
+        longer `seen`, what `sync()` returned), which flushes everything
+        """
+        with self._lock:
+            self._generation += 1
+            if user_ids:
+                self._drop_users(user_ids)
+            else:
+                self._flush()
+            if seen is None or conn is None or self._data_version is None or self._watcher is None:
+                return   # the next check compares against the version before our write
+            try:
+                version = self._watcher.execute("PRAGMA data_version").fetchone()[0]
+                # Read after the watcher's: a commit it may have absorbed shows up here
+                if conn.execute("PRAGMA data_version").fetchone()[0] != seen:
+                    self._flush()
+                self._data_version = version
+            except sqlite3.Error:
+                # Cannot tell our commit from others: start over
+                self._flush()
+                self._data_version = None
+
+    def snapshot_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = asdict(self.stats)
+            size = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats.update(
+            size=size,
+            max_entries=self.max_entries,
+            hit_rate=round(stats["hits"] / lookups, 4) if lookups else 0.0,
+        )
+        return stats
+
+    def close(self) -> None:
+        with self._lock:
+            if self._watcher is not None:
+                self._watcher.close()
+                self._watcher = None
+            self._data_version = None
+            self._generation += 1
+            self._flush()
+
+    def _store(self, key: Tuple, user_id: str, value: Any) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        self._keys_by_user.setdefault(user_id, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            old_key, _ = self._entries.popitem(last=False)
+            keys = self._keys_by_user.get(old_key[1])
+            if keys is not None:
+                keys.discard(old_key)
+                if not keys:
+                    del self._keys_by_user[old_key[1]]
+            self.stats.evictions += 1
+
+    def _drop_users(self, user_ids) -> None:
+        for user_id in user_ids:
+            for key in self._keys_by_user.pop(user_id, ()):
+                self._entries.pop(key, None)
+            self.stats.invalidations += 1
+
+    def _flush(self) -> None:
+        if self._entries:
+            self.stats.flushes += 1
+        self._entries.clear()
+        self._keys_by_user.clear()
+
+    def _check_external_writes(self) -> None:
+        """Flushes if anyone committed since the last check (caller holds the lock)"""
+        if self.db_path is None:
+            return
+        try:
+            if self._watcher is None:
+                self._watcher = sqlite3.connect(self.db_path, check_same_thread=False)
+            version = self._watcher.execute("PRAGMA data_version").fetchone()[0]
+        except sqlite3.Error as e:
+            # Cannot tell whether the cache is current: serve nothing from it
+            logger.warning(f"[DB] data_version indisponivel, cache descartado: {e}")
+            self._generation += 1
+            self._flush()
+            return
+        if self._data_version is not None and version != self._data_version:
+            self._generation += 1
+            self._flush()
+        self._data_version = version
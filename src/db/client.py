@@ -1,78 +1,703 @@
 """
 Database Client Module
 Provides functions to interact with the SQLite database.
+
+Every access goes through a small pool of long-lived connections:
+- WAL journaling: readers never block the writer and vice versa
+- busy_timeout: concurrent writers wait for the lock instead of failing
+- synchronous=NORMAL, larger page cache and mmap reads
+- prepared statements stay cached per connection (cached_statements)
+
+Per-user lookups (user, cards, recent transactions, snapshot) are served
+through a bounded read-through cache (src/db/cache.py), invalidated by writes
+made here and by commits from anywhere else (`PRAGMA data_version`).
+
+Optionally (settings.sqlite_memory_replica) reads are served from an
+in-memory copy of the file (src/db/replica.py); writes still go to disk.
+
+Async callers (FastAPI endpoints) use the `a*` methods: the same calls on a
+dedicated executor sized to the pool, so the event loop never waits on
+SQLite; concurrent `acreate_user` calls are grouped into one transaction.
 """
 
+import re
+import json
+import queue
+import asyncio
 import sqlite3
 import logging
-from typing import Dict, List, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import partial
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Set, Tuple, Union
 from src.config import settings
+from src.db.cache import UNCACHEABLE, ReadCache
+from src.db.migrations import migrate
+from src.db.replica import MemoryReplica
 
 logger = logging.getLogger(__name__)
 
+# Lookups served by the migration indexes (see scripts/benchmark_query_plan.py)
+USER_SQL = "SELECT * FROM users WHERE user_id = ?"
+TRANSACTIONS_SQL = "SELECT * FROM transactions WHERE user_id = ? ORDER BY created_at DESC LIMIT ?"
+CARDS_SQL = "SELECT * FROM cards WHERE user_id = ?"
+
+# Window aggregates, answered from idx_transactions_user_activity alone
+SUMMARY_SQL = """
+    SELECT type, status, COUNT(*) AS count, ROUND(SUM(amount), 2) AS amount,
+           MIN(created_at) AS first_at, MAX(created_at) AS last_at
+    FROM transactions WHERE {where}
+    GROUP BY type, status
+    ORDER BY amount DESC
+"""
+FAILURES_SQL = """
+    SELECT COALESCE(failure_reason, 'Unknown') AS reason, COUNT(*) AS count, ROUND(SUM(amount), 2) AS amount
+    FROM transactions WHERE {where} AND status = 'failed'
+    GROUP BY 1
+    ORDER BY count DESC
+"""
+
+# Ranked, user-scoped full-text search. Ties go to the newest rows (seq DESC);
+# a page resumes after the last (score, seq) seen (keyset pagination, no OFFSET).
+# bm25 weights: user_id 0 (filter only), counterparty 2, failure_reason 1
+SEARCH_SQL = """
+    SELECT * FROM (
+        SELECT t.*, bm25(transactions_fts, 0.0, 2.0, 1.0) AS score, t.rowid AS seq
+        FROM transactions_fts JOIN transactions t ON t.rowid = transactions_fts.rowid
+        WHERE transactions_fts MATCH ? AND t.user_id = ?
+    )
+    {after}
+    ORDER BY score, seq DESC
+    LIMIT ?
+"""
+
+# Set-based user provisioning: the whole batch is one JSON parameter
+# ([[user_id, name], ...]) inserted by one statement, the same SQL for 1 or
+# 100k users; RETURNING lists the rows that did not exist yet.
+# Throughput: scripts/benchmark_bulk_users.py.
+INSERT_USERS_SQL = """
+    INSERT INTO users (user_id, name, email, account_status, plan, balance, created_at)
+    SELECT json_extract(value, '$[0]'), json_extract(value, '$[1]'), '', 'active', 'basic', 0.0, ?
+    FROM json_each(?) WHERE true
+    ON CONFLICT(user_id) DO NOTHING
+    RETURNING user_id
+"""
+
+# Per-item outcome of insert_users
+USER_CREATED = "created"
+USER_EXISTS = "exists"          # already in the database
+USER_REPEATED = "repeated"      # same user_id earlier in the same request
+
+Moment = Union[str, date, datetime]
+
+
+def _match_expression(user_id: str, text: str, match_all: bool) -> Optional[str]:
+    """
+    FTS5 query for free text: every word as a quoted term, restricted to the
+    user's rows; None if the text has no searchable word
+
+    Whole words only: a prefix term ("cliente"*) materializes the doclist of
+    every matching term across all users, ~50x slower at millions of rows.
+    """
+    words = re.findall(r"\w+", text.lower())
+    if not words:
+        return None
+    user = '"' + user_id.replace('"', '""') + '"'
+    joined = (" AND " if match_all else " OR ").join(f'"{word}"' for word in dict.fromkeys(words))
+    return f"user_id : {user} AND {{counterparty failure_reason}} : ({joined})"
+
+
+def _window_filter(
+    user_id: str,
+    start: Optional[Moment],
+    end: Optional[Moment],
+    types: Optional[Sequence[str]],
+    statuses: Optional[Sequence[str]],
+) -> Tuple[str, list]:
+    """WHERE clause (user, [start, end) window, type/status lists) and its parameters"""
+    clauses, params = ["user_id = ?"], [user_id]
+    for op, moment in ((">=", start), ("<", end)):
+        if moment:
+            clauses.append(f"created_at {op} ?")
+            params.append(moment if isinstance(moment, str) else moment.isoformat())
+    for column, values in (("type", types), ("status", statuses)):
+        if values:
+            clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+    return " AND ".join(clauses), params
+
+
+@dataclass
+class _PendingSignups:
+    """acreate_user calls waiting for a grouped commit on one event loop"""
+    items: List[Tuple[str, str, "asyncio.Future"]] = field(default_factory=list)
+    handle: Optional[asyncio.Handle] = None
+
+
+class ConnectionPool:
+    """
+    Queue-based pool of SQLite connections for one database file
+
+    Connections are opened lazily (up to `size`) with the tuning pragmas
+    applied once, and shared across threads (one user at a time).
+    """
+
+    def __init__(self, db_path: str, size: Optional[int] = None):
+        self.db_path = db_path
+        self.size = size or settings.sqlite_pool_size
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrows a connection (blocks while all `size` are in use)"""
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._release(conn)
+
+    @property
+    def opened(self) -> int:
+        return self._opened
+
+    def close(self) -> None:
+        """Closes idle connections (the pool reopens lazily if used again)"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._opened -= 1
+
+    def _acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._opened < self.size:
+                self._opened += 1
+                create = True
+            else:
+                create = False
+        if create:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._opened -= 1
+                raise
+        try:
+            return self._idle.get(timeout=settings.sqlite_busy_timeout_ms / 1000)
+        except queue.Empty:
+            raise sqlite3.OperationalError(f"connection pool exhausted ({self.size} in use)")
+
+    def _release(self, conn: sqlite3.Connection) -> None:
+        self._idle.put(conn)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=settings.sqlite_busy_timeout_ms / 1000,
+            check_same_thread=False,
+            cached_statements=settings.sqlite_statement_cache,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA busy_timeout = {int(settings.sqlite_busy_timeout_ms)}")
+        try:
+            conn.execute("PRAGMA journal_mode = WAL")
+        except sqlite3.OperationalError as e:
+            # e.g. read-only volume: keep the default rollback journal
+            logger.warning(f"[DB] WAL indisponivel para {self.db_path}: {e}")
+        conn.execute(f"PRAGMA synchronous = {settings.sqlite_synchronous}")
+        conn.execute(f"PRAGMA cache_size = -{int(settings.sqlite_cache_size_kib)}")
+        conn.execute(f"PRAGMA mmap_size = {int(settings.sqlite_mmap_size)}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        return conn
+
+
 class DatabaseClient:
-    def __init__(self):
-        self.db_path = settings.sqlite_db_path
-    
-    def get_connection(self):
-        return sqlite3.connect(self.db_path)
-    
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        pool_size: Optional[int] = None,
+        cache_entries: Optional[int] = None,
+        memory_replica: Optional[bool] = None,
+    ):
+        """
+        Args:
+            cache_entries: Read cache bound (default: settings); 0 disables it
+            memory_replica: Serve reads from an in-memory copy (default: settings)
+        """
+        self.db_path = db_path or settings.sqlite_db_path
+        self.pool = ConnectionPool(self.db_path, pool_size)
+        if cache_entries is None:
+            cache_entries = settings.db_read_cache_max_entries if settings.db_read_cache_enabled else 0
+        self.cache = ReadCache(self.db_path, cache_entries) if cache_entries > 0 else None
+        if memory_replica is None:
+            memory_replica = settings.sqlite_memory_replica
+        # A new copy may be older than what the cache loaded from disk: drop the cache
+        self.replica = MemoryReplica(
+            self.db_path, on_refresh=self.invalidate, readers=self.pool.size
+        ) if memory_replica else None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        # Group commit state per event loop (futures and handles belong to one loop)
+        self._pending_signups: Dict[asyncio.AbstractEventLoop, _PendingSignups] = {}
+        self._commit_tasks: Set["asyncio.Task"] = set()   # asyncio keeps only weak references
+        self._group_commit = {"batches": 0, "users": 0}
+
+    def connection(self):
+        """Pooled connection (context manager); use `with conn:` for a write transaction"""
+        return self.pool.connection()
+
+    @contextmanager
+    def reading(self, user_id: Optional[str] = None) -> Iterator[sqlite3.Connection]:
+        """
+        Connection for reads about `user_id`: the in-memory replica when
+        enabled and the user was not written since the copy, else the pool
+        """
+        if self.replica is not None:
+            if self.replica.serves(user_id):
+                with self.replica.connection() as conn:
+                    yield conn
+                return
+            self.replica.count_disk_read()
+        with self.connection() as conn:
+            yield conn
+
+    @contextmanager
+    def write(self, *user_ids: str) -> Iterator[sqlite3.Connection]:
+        """
+        Write transaction (BEGIN IMMEDIATE) on a pooled connection
+
+        Commits on success (rolls back on error) and then invalidates the
+        cached reads of `user_ids`, or of every user when none is given (and
+        routes their reads to disk until the replica catches up). Every
+        mutation path should go through here.
+        """
+        with self.connection() as conn:
+            seen = None
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                seen = self._before_write(conn)
+                with conn:
+                    yield conn
+            finally:
+                self._written(conn, seen, *user_ids)
+
+    def _before_write(self, conn: sqlite3.Connection) -> Optional[int]:
+        """
+        With the write lock held (no one else can commit until we do):
+        applies outside commits to the cache, so _written only absorbs ours
+        """
+        if self.cache is not None:
+            return self.cache.sync(conn)
+        return None
+
+    def _written(self, conn: sqlite3.Connection, seen: Optional[int], *user_ids: str) -> None:
+        """After a commit (or failed write): replica routing, then cache invalidation"""
+        if self.replica is not None:
+            self.replica.mark_written(*user_ids)
+        if self.cache is not None:
+            self.cache.written(*user_ids, conn=conn, seen=seen)
+
+    def invalidate(self, *user_ids: str) -> None:
+        """Drops cached reads of these users (all users when none is given)"""
+        if self.cache is not None:
+            self.cache.invalidate(*user_ids)
+
+    def cache_stats(self) -> Optional[Dict[str, Any]]:
+        """Read cache counters (hits, misses, hit_rate, ...), None when disabled"""
+        return self.cache.snapshot_stats() if self.cache is not None else None
+
+    def start_replica(self) -> None:
+        """Loads the in-memory replica now (instead of on the first read); no-op when disabled"""
+        if self.replica is not None:
+            self.replica.start()
+
+    def replica_stats(self) -> Optional[Dict[str, Any]]:
+        """Replica counters, size and lag_seconds, None when disabled"""
+        return self.replica.stats() if self.replica is not None else None
+
+    def group_commit_stats(self) -> Dict[str, Any]:
+        """acreate_user batching: transactions committed, users submitted, average batch"""
+        stats: Dict[str, Any] = dict(self._group_commit)
+        stats["avg_batch"] = round(stats["users"] / stats["batches"], 2) if stats["batches"] else 0.0
+        return stats
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if self.replica is not None:
+            self.replica.close()
+        self.pool.close()
+        if self.cache is not None:
+            self.cache.close()
+
+    async def _run(self, func: Callable, *args: Any, **kwargs: Any) -> Any:
+        """Runs a blocking call on the DB executor (one thread per pooled connection)"""
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.pool.size, thread_name_prefix="sqlite")
+        return await asyncio.get_running_loop().run_in_executor(self._executor, partial(func, *args, **kwargs))
+
+    def _cached(self, kind: str, user_id: str, *args: Any, load: Callable[[], Any]) -> Any:
+        if self.cache is None:
+            value = load()
+            return None if value is UNCACHEABLE else value
+        return self.cache.get(kind, user_id, *args, load=load)
+
+    def migrate(self) -> int:
+        """Applies pending schema migrations; returns the schema version"""
+        with self.connection() as conn:
+            return migrate(conn)
+
     def get_user(self, user_id: str) -> Optional[Dict]:
         """Fetch user details by ID"""
         logger.info(f"[DB] Fetching User: {user_id}")
-        conn = self.get_connection()
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
+        return self._cached("user", user_id, load=lambda: self._load_user(user_id))
+
+    def _load_user(self, user_id: str) -> Any:
         try:
-            cursor.execute("SELECT * FROM users WHERE user_id = ?", (user_id,))
-            row = cursor.fetchone()
+            with self.reading(user_id) as conn:
+                row = conn.execute(USER_SQL, (user_id,)).fetchone()
             if row:
                 return dict(row)
             return None
         except Exception as e:
             logger.error(f"Error fetching user {user_id}: {e}")
-            return None
-        finally:
-            conn.close()
+            return UNCACHEABLE
 
     def get_transactions(self, user_id: str, limit: int = 5) -> List[Dict]:
         """Fetch recent transactions for a user"""
-        conn = self.get_connection()
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
+        return self._cached(
+            "transactions", user_id, limit, load=lambda: self._load_transactions(user_id, limit)
+        ) or []
+
+    def _load_transactions(self, user_id: str, limit: int) -> Any:
         try:
-            cursor.execute("""
-                SELECT * FROM transactions 
-                WHERE user_id = ? 
-                ORDER BY created_at DESC 
-                LIMIT ?
-            """, (user_id, limit))
-            
-            rows = cursor.fetchall()
+            with self.reading(user_id) as conn:
+                rows = conn.execute(TRANSACTIONS_SQL, (user_id, limit)).fetchall()
             return [dict(row) for row in rows]
         except Exception as e:
             logger.error(f"Error fetching transactions for {user_id}: {e}")
-            return []
-        finally:
-            conn.close()
+            return UNCACHEABLE
 
     def get_cards(self, user_id: str) -> List[Dict]:
         """Fetch cards for a user"""
-        conn = self.get_connection()
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
+        return self._cached("cards", user_id, load=lambda: self._load_cards(user_id)) or []
+
+    def _load_cards(self, user_id: str) -> Any:
         try:
-            cursor.execute("SELECT * FROM cards WHERE user_id = ?", (user_id,))
-            rows = cursor.fetchall()
+            with self.reading(user_id) as conn:
+                rows = conn.execute(CARDS_SQL, (user_id,)).fetchall()
             return [dict(row) for row in rows]
         except Exception as e:
             logger.error(f"Error fetching cards for {user_id}: {e}")
+            return UNCACHEABLE
+
+    def get_user_snapshot(self, user_id: str, tx_limit: int = 5) -> Optional[Dict]:
+        """
+        Fetch user, recent transactions and cards in one read transaction
+
+        All three reads see the same database snapshot, through one pooled
+        connection.
+
+        Returns:
+            {'user': ..., 'transactions': [...], 'cards': [...]}, or None if
+            the user does not exist
+        """
+        logger.info(f"[DB] Fetching snapshot: {user_id}")
+        return self._cached("snapshot", user_id, tx_limit, load=lambda: self._load_snapshot(user_id, tx_limit))
+
+    def _load_snapshot(self, user_id: str, tx_limit: int) -> Any:
+        try:
+            with self.reading(user_id) as conn:
+                conn.execute("BEGIN")
+                try:
+                    user = conn.execute(USER_SQL, (user_id,)).fetchone()
+                    if user is None:
+                        return None
+                    transactions = conn.execute(TRANSACTIONS_SQL, (user_id, tx_limit)).fetchall()
+                    try:
+                        cards = conn.execute(CARDS_SQL, (user_id,)).fetchall()
+                    except sqlite3.OperationalError as e:
+                        # databases seeded without a cards table
+                        logger.warning(f"Cards unavailable for {user_id}: {e}")
+                        cards = []
+                finally:
+                    conn.commit()
+            return {
+                "user": dict(user),
+                "transactions": [dict(row) for row in transactions],
+                "cards": [dict(row) for row in cards],
+            }
+        except Exception as e:
+            logger.error(f"Error fetching snapshot for {user_id}: {e}")
+            return UNCACHEABLE
+
+    def get_transaction_summary(
+        self,
+        user_id: str,
+        start: Optional[Moment] = None,
+        end: Optional[Moment] = None,
+        types: Optional[Sequence[str]] = None,
+        statuses: Optional[Sequence[str]] = None,
+    ) -> Optional[Dict]:
+        """
+        Aggregate a user's transactions in SQL (counts and sums, not rows)
+
+        Args:
+            start, end: Window [start, end) on created_at (ISO strings or
+                dates); open-ended when omitted
+            types, statuses: Only these transaction types / statuses
+
+        Returns:
+            {'count', 'amount', 'groups': [{type, status, count, amount,
+            first_at, last_at}], 'failures': [{reason, count, amount}]}, or
+            None on database error. Size depends on the number of distinct
+            types/statuses, not on the history length.
+        """
+        where, params = _window_filter(user_id, start, end, types, statuses)
+        try:
+            with self.reading(user_id) as conn:
+                conn.execute("BEGIN")
+                try:
+                    groups = conn.execute(SUMMARY_SQL.format(where=where), params).fetchall()
+                    failures = conn.execute(FAILURES_SQL.format(where=where), params).fetchall()
+                finally:
+                    conn.commit()
+            groups = [dict(row) for row in groups]
+            return {
+                "count": sum(group["count"] for group in groups),
+                "amount": round(sum((group["amount"] for group in groups), 0.0), 2),
+                "groups": groups,
+                "failures": [dict(row) for row in failures],
+            }
+        except Exception as e:
+            logger.error(f"Error summarizing transactions for {user_id}: {e}")
+            return None
+
+    def search_transactions(
+        self,
+        user_id: str,
+        text: str,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        match_all: bool = True,
+    ) -> Optional[Dict]:
+        """
+        Full-text search over a user's counterparties and failure reasons
+
+        Args:
+            text: Free text ("Fornecedor ABC", "insufficient funds"); whole
+                words, case and accents ignored
+            limit: Page size
+            cursor: `next_cursor` of the previous page
+            match_all: Every word must match (False: any word, ranked)
+
+        Returns:
+            {'results': [transaction + 'score'], 'next_cursor': str | None},
+            best matches first, or None on database error
+
+        Raises:
+            ValueError: Malformed cursor
+        """
+        expression = _match_expression(user_id, text, match_all)
+        if expression is None:
+            return {"results": [], "next_cursor": None}
+        params: list = [expression, user_id]
+        after = ""
+        if cursor:
+            try:
+                score, seq = cursor.rsplit(":", 1)
+                params += [float(score), float(score), int(seq)]
+            except ValueError:
+                raise ValueError(f"invalid cursor: {cursor!r}")
+            after = "WHERE score > ? OR (score = ? AND seq < ?)"
+        params.append(limit + 1)
+
+        try:
+            with self.reading(user_id) as conn:
+                rows = [dict(row) for row in conn.execute(SEARCH_SQL.format(after=after), params)]
+        except Exception as e:
+            logger.error(f"Error searching transactions for {user_id}: {e}")
+            return None
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = f"{rows[-1]['score']!r}:{rows[-1]['seq']}"
+        for row in rows:
+            del row["seq"]
+        return {"results": rows, "next_cursor": next_cursor}
+
+    def create_user(self, user_id: str, name: str) -> Optional[Dict]:
+        """
+        Insert a new active user with zero balance
+
+        Returns:
+            The created user, or None if `user_id` already exists
+
+        Raises:
+            sqlite3.Error: On any other database error
+        """
+        return self.create_users([(user_id, name)])[0]
+
+    def create_users(self, users: Sequence[Tuple[str, str]]) -> List[Optional[Dict]]:
+        """
+        Insert several new users in one transaction (one commit)
+
+        Args:
+            users: (user_id, name) pairs
+
+        Returns:
+            Per pair, the created user or None if `user_id` already exists
+            (also when repeated earlier in `users`)
+
+        Raises:
+            sqlite3.Error: On any other database error (nothing is inserted)
+        """
+        created_at = datetime.now().isoformat()
+        outcomes = self.insert_users(users, created_at)
+        results: List[Optional[Dict]] = [
+            {
+                "user_id": user_id,
+                "name": name,
+                "email": "",
+                "account_status": "active",
+                "plan": "basic",
+                "balance": 0.0,
+                "created_at": created_at,
+            } if outcome == USER_CREATED else None
+            for (user_id, name), outcome in zip(users, outcomes)
+        ]
+        if len(users) == 1 and results[0]:
+            logger.info(f"[DB] User created: {users[0][0]}")
+        return results
+
+    def insert_users(self, users: Sequence[Tuple[str, str]], created_at: Optional[str] = None) -> List[str]:
+        """
+        Set-based insert of new active users with zero balance
+
+        Duplicates are detected by the database, atomically: the first
+        occurrence of each user_id is inserted with one INSERT ... ON
+        CONFLICT DO NOTHING in a BEGIN IMMEDIATE transaction, and RETURNING
+        tells which ones were new. No check-then-insert race.
+
+        Args:
+            users: (user_id, name) pairs (thousands are fine)
+            created_at: Creation timestamp (default: now)
+
+        Returns:
+            Per pair: USER_CREATED, USER_EXISTS or USER_REPEATED
+
+        Raises:
+            sqlite3.Error: On any other database error (nothing is inserted)
+        """
+        first: Dict[str, int] = {}
+        for position, (user_id, _) in enumerate(users):
+            first.setdefault(user_id, position)
+        if not first:
             return []
-        finally:
-            conn.close()
+        created_at = created_at or datetime.now().isoformat()
+
+        batch = json.dumps([users[position] for position in first.values()], ensure_ascii=False)
+        with self.write(*first) as conn:
+            inserted = {row[0] for row in conn.execute(INSERT_USERS_SQL, (created_at, batch))}
+
+        if len(first) > 1:
+            logger.info(f"[DB] Users created: {len(inserted)}/{len(users)}")
+        return [
+            USER_REPEATED if first[user_id] != position else USER_CREATED if user_id in inserted else USER_EXISTS
+            for position, (user_id, _) in enumerate(users)
+        ]
+
+    # --- Async facade (DB executor) ---
+
+    async def aget_user(self, user_id: str) -> Optional[Dict]:
+        return await self._run(self.get_user, user_id)
+
+    async def aget_transactions(self, user_id: str, limit: int = 5) -> List[Dict]:
+        return await self._run(self.get_transactions, user_id, limit)
+
+    async def aget_cards(self, user_id: str) -> List[Dict]:
+        return await self._run(self.get_cards, user_id)
+
+    async def aget_user_snapshot(self, user_id: str, tx_limit: int = 5) -> Optional[Dict]:
+        return await self._run(self.get_user_snapshot, user_id, tx_limit)
+
+    async def aget_transaction_summary(self, user_id: str, **filters: Any) -> Optional[Dict]:
+        return await self._run(self.get_transaction_summary, user_id, **filters)
+
+    async def asearch_transactions(self, user_id: str, text: str, **options: Any) -> Optional[Dict]:
+        return await self._run(self.search_transactions, user_id, text, **options)
+
+    async def ainsert_users(self, users: Sequence[Tuple[str, str]]) -> List[str]:
+        return await self._run(self.insert_users, users)
+
+    async def acreate_user(self, user_id: str, name: str) -> Optional[Dict]:
+        """
+        create_user with group commit
+
+        Calls arriving within settings.sqlite_group_commit_window_ms of each
+        other (up to sqlite_group_commit_max_batch) share one transaction, so
+        N concurrent sign-ups cost one commit instead of N serialized ones.
+        Same result and errors as create_user.
+        """
+        loop = asyncio.get_running_loop()
+        pending = self._pending_signups.get(loop)
+        if pending is None:
+            # A closed loop never runs its flush: drop its state (its callers are gone)
+            for other in [other for other in self._pending_signups if other.is_closed()]:
+                del self._pending_signups[other]
+            pending = self._pending_signups[loop] = _PendingSignups()
+
+        future = loop.create_future()
+        pending.items.append((user_id, name, future))
+        if len(pending.items) >= settings.sqlite_group_commit_max_batch:
+            self._flush_users(pending)
+        elif pending.handle is None:
+            window = settings.sqlite_group_commit_window_ms / 1000
+            pending.handle = loop.call_later(window, self._flush_users, pending) if window > 0 else \
+                loop.call_soon(self._flush_users, pending)
+        return await future
+
+    def _flush_users(self, pending: _PendingSignups) -> None:
+        if pending.handle is not None:
+            pending.handle.cancel()
+            pending.handle = None
+        batch, pending.items = pending.items, []
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._commit_users(batch))
+            self._commit_tasks.add(task)
+            task.add_done_callback(self._commit_tasks.discard)
+
+    async def _commit_users(self, batch: List[Tuple[str, str, "asyncio.Future"]]) -> None:
+        try:
+            results = await self._run(self.create_users, [(user_id, name) for user_id, name, _ in batch])
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        self._group_commit["batches"] += 1
+        self._group_commit["users"] += len(batch)
+        for (_, _, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
 
 # Singleton instance
 db_client = DatabaseClient()
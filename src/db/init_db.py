@@ -11,8 +11,15 @@ Archetypes:
 
 import sqlite3
 import os
+import sys
 import logging
 from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.db.migrations import migrate
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -29,42 +36,12 @@ def init_db():
     
     logger.info("Creating tables...")
     
-    # Tables
-    cursor.executescript("""
-        DROP TABLE IF EXISTS users;
-        DROP TABLE IF EXISTS transactions;
-        DROP TABLE IF EXISTS cards;
-        
-        CREATE TABLE users (
-            user_id TEXT PRIMARY KEY,
-            name TEXT NOT NULL,
-            balance REAL DEFAULT 0.0,
-            account_status TEXT DEFAULT 'active',
-            block_reason TEXT
-        );
-        
-        CREATE TABLE transactions (
-            id TEXT PRIMARY KEY,
-            user_id TEXT,
-            type TEXT, -- 'pix_in', 'pix_out', 'card_sale', 'payout', 'transfer'
-            amount REAL,
-            status TEXT, -- 'completed', 'failed', 'pending'
-            failure_reason TEXT,
-            created_at DATETIME,
-            counterparty TEXT,
-            FOREIGN KEY(user_id) REFERENCES users(user_id)
-        );
-        
-        CREATE TABLE cards (
-            id TEXT PRIMARY KEY,
-            user_id TEXT,
-            last_4 TEXT,
-            status TEXT, -- 'active', 'blocked'
-            limit_amount REAL,
-            used_amount REAL,
-            FOREIGN KEY(user_id) REFERENCES users(user_id)
-        );
-    """)
+    # Tables (recreated from scratch through the versioned migrations)
+    cursor.execute("DROP TABLE IF EXISTS users")
+    cursor.execute("DROP TABLE IF EXISTS transactions")
+    cursor.execute("DROP TABLE IF EXISTS cards")
+    cursor.execute("PRAGMA user_version = 0")
+    migrate(conn)
     
     logger.info("Populating mock data with 4 archetypes...")
     
@@ -74,7 +51,7 @@ def init_db():
     # ARCHETYPE 1: happy_customer - Cliente Satisfeito
     # ============================================================
     cursor.execute(
-        "INSERT INTO users VALUES (?,?,?,?,?)",
+        "INSERT INTO users (user_id, name, balance, account_status, block_reason) VALUES (?,?,?,?,?)",
         ('happy_customer', 'Ana Feliz', 15250.00, 'active', None)
     )
     
@@ -99,7 +76,7 @@ def init_db():
     # ARCHETYPE 2: blocked_user - Usuário Bloqueado
     # ============================================================
     cursor.execute(
-        "INSERT INTO users VALUES (?,?,?,?,?)",
+        "INSERT INTO users (user_id, name, balance, account_status, block_reason) VALUES (?,?,?,?,?)",
         ('blocked_user', 'Carlos Bloqueado', 0.00, 'blocked', 'Atividade fraudulenta detectada')
     )
     
@@ -120,7 +97,7 @@ def init_db():
     # ARCHETYPE 3: broke_merchant - Comerciante Sem Saldo
     # ============================================================
     cursor.execute(
-        "INSERT INTO users VALUES (?,?,?,?,?)",
+        "INSERT INTO users (user_id, name, balance, account_status, block_reason) VALUES (?,?,?,?,?)",
         ('broke_merchant', 'Pedro Quebrado', 0.00, 'active', None)
     )
     
@@ -145,7 +122,7 @@ def init_db():
     # ARCHETYPE 4: new_user - Usuário Novo
     # ============================================================
     cursor.execute(
-        "INSERT INTO users VALUES (?,?,?,?,?)",
+        "INSERT INTO users (user_id, name, balance, account_status, block_reason) VALUES (?,?,?,?,?)",
         ('empty_user', 'Marina Nova', 0.00, 'active', None)
     )
     # No transactions and no cards for new_user
@@ -0,0 +1,220 @@
+"""
+Schema Migrations Module
+Versioned, forward-only migrations for the customers database.
+
+The applied version lives in `PRAGMA user_version`. Each migration runs in
+its own BEGIN IMMEDIATE transaction together with the version bump, so a
+failed step leaves the database at the previous version and two processes
+starting at once apply every step exactly once.
+
+Databases created by the old `src/db/init_db.py` (transactions keyed by `id`)
+and `scripts/seed_db.py` (no cards table, no block_reason/failure_reason)
+are both reconciled into the canonical schema below.
+"""
+
+import sqlite3
+import logging
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    apply: Callable[[sqlite3.Connection], None]
+
+
+def _columns(conn: sqlite3.Connection, table: str) -> Set[str]:
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def _add_missing_columns(conn: sqlite3.Connection, table: str, columns: List[tuple]) -> None:
+    existing = _columns(conn, table)
+    for name, declaration in columns:
+        if name not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {declaration}")
+            logger.info(f"[DB] Coluna adicionada: {table}.{name}")
+
+
+def _create_base_tables(conn: sqlite3.Connection) -> None:
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            user_id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            email TEXT NOT NULL DEFAULT '',
+            account_status TEXT NOT NULL DEFAULT 'active',
+            plan TEXT NOT NULL DEFAULT 'basic',
+            balance REAL DEFAULT 0.0,
+            created_at TEXT NOT NULL DEFAULT (datetime('now')),
+            block_reason TEXT
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS transactions (
+            transaction_id TEXT PRIMARY KEY,
+            user_id TEXT NOT NULL,
+            type TEXT NOT NULL,         -- 'pix_in', 'pix_out', 'card_sale', 'payout', 'transfer', ...
+            amount REAL NOT NULL,
+            status TEXT NOT NULL,       -- 'completed', 'failed', 'pending'
+            failure_reason TEXT,
+            created_at TEXT NOT NULL,
+            counterparty TEXT,
+            FOREIGN KEY (user_id) REFERENCES users(user_id)
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS cards (
+            id TEXT PRIMARY KEY,
+            user_id TEXT NOT NULL,
+            last_4 TEXT,
+            status TEXT,                -- 'active', 'blocked'
+            limit_amount REAL,
+            used_amount REAL,
+            FOREIGN KEY (user_id) REFERENCES users(user_id)
+        )
+    """)
+
+
+def _reconcile_legacy_columns(conn: sqlite3.Connection) -> None:
+    transaction_columns = _columns(conn, "transactions")
+    if "transaction_id" not in transaction_columns and "id" in transaction_columns:
+        conn.execute("ALTER TABLE transactions RENAME COLUMN id TO transaction_id")
+        logger.info("[DB] transactions.id renomeada para transaction_id")
+
+    # ADD COLUMN only accepts constant defaults: created_at is backfilled below
+    _add_missing_columns(conn, "users", [
+        ("email", "TEXT NOT NULL DEFAULT ''"),
+        ("account_status", "TEXT NOT NULL DEFAULT 'active'"),
+        ("plan", "TEXT NOT NULL DEFAULT 'basic'"),
+        ("balance", "REAL DEFAULT 0.0"),
+        ("created_at", "TEXT"),
+        ("block_reason", "TEXT"),
+    ])
+    conn.execute("UPDATE users SET created_at = datetime('now') WHERE created_at IS NULL")
+
+    _add_missing_columns(conn, "transactions", [
+        ("failure_reason", "TEXT"),
+        ("counterparty", "TEXT"),
+    ])
+
+
+def _create_lookup_indexes(conn: sqlite3.Connection) -> None:
+    # Serves "latest N transactions of a user" without a scan or a sort
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_transactions_user_created ON transactions(user_id, created_at DESC)"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_cards_user ON cards(user_id)")
+
+
+def _cover_transaction_aggregates(conn: sqlite3.Connection) -> None:
+    # Same prefix as before (latest-N lookups), plus the columns window
+    # aggregates read: SUM/COUNT by type/status never touch the table rows
+    conn.execute("DROP INDEX IF EXISTS idx_transactions_user_created")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_transactions_user_activity "
+        "ON transactions(user_id, created_at DESC, type, status, amount)"
+    )
+
+
+# External-content FTS5 index over transactions (the text lives only in the
+# table). user_id is indexed so MATCH can restrict the posting lists to one
+# user; remove_diacritics makes "credito" match "crédito".
+# FTS rows are keyed by the transactions rowid: VACUUM may renumber the rowids
+# of a table without an INTEGER PRIMARY KEY, so rebuild the index after one.
+# FTS5 flushes its buffer at every statement savepoint the triggers open:
+# bulk-insert set-based (INSERT ... SELECT) or with the triggers dropped.
+TRANSACTION_SEARCH_TRIGGERS = {
+    "transactions_fts_insert": """
+        CREATE TRIGGER IF NOT EXISTS transactions_fts_insert AFTER INSERT ON transactions BEGIN
+            INSERT INTO transactions_fts (rowid, user_id, counterparty, failure_reason)
+            VALUES (new.rowid, new.user_id, new.counterparty, new.failure_reason);
+        END
+    """,
+    "transactions_fts_delete": """
+        CREATE TRIGGER IF NOT EXISTS transactions_fts_delete AFTER DELETE ON transactions BEGIN
+            INSERT INTO transactions_fts (transactions_fts, rowid, user_id, counterparty, failure_reason)
+            VALUES ('delete', old.rowid, old.user_id, old.counterparty, old.failure_reason);
+        END
+    """,
+    "transactions_fts_update": """
+        CREATE TRIGGER IF NOT EXISTS transactions_fts_update
+        AFTER UPDATE OF user_id, counterparty, failure_reason ON transactions BEGIN
+            INSERT INTO transactions_fts (transactions_fts, rowid, user_id, counterparty, failure_reason)
+            VALUES ('delete', old.rowid, old.user_id, old.counterparty, old.failure_reason);
+            INSERT INTO transactions_fts (rowid, user_id, counterparty, failure_reason)
+            VALUES (new.rowid, new.user_id, new.counterparty, new.failure_reason);
+        END
+    """,
+}
+
+
+def rebuild_transaction_search(conn: sqlite3.Connection) -> None:
+    """Re-indexes every transaction (after bulk loads with the triggers off, or VACUUM)"""
+    conn.execute("INSERT INTO transactions_fts (transactions_fts) VALUES ('rebuild')")
+
+
+def _create_transaction_search(conn: sqlite3.Connection) -> None:
+    conn.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS transactions_fts USING fts5(
+            user_id, counterparty, failure_reason,
+            content = 'transactions', content_rowid = 'rowid',
+            tokenize = 'unicode61 remove_diacritics 2'
+        )
+    """)
+    for sql in TRANSACTION_SEARCH_TRIGGERS.values():
+        conn.execute(sql)
+    rebuild_transaction_search(conn)
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "tabelas base (users, transactions, cards)", _create_base_tables),
+    Migration(2, "reconcilia schemas legados (init_db / seed_db)", _reconcile_legacy_columns),
+    Migration(3, "indices de consulta por usuario", _create_lookup_indexes),
+    Migration(4, "indice de cobertura para agregados de transacoes", _cover_transaction_aggregates),
+    Migration(5, "busca textual (FTS5) em contrapartes e motivos de falha", _create_transaction_search),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection, target: Optional[int] = None) -> int:
+    """
+    Applies pending migrations up to `target` (default: latest)
+
+    Args:
+        conn: Connection to the customers database (not inside a transaction)
+        target: Stop at this version (e.g. to benchmark an unindexed schema)
+
+    Returns:
+        The schema version after migrating
+    """
+    target = LATEST_VERSION if target is None else target
+    if conn.in_transaction:
+        conn.commit()
+
+    for migration in MIGRATIONS:
+        if migration.version > target or migration.version <= schema_version(conn):
+            continue
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Another process may have applied it while we waited for the lock
+            if schema_version(conn) >= migration.version:
+                conn.rollback()
+                continue
+            migration.apply(conn)
+            conn.execute(f"PRAGMA user_version = {int(migration.version)}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            logger.error(f"[ERRO] Migracao {migration.version} falhou: {migration.description}")
+            raise
+        logger.info(f"[OK] Migracao {migration.version} aplicada: {migration.description}")
+
+    return schema_version(conn)
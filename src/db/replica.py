@@ -0,0 +1,279 @@
+"""
+Memory Replica Module
+In-memory copy of the customers database for read-heavy support traffic.
+
+The on-disk file is copied into a shared-cache in-memory database
+(`file:replica_N?mode=memory&cache=shared`) with the SQLite backup API (FTS
+index, indexes and statistics included), and reads run there without
+touching the disk, on up to `readers` connections at once (one copy in
+memory, shared by all of them). Writes keep going to the file through the
+connection pool.
+
+Freshness:
+- A background thread checks `PRAGMA data_version` on a dedicated source
+  connection every `refresh_seconds`; only when someone committed does it
+  copy the file again, into a new in-memory database that is swapped in
+  atomically (readers of the old copy finish undisturbed)
+- Users written through DatabaseClient are marked dirty and read from disk
+  until a copy taken after their write is swapped in (read-your-writes);
+  other writers are seen with at most ~`refresh_seconds` + copy time of lag
+"""
+
+import time
+import queue
+import sqlite3
+import itertools
+import logging
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+# Names of the in-memory databases (a shared-cache name is global to the process)
+_copy_ids = itertools.count()
+
+
+@dataclass
+class _Copy:
+    uri: str
+    conn: sqlite3.Connection   # keeps the in-memory database alive; stats
+    loaded_at: float       # time.time() when the copy started (its data is at least this fresh)
+    data_version: int      # source data_version the copy corresponds to
+    write_seq: int         # writes through the client already included
+    idle: "queue.LifoQueue[sqlite3.Connection]" = field(default_factory=queue.LifoQueue)
+    opened: int = 0        # reader connections
+    readers: int = 0       # reads in progress
+    cond: threading.Condition = field(default_factory=threading.Condition)
+    closed: bool = False
+
+
+class MemoryReplica:
+    """
+    Double-buffered in-memory copy of one database file
+
+    Loaded on first use (or `start()`), refreshed in the background.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        refresh_seconds: Optional[float] = None,
+        on_refresh: Optional[Callable[[], None]] = None,
+        readers: Optional[int] = None,
+    ):
+        """
+        Args:
+            readers: Max concurrent reads (connections to the copy; default: settings.sqlite_pool_size)
+        """
+        self.db_path = db_path
+        self.refresh_seconds = refresh_seconds if refresh_seconds is not None else settings.sqlite_replica_refresh_seconds
+        self.readers = readers or settings.sqlite_pool_size
+        self.on_refresh = on_refresh
+        self._current: Optional[_Copy] = None
+        self._source: Optional[sqlite3.Connection] = None
+        self._refresh_lock = threading.Lock()   # one copy at a time
+        self._state_lock = threading.Lock()     # dirty users / write sequence
+        self._write_seq = 0
+        self._dirty: Dict[Optional[str], int] = {}   # user_id (None: every user) -> write seq
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {"refreshes": 0, "skipped_refreshes": 0, "replica_reads": 0, "disk_reads": 0}
+        self._last_refresh_ms = 0.0
+
+    def start(self) -> None:
+        """Loads the first copy and starts the refresh thread (idempotent)"""
+        if self._current is None:
+            self.refresh(force=True)
+        if self._thread is None and self.refresh_seconds > 0:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._refresh_loop, name="sqlite-replica", daemon=True)
+            self._thread.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        with self._refresh_lock:
+            if self._current is not None:
+                self._retire(self._current)
+                self._current = None
+            if self._source is not None:
+                self._source.close()
+                self._source = None
+
+    def serves(self, user_id: Optional[str]) -> bool:
+        """Whether reads of this user may come from the copy (not written since it was taken)"""
+        with self._state_lock:
+            if not self._dirty:
+                return True
+            return None not in self._dirty and user_id not in self._dirty
+
+    def mark_written(self, *user_ids: str) -> None:
+        """Records committed writes: these users (every user when none is given) read from disk"""
+        with self._state_lock:
+            self._write_seq += 1
+            for user_id in user_ids or (None,):
+                self._dirty[user_id] = self._write_seq
+
+    def count_disk_read(self) -> None:
+        self._stats["disk_reads"] += 1
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """A connection to the current in-memory copy, for one read"""
+        copy = self._acquire_copy()
+        try:
+            conn = self._borrow(copy)
+            self._stats["replica_reads"] += 1
+            try:
+                yield conn
+            finally:
+                if conn.in_transaction:
+                    conn.rollback()
+                copy.idle.put(conn)
+        finally:
+            with copy.cond:
+                copy.readers -= 1
+                copy.cond.notify_all()
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Copies the file again if anyone committed since the current copy
+
+        Returns:
+            True if a new copy was swapped in
+        """
+        with self._refresh_lock:
+            if self._source is None:
+                self._source = sqlite3.connect(
+                    self.db_path, timeout=settings.sqlite_busy_timeout_ms / 1000, check_same_thread=False
+                )
+            version = self._data_version()
+            if not force and self._current is not None and version == self._current.data_version:
+                self._stats["skipped_refreshes"] += 1
+                return False
+
+            with self._state_lock:
+                write_seq = self._write_seq
+            started = time.perf_counter()
+            loaded_at = time.time()
+            uri = f"file:replica_{next(_copy_ids)}?mode=memory&cache=shared"
+            target = self._connect(uri)
+            self._source.backup(target)
+            # A commit between reading data_version and the copy is at worst copied
+            # early: the next check sees a newer version and copies again
+            target.execute("PRAGMA query_only = 1")
+
+            previous, self._current = self._current, _Copy(uri, target, loaded_at, version, write_seq)
+            with self._state_lock:
+                self._dirty = {user_id: seq for user_id, seq in self._dirty.items() if seq > write_seq}
+            self._last_refresh_ms = (time.perf_counter() - started) * 1000
+            self._stats["refreshes"] += 1
+
+        if previous is not None:
+            self._retire(previous)   # waits for readers of the old copy
+        if self.on_refresh is not None:
+            self.on_refresh()
+        logger.info(f"[DB] Replica em memoria atualizada em {self._last_refresh_ms:.1f} ms")
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters, copy size and lag (age of the copy when the file has changed since)"""
+        stats: Dict[str, Any] = dict(self._stats)
+        stats.update(
+            refresh_seconds=self.refresh_seconds,
+            last_refresh_ms=round(self._last_refresh_ms, 2),
+            max_readers=self.readers,
+        )
+        with self._state_lock:
+            stats["dirty_users"] = len(self._dirty)
+        while True:
+            copy = self._current
+            if copy is None:
+                stats.update(loaded=False, lag_seconds=None)
+                return stats
+            with copy.cond:
+                if copy.closed:   # swapped out meanwhile: report the new copy
+                    continue
+                page_count = copy.conn.execute("PRAGMA page_count").fetchone()[0]
+                page_size = copy.conn.execute("PRAGMA page_size").fetchone()[0]
+                stats["active_reads"] = copy.readers
+            break
+        with self._refresh_lock:
+            stale = self._data_version() != copy.data_version
+        age = time.time() - copy.loaded_at
+        stats.update(
+            loaded=True,
+            bytes=page_count * page_size,
+            age_seconds=round(age, 3),
+            stale=stale,
+            lag_seconds=round(age, 3) if stale else 0.0,
+        )
+        return stats
+
+    def _acquire_copy(self) -> _Copy:
+        """The current copy, registered as being read (so it is not closed meanwhile)"""
+        while True:
+            if self._current is None:
+                self.start()
+            copy = self._current
+            with copy.cond:
+                if copy.closed:   # swapped out meanwhile: use the new copy
+                    continue
+                copy.readers += 1
+                return copy
+
+    def _borrow(self, copy: _Copy) -> sqlite3.Connection:
+        """An idle reader connection to the copy, opened lazily up to `readers`"""
+        try:
+            return copy.idle.get_nowait()
+        except queue.Empty:
+            pass
+        with copy.cond:
+            create = copy.opened < self.readers
+            if create:
+                copy.opened += 1
+        if not create:
+            return copy.idle.get()
+        try:
+            conn = self._connect(copy.uri)
+            conn.execute("PRAGMA query_only = 1")
+            return conn
+        except Exception:
+            with copy.cond:
+                copy.opened -= 1
+            raise
+
+    def _retire(self, copy: _Copy) -> None:
+        """Closes a swapped-out copy once its reads finish (the last close frees the memory)"""
+        with copy.cond:
+            copy.closed = True
+            copy.cond.wait_for(lambda: copy.readers == 0)
+            while not copy.idle.empty():
+                copy.idle.get_nowait().close()
+            copy.conn.close()
+
+    @staticmethod
+    def _connect(uri: str) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            uri, uri=True, check_same_thread=False, cached_statements=settings.sqlite_statement_cache
+        )
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _data_version(self) -> int:
+        return self._source.execute("PRAGMA data_version").fetchone()[0]
+
+    def _refresh_loop(self) -> None:
+        while not self._stop.wait(self.refresh_seconds):
+            try:
+                self.refresh()
+            except Exception as e:
+                # Keep serving the previous copy; the stale/lag metrics show it
+                logger.error(f"[ERRO] Falha ao atualizar replica em memoria: {e}")
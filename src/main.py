@@ -2,13 +2,22 @@
 # IMPORTANT: Load environment variables FIRST
 from src.env_loader import *  # noqa: F401, F403
 
+import asyncio
+import json
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Header
 from fastapi.middleware.cors import CORSMiddleware
 import logging
 
 from src.config import settings
-from src.schemas import ChatRequest, ChatResponse, UserCreateRequest, UserResponse
+from src.schemas import (
+    BulkUserCreateRequest,
+    BulkUserResponse,
+    ChatRequest,
+    ChatResponse,
+    UserCreateRequest,
+    UserResponse,
+)
 from src.utils.session_manager import session_manager
 
 # Setup logging
@@ -37,24 +46,48 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.warning(f"Error checking/seeding database: {e}")
     
-    # 2. Validate RAG Pipeline (ChromaDB must be populated)
+    # In-memory read replica of the seeded database (optional)
+    if settings.sqlite_memory_replica:
+        try:
+            from src.db.client import db_client
+            db_client.start_replica()
+            logger.info(f"[OK] SQLite replica loaded in memory ({db_client.replica_stats()['bytes'] / 1e6:.1f} MB)")
+        except Exception as e:
+            logger.warning(f"Error loading in-memory replica (reads fall back to disk on first use): {e}")
+    
+    # 2. Validate RAG Pipeline (ChromaDB must be populated, unless serving an artifact)
     logger.info("Validating RAG pipeline...")
-    try:
-        from src.rag.ingest import validate_rag_completeness, ingest_documents
-        validate_rag_completeness()
-        logger.info("[OK] RAG pipeline valid and ready")
-    except Exception as e:
-        logger.warning(f"RAG Pipeline not ready ({e}). Starting auto-ingestion...")
-        logger.info("This process may take a few minutes (scraping 18 URLs)...")
+    if settings.rag_index_artifact:
+        from src.rag.artifact import IndexArtifact
+        artifact = IndexArtifact(settings.rag_index_artifact)
+        artifact.check_compatible()
+        logger.info(f"[OK] Serving index artifact {artifact.version} ({len(artifact)} chunks)")
+    else:
+        try:
+            from src.rag.ingest import validate_rag_completeness, ingest_documents
+            validate_rag_completeness()
+            logger.info("[OK] RAG pipeline valid and ready")
+        except Exception as e:
+            logger.warning(f"RAG Pipeline not ready ({e}). Starting auto-ingestion...")
+            logger.info("This process may take a few minutes (scraping 18 URLs)...")
+            try:
+                ingest_documents()
+                logger.info("[OK] Auto-ingestion completed successfully!")
+            except Exception as ingest_error:
+                logger.error("="*80)
+                logger.error("CRITICAL ERROR: Failed to initialize RAG pipeline!")
+                logger.error(f"Reason: {ingest_error}")
+                logger.error("="*80)
+                raise RuntimeError(f"Could not build RAG knowledge base: {ingest_error}")
+    
+    # 3. Warm up RAG searcher (shared vector-store handle, index, embeddings client)
+    if settings.rag_warmup_enabled:
+        logger.info("Warming up RAG searcher...")
         try:
-            ingest_documents()
-            logger.info("[OK] Auto-ingestion completed successfully!")
-        except Exception as ingest_error:
-            logger.error("="*80)
-            logger.error("CRITICAL ERROR: Failed to initialize RAG pipeline!")
-            logger.error(f"Reason: {ingest_error}")
-            logger.error("="*80)
-            raise RuntimeError(f"Could not build RAG knowledge base: {ingest_error}")
+            from src.tools.rag_tool import warmup_rag_searcher
+            await warmup_rag_searcher(settings.rag_warmup_queries)
+        except Exception as e:
+            logger.warning(f"RAG warmup failed (searcher will load lazily): {e}")
     
     logger.info("="*80)
     logger.info("[OK] APPLICATION READY")
@@ -64,6 +97,12 @@ async def lifespan(app: FastAPI):
     
     # === SHUTDOWN ===
     logger.info("Shutting down application...")
+    from src.tools.rag_tool import reset_rag_searcher
+    from src.rag.store import close_chroma_client
+    from src.db.client import db_client
+    reset_rag_searcher()
+    close_chroma_client()
+    db_client.close()
 
 
 # Create app with lifespan
@@ -110,6 +149,17 @@ async def health_check():
     }
 
 
+@app.get("/metrics")
+async def metrics():
+    """Runtime metrics: support database read cache, in-memory replica (lag_seconds, ...) and group commit"""
+    from src.db.client import db_client
+    return {
+        "db_read_cache": db_client.cache_stats(),
+        "db_replica": await asyncio.to_thread(db_client.replica_stats),
+        "db_group_commit": db_client.group_commit_stats(),
+    }
+
+
 @app.post("/users", response_model=UserResponse)
 async def create_user(request: UserCreateRequest):
     """
@@ -118,51 +168,104 @@ async def create_user(request: UserCreateRequest):
     Allows frontend to register new users with custom or auto-generated IDs.
     Users are initialized with zero balance and empty transaction history.
     """
-    import sqlite3
     import uuid
-    from datetime import datetime
+    from fastapi import HTTPException
+    from src.db.client import db_client
     
     logger.info(f"[/users] Creating user: {request.name}")
     
+    # Generate user_id if not provided
+    user_id = request.user_id if request.user_id else str(uuid.uuid4())[:8]
+    
     try:
-        # Generate user_id if not provided
-        user_id = request.user_id if request.user_id else str(uuid.uuid4())[:8]
-        
-        # Connect to database
-        conn = sqlite3.connect("./data/customers.db")
-        cursor = conn.cursor()
-        
-        # Check for duplicate
-        cursor.execute("SELECT user_id FROM users WHERE user_id = ?", (user_id,))
-        if cursor.fetchone():
-            conn.close()
-            from fastapi import HTTPException
-            raise HTTPException(status_code=400, detail=f"User ID '{user_id}' already exists")
-        
-        # Insert new user
-        cursor.execute(
-            """
-            INSERT INTO users (user_id, name, email, account_status, plan, balance, created_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-            """,
-            (user_id, request.name, "", "active", "basic", 0.0, datetime.now().isoformat())
-        )
-        conn.commit()
-        conn.close()
-        
-        logger.info(f"[/users] User created: {user_id}")
-        
-        return UserResponse(
-            user_id=user_id,
-            name=request.name,
-            balance=0.0,
-            account_status="active"
-        )
-        
+        # Off the event loop; concurrent sign-ups share one commit
+        user = await db_client.acreate_user(user_id, request.name)
     except Exception as e:
         logger.error(f"[/users] Error: {e}", exc_info=True)
-        from fastapi import HTTPException
         raise HTTPException(status_code=500, detail=str(e))
+    
+    if user is None:
+        raise HTTPException(status_code=400, detail=f"User ID '{user_id}' already exists")
+    
+    return UserResponse(
+        user_id=user_id,
+        name=request.name,
+        balance=user["balance"],
+        account_status=user["account_status"]
+    )
+
+
+# NDJSON lines sent per chunk when streaming bulk results
+BULK_STREAM_CHUNK = 1000
+
+
+def _bulk_result(user_id: str, name: str, outcome: str) -> dict:
+    """One item of a POST /users/bulk response"""
+    from src.db.client import USER_CREATED, USER_EXISTS
+    return {
+        "user_id": user_id,
+        "name": name,
+        "status": "created" if outcome == USER_CREATED else "duplicate",
+        "reason": None if outcome == USER_CREATED else
+            "already exists" if outcome == USER_EXISTS else "repeated in request",
+    }
+
+
+@app.post("/users/bulk", response_model=BulkUserResponse)
+async def create_users_bulk(request: BulkUserCreateRequest, accept: str = Header(default="")):
+    """
+    Create many users in one transaction (onboarding imports)
+    
+    Duplicates - user_id already registered, or repeated earlier in the
+    request - are detected by the database inside the same transaction
+    (INSERT ... ON CONFLICT) and reported per item, in request order.
+    With `Accept: application/x-ndjson` the results are streamed one JSON
+    object per line instead, built chunk by chunk as the response is sent
+    (no full result list in memory), with the counts in the X-Users-Created
+    and X-Users-Duplicates headers.
+    """
+    import uuid
+    from itertools import islice
+    from fastapi import HTTPException
+    from fastapi.responses import StreamingResponse
+    from src.db.client import USER_CREATED, db_client
+    
+    if len(request.users) > settings.users_bulk_max_items:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.users_bulk_max_items} users per request (got {len(request.users)})"
+        )
+    
+    # 12 hex digits: with the 8 of /users, ~100k generated ids would likely collide
+    users = [(item.user_id or uuid.uuid4().hex[:12], item.name) for item in request.users]
+    logger.info(f"[/users/bulk] Creating {len(users)} users")
+    
+    try:
+        outcomes = await db_client.ainsert_users(users)
+    except Exception as e:
+        logger.error(f"[/users/bulk] Error: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    created = outcomes.count(USER_CREATED)
+    logger.info(f"[/users/bulk] Created {created}/{len(users)}")
+    
+    if "application/x-ndjson" in accept:
+        def lines():
+            items = zip(users, outcomes)
+            while chunk := list(islice(items, BULK_STREAM_CHUNK)):
+                yield "".join(
+                    json.dumps(_bulk_result(user_id, name, outcome), ensure_ascii=False) + "\n"
+                    for (user_id, name), outcome in chunk
+                )
+        
+        return StreamingResponse(
+            lines(),
+            media_type="application/x-ndjson",
+            headers={"X-Users-Created": str(created), "X-Users-Duplicates": str(len(users) - created)}
+        )
+    
+    results = [_bulk_result(user_id, name, outcome) for (user_id, name), outcome in zip(users, outcomes)]
+    return BulkUserResponse(created=created, duplicates=len(results) - created, results=results)
 
 
 @app.post("/chat")
@@ -184,7 +287,7 @@ async def chat_endpoint(request: ChatRequest) -> ChatResponse:
     try:
         # HARDENING: Security Guardrail Check
         from src.agents.guardrail_agent import validate_input
-        security_check = validate_input(request.message, request.user_id)
+        security_check = await asyncio.to_thread(validate_input, request.message, request.user_id)
         
         if security_check.get("status") == "BLOCKED":
             from src.utils.debug_tracker import set_guardrail_status
@@ -203,8 +306,10 @@ async def chat_endpoint(request: ChatRequest) -> ChatResponse:
                 debug_info=get_current_debug_info()
             )
 
-        # Route query through the Agent Swarm
-        result = route_query(
+        # Route query through the Agent Swarm, in a worker thread: the agents'
+        # LLM and DB calls block, and would stall every other request on the loop
+        result = await asyncio.to_thread(
+            route_query,
             query=request.message,
             user_id=request.user_id
         )
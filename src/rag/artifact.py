@@ -0,0 +1,349 @@
+"""
+Index artifact - Portable, memory-mappable snapshot of a collection
+
+A single uncompressed .tar file:
+
+    manifest.json          format, version, embedding model/dimensions, space,
+                           counts and the layout of every member below
+    embeddings.f32         (n, d) float32, unit-normalized, row-major
+    quantized.<mode>       optional compact copy (float16 / int8) for candidate search
+    scales.f32             per-vector int8 scales (int8 only)
+    ids.bin / ids.off      UTF-8 ids + int64 offsets (n + 1)
+    texts.bin / texts.off  UTF-8 chunk texts + int64 offsets (n + 1)
+    metadata.json          columnar metadata: per key, a dictionary of values
+    meta.<key>.i32         per key, int32 codes into its dictionary (-1 = missing)
+
+Members are stored raw, so tar's 512-byte aligned data blocks can be opened
+with `numpy.memmap` straight from the archive: opening an artifact reads only
+the manifest and metadata dictionaries, and every worker serving the same
+file shares its pages through the OS page cache.
+"""
+
+import io
+import json
+import logging
+import os
+import tarfile
+import time
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from src.config import settings
+from src.rag.quantization import QuantizedIndex, distance_from_dot, normalize, quantize
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+
+
+class StringColumn(Sequence):
+    """Lazily decoded strings over memory-mapped UTF-8 bytes + offsets"""
+
+    def __init__(self, data: np.ndarray, offsets: np.ndarray):
+        self._data = data
+        self._offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        start, end = int(self._offsets[i]), int(self._offsets[i + 1])
+        return bytes(self._data[start:end]).decode("utf-8")
+
+
+def _encode_strings(values: List[str]) -> tuple[bytes, np.ndarray]:
+    encoded = [value.encode("utf-8") for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    return b"".join(encoded), offsets
+
+
+def _encode_metadata(metadatas: List[Optional[Dict]]) -> tuple[Dict, Dict[str, np.ndarray]]:
+    """Dictionary-encodes each metadata key into an int32 code column"""
+    keys = sorted({key for metadata in metadatas if metadata for key in metadata})
+    columns, codes = {}, {}
+    for key in keys:
+        dictionary: Dict = {}
+        column = np.full(len(metadatas), -1, dtype=np.int32)
+        for i, metadata in enumerate(metadatas):
+            if metadata and key in metadata:
+                value = metadata[key]
+                token = json.dumps(value, sort_keys=True)
+                if token not in dictionary:
+                    dictionary[token] = (len(dictionary), value)
+                column[i] = dictionary[token][0]
+        columns[key] = [value for _, value in sorted(dictionary.values(), key=lambda item: item[0])]
+        codes[key] = column
+    return columns, codes
+
+
+def _add_member(tar: tarfile.TarFile, name: str, data: bytes) -> None:
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    info.mtime = int(time.time())
+    tar.addfile(info, io.BytesIO(data))
+
+
+def write_artifact(
+    path: str,
+    ids: List[str],
+    embeddings,
+    documents: List[str],
+    metadatas: List[Optional[Dict]],
+    version: str,
+    space: str = "l2",
+    storage: str = "float32",
+) -> Dict:
+    """
+    Writes an artifact (atomically: temp file + os.replace)
+
+    Returns:
+        The manifest
+    """
+    vectors = normalize(np.asarray(embeddings, dtype=np.float32))
+    n, d = vectors.shape if len(vectors) else (0, 0)
+
+    id_bytes, id_offsets = _encode_strings(ids)
+    text_bytes, text_offsets = _encode_strings(documents)
+    columns, codes = _encode_metadata(metadatas)
+
+    members = {
+        "embeddings.f32": (np.ascontiguousarray(vectors), "float32", [n, d]),
+        "ids.bin": (id_bytes, "uint8", [len(id_bytes)]),
+        "ids.off": (id_offsets, "int64", [n + 1]),
+        "texts.bin": (text_bytes, "uint8", [len(text_bytes)]),
+        "texts.off": (text_offsets, "int64", [n + 1]),
+    }
+    if storage != "float32":
+        quantized, scales = quantize(vectors, storage)
+        members[f"quantized.{storage}"] = (quantized, storage, [n, d])
+        if scales is not None:
+            members["scales.f32"] = (scales, "float32", [n])
+    for key, column in codes.items():
+        members[f"meta.{key}.i32"] = (column, "int32", [n])
+
+    manifest = {
+        "format": FORMAT_VERSION,
+        "version": version,
+        "created_at": time.time(),
+        "embedding_model": settings.embedding_model,
+        "embedding_dimensions": d,
+        "space": space,
+        "storage": storage,
+        "count": n,
+        "members": {name: {"dtype": dtype, "shape": shape} for name, (_, dtype, shape) in members.items()},
+    }
+
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_suffix(target.suffix + f".tmp{os.getpid()}")
+    with tarfile.open(tmp, "w", format=tarfile.PAX_FORMAT) as tar:
+        _add_member(tar, "manifest.json", json.dumps(manifest, indent=2).encode("utf-8"))
+        _add_member(tar, "metadata.json", json.dumps({"columns": columns}).encode("utf-8"))
+        for name, (data, _, _) in members.items():
+            _add_member(tar, name, data if isinstance(data, bytes) else data.tobytes())
+    os.replace(tmp, target)
+
+    logger.info(f"[OK] Artifact escrito: {target} ({n} chunks, {target.stat().st_size / 1024:.0f} KiB)")
+    return manifest
+
+
+class IndexArtifact:
+    """Read-only, memory-mapped view of an artifact"""
+
+    def __init__(self, path: str):
+        self.path = str(path)
+        with tarfile.open(self.path, "r:") as tar:
+            offsets = {member.name: member.offset_data for member in tar.getmembers()}
+            self.manifest = json.load(tar.extractfile("manifest.json"))
+            self.columns: Dict[str, List] = json.load(tar.extractfile("metadata.json"))["columns"]
+
+        if self.manifest.get("format") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported artifact format {self.manifest.get('format')} in {self.path}")
+
+        def mmap(name: str) -> np.ndarray:
+            layout = self.manifest["members"][name]
+            shape = tuple(layout["shape"])
+            if 0 in shape:
+                return np.zeros(shape, dtype=layout["dtype"])
+            return np.memmap(self.path, dtype=layout["dtype"], mode="r", offset=offsets[name], shape=shape)
+
+        members = self.manifest["members"]
+        self.embeddings = mmap("embeddings.f32")
+        self.ids = StringColumn(mmap("ids.bin"), mmap("ids.off"))
+        self.texts = StringColumn(mmap("texts.bin"), mmap("texts.off"))
+        self.codes = {key: mmap(f"meta.{key}.i32") for key in self.columns}
+
+        storage = self.manifest["storage"]
+        if f"quantized.{storage}" in members:
+            scales = mmap("scales.f32") if "scales.f32" in members else None
+            self.index = QuantizedIndex(self.ids, mmap(f"quantized.{storage}"), scales, storage)
+        else:
+            self.index = QuantizedIndex(self.ids, self.embeddings, None, "float32")
+
+    @property
+    def version(self) -> str:
+        return self.manifest["version"]
+
+    def __len__(self) -> int:
+        return self.manifest["count"]
+
+    def metadata(self, i: int) -> Dict:
+        return {
+            key: self.columns[key][code]
+            for key, codes in self.codes.items()
+            if (code := int(codes[i])) >= 0
+        }
+
+    def check_compatible(self) -> None:
+        """Raises if queries embedded with the current settings would not match the artifact"""
+        model = self.manifest["embedding_model"]
+        dims = settings.embedding_dimensions
+        if model != settings.embedding_model:
+            raise ValueError(f"Artifact embedded with {model}, settings use {settings.embedding_model}")
+        if dims and dims != self.manifest["embedding_dimensions"]:
+            raise ValueError(
+                f"Artifact has {self.manifest['embedding_dimensions']} dimensions, settings request {dims}"
+            )
+
+    def _filter_mask(self, filter_by: Dict) -> np.ndarray:
+        """Equality filters on metadata keys (e.g. {"product": "maquininha"})"""
+        mask = np.ones(len(self), dtype=bool)
+        for key, value in filter_by.items():
+            if key.startswith("$") or isinstance(value, dict):
+                raise ValueError(f"Artifact search only supports equality filters, got {key}: {value}")
+            dictionary = self.columns.get(key, [])
+            code = dictionary.index(value) if value in dictionary else None
+            if code is None:
+                return np.zeros(len(self), dtype=bool)
+            mask &= np.asarray(self.codes[key]) == code
+        return mask
+
+    def search(
+        self,
+        query_embedding: List[float],
+        top_k: int = 5,
+        filter_by: Optional[Dict] = None,
+        rescore_candidates: Optional[int] = None
+    ) -> List[Dict]:
+        """
+        Brute-force search over the mapped vectors, same result format as RAGSearcher.search()
+
+        With a quantized copy, the top candidates are re-scored against the
+        float32 rows (only those rows are paged in).
+        """
+        if not len(self):
+            return []
+
+        query = normalize(np.asarray(query_embedding, dtype=np.float32))
+        scores = self.index.scores(query)
+        if filter_by:
+            scores = np.where(self._filter_mask(filter_by), scores, -np.inf)
+
+        rescore = self.index.mode != "float32"
+        if rescore_candidates is None:
+            rescore_candidates = settings.quantized_rescore_candidates
+        n_candidates = min(len(scores), max(top_k, rescore_candidates) if rescore else top_k)
+        candidates = np.argpartition(-scores, n_candidates - 1)[:n_candidates]
+        candidates = candidates[np.isfinite(scores[candidates])]
+
+        if rescore and len(candidates):
+            dots = np.asarray(self.embeddings[np.sort(candidates)]) @ query
+            exact = dict(zip(np.sort(candidates).tolist(), dots.tolist()))
+        else:
+            exact = {int(i): float(scores[i]) for i in candidates}
+
+        ranked = sorted(exact.items(), key=lambda item: -item[1])[:top_k]
+        space = self.manifest["space"]
+        return [
+            {
+                'content': self.texts[i],
+                'metadata': self.metadata(i),
+                'score': distance_from_dot(dot, space)
+            }
+            for i, dot in ranked
+        ]
+
+
+def default_artifact_path(version: str) -> str:
+    return str(Path(settings.chroma_persist_dir).parent / "artifacts" / f"{version}.tar")
+
+
+def export_artifact(path: Optional[str] = None, collection_name: Optional[str] = None) -> str:
+    """
+    Exports a Chroma collection (default: the current version) to an artifact
+
+    Returns:
+        Path of the written artifact
+    """
+    from src.rag.store import current_collection_name, get_chroma_client
+
+    collection_name = collection_name or current_collection_name()
+    collection = get_chroma_client().get_collection(collection_name)
+    data = collection.get(include=["embeddings", "documents", "metadatas"])
+
+    path = path or default_artifact_path(collection_name)
+    write_artifact(
+        path,
+        ids=data["ids"],
+        embeddings=data["embeddings"],
+        documents=data["documents"],
+        metadatas=data["metadatas"],
+        version=collection_name,
+        space=(collection.metadata or {}).get("hnsw:space", "l2"),
+        storage=settings.embedding_storage,
+    )
+    return path
+
+
+def import_artifact(path: str, activate: bool = True) -> str:
+    """
+    Loads an artifact into a new Chroma collection version (blue/green)
+
+    Returns:
+        Name of the created collection
+    """
+    from src.rag.ingest import validate_rag_completeness
+    from src.rag.quantization import build_quantized_index, quantized_index_dir
+    from src.rag.store import (
+        activate_collection,
+        collect_retired_collections,
+        get_chroma_client,
+        hnsw_collection_metadata,
+        new_collection_name,
+    )
+
+    artifact = IndexArtifact(path)
+    artifact.check_compatible()
+
+    client = get_chroma_client()
+    name = new_collection_name()
+    metadata = {**hnsw_collection_metadata(), "hnsw:space": artifact.manifest["space"]}
+    collection = client.create_collection(name, metadata=metadata)
+    try:
+        batch_size = client.get_max_batch_size()
+        for start in range(0, len(artifact), batch_size):
+            rows = range(start, min(start + batch_size, len(artifact)))
+            collection.add(
+                ids=[artifact.ids[i] for i in rows],
+                embeddings=np.asarray(artifact.embeddings[rows.start:rows.stop]),
+                documents=[artifact.texts[i] for i in rows],
+                metadatas=[artifact.metadata(i) or None for i in rows]
+            )
+        if settings.embedding_storage != "float32":
+            build_quantized_index(collection, settings.embedding_storage, quantized_index_dir(name))
+        validate_rag_completeness(name)
+    except Exception:
+        client.delete_collection(name)
+        raise
+
+    logger.info(f"[OK] Artifact {artifact.version} importado em {name} ({len(artifact)} chunks)")
+    if activate:
+        activate_collection(name)
+        collect_retired_collections()
+    return name
@@ -0,0 +1,228 @@
+"""
+Context Packer - Token-budgeted LLM context from retrieved chunks
+
+Retrieved chunks often repeat text: large sections are split with a
+400-character overlap, and merged/alternative sections contain each other.
+The packer:
+1. Drops chunks whose text is already contained in a better-ranked chunk
+2. Merges chunks of the same page whose texts overlap (suffix == prefix)
+3. Fills the token budget in rank order, truncating the last chunk if useful
+
+Tokens are counted with the model's real tokenizer (tiktoken). If its
+encoding files cannot be loaded (offline container), a ~4 chars/token
+estimate is used instead so retrieval never fails because of packing.
+"""
+
+import logging
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional
+
+import tiktoken
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Minimum shared span (chars) to treat two chunks as overlapping splits
+MIN_OVERLAP_CHARS = 50
+
+# Do not append a truncated chunk smaller than this (tokens)
+MIN_TRUNCATED_TOKENS = 64
+
+# Fallback estimate when the tokenizer is unavailable
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=1)
+def get_tokenizer() -> Optional[tiktoken.Encoding]:
+    """Tokenizer of the answering model (o200k_base if unknown, None if unavailable)"""
+    try:
+        try:
+            return tiktoken.encoding_for_model(settings.default_model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        logger.warning(f"Tokenizer unavailable, estimating tokens from length: {e}")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    tokenizer = get_tokenizer()
+    if tokenizer is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(tokenizer.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    tokenizer = get_tokenizer()
+    if tokenizer is None:
+        return text[:max_tokens * CHARS_PER_TOKEN]
+    tokens = tokenizer.encode(text, disallowed_special=())
+    return tokenizer.decode(tokens[:max_tokens])
+
+
+def find_overlap(first: str, second: str) -> int:
+    """
+    Length of the longest suffix of `first` that is a prefix of `second`
+    (0 if shorter than MIN_OVERLAP_CHARS)
+    """
+    probe = second[:MIN_OVERLAP_CHARS]
+    if len(probe) < MIN_OVERLAP_CHARS:
+        return 0
+
+    start = first.find(probe)
+    while start != -1:
+        overlap = len(first) - start
+        if second.startswith(first[start:]):
+            return overlap
+        start = first.find(probe, start + 1)
+    return 0
+
+
+@dataclass
+class PackedContext:
+    """Result of packing: surviving documents plus token accounting"""
+    documents: List[Dict]
+    tokens_before: int
+    tokens_after: int
+    duplicates_removed: int = 0
+    merged: int = 0
+    dropped_for_budget: int = 0
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(0, self.tokens_before - self.tokens_after)
+
+    def stats(self) -> Dict:
+        return {
+            "context_tokens": self.tokens_after,
+            "tokens_before_packing": self.tokens_before,
+            "tokens_saved": self.tokens_saved,
+            "duplicates_removed": self.duplicates_removed,
+            "chunks_merged": self.merged,
+            "dropped_for_budget": self.dropped_for_budget,
+        }
+
+
+def _same_page(a: Dict, b: Dict) -> bool:
+    return a.get('metadata', {}).get('source') == b.get('metadata', {}).get('source')
+
+
+def _merge_sections(a: Dict, b: Dict) -> str:
+    section_a = a.get('metadata', {}).get('section', '')
+    section_b = b.get('metadata', {}).get('section', '')
+    return section_a if section_a == section_b or not section_b else f"{section_a} + {section_b}"
+
+
+def _deduplicate(documents: List[Dict]) -> tuple[List[Dict], int, int]:
+    """Removes contained chunks and merges overlapping ones, keeping rank order"""
+    kept: List[Dict] = []
+    duplicates = 0
+    merged = 0
+
+    for doc in documents:
+        candidate = {**doc, 'metadata': dict(doc.get('metadata', {}))}
+        absorbed = False
+
+        for existing in kept:
+            text, new_text = existing['content'], candidate['content']
+
+            if new_text in text:
+                absorbed = True
+                duplicates += 1
+                break
+
+            if text in new_text:
+                # The text (and the page it is cited from) is the candidate's now
+                existing['content'] = new_text
+                existing['metadata'] = candidate['metadata']
+                absorbed = True
+                duplicates += 1
+                break
+
+            if not _same_page(existing, candidate):
+                continue
+
+            overlap = find_overlap(text, new_text)
+            if overlap:
+                existing['content'] = text + new_text[overlap:]
+            else:
+                overlap = find_overlap(new_text, text)
+                if overlap:
+                    existing['content'] = new_text + text[overlap:]
+
+            if overlap:
+                existing['metadata']['section'] = _merge_sections(existing, candidate)
+                absorbed = True
+                merged += 1
+                break
+
+        if not absorbed:
+            kept.append(candidate)
+
+    return kept, duplicates, merged
+
+
+def pack_documents(
+    documents: List[Dict],
+    render: Callable[[int, Dict], str],
+    token_budget: Optional[int] = None
+) -> PackedContext:
+    """
+    Deduplicates retrieved documents and fits them into a token budget
+
+    Args:
+        documents: search() results, best first
+        render: Function (position, document) -> text block sent to the LLM
+        token_budget: Max context tokens (default: settings.rag_context_token_budget)
+
+    Returns:
+        PackedContext with the documents to render and token statistics
+    """
+    budget = token_budget if token_budget is not None else settings.rag_context_token_budget
+    tokens_before = sum(count_tokens(render(i, doc)) for i, doc in enumerate(documents, 1))
+
+    unique, duplicates, merged = _deduplicate(documents)
+
+    packed: List[Dict] = []
+    used = 0
+    dropped = 0
+    for doc in unique:
+        position = len(packed) + 1
+        tokens = count_tokens(render(position, doc))
+
+        if used + tokens <= budget:
+            packed.append(doc)
+            used += tokens
+            continue
+
+        # Fill the remaining budget with the start of the chunk, if worthwhile
+        overhead = tokens - count_tokens(doc['content'])
+        remaining = budget - used - overhead
+        truncated = None
+        while remaining >= MIN_TRUNCATED_TOKENS:
+            truncated = {**doc, 'content': truncate_to_tokens(doc['content'], remaining)}
+            tokens = count_tokens(render(position, truncated))
+            # Re-tokenization at the cut can add a token or two
+            if used + tokens <= budget:
+                break
+            remaining -= used + tokens - budget
+            truncated = None
+
+        if truncated is not None:
+            packed.append(truncated)
+            used += tokens
+        else:
+            dropped += 1
+
+    packed_context = PackedContext(
+        documents=packed,
+        tokens_before=tokens_before,
+        tokens_after=used,
+        duplicates_removed=duplicates,
+        merged=merged,
+        dropped_for_budget=dropped,
+    )
+    logger.debug(f"Context packed: {packed_context.stats()}")
+    return packed_context
@@ -0,0 +1,315 @@
+"""
+Crawler - Sitemap/link-driven URL discovery for ingestion (ingest_mode="crawl")
+
+Seeds from the site root plus its sitemap(s) (robots.txt `Sitemap:` lines or
+/sitemap.xml, sitemap indexes followed), then follows same-site links:
+
+- Deduplicated frontier of canonical URLs (no fragments, tracking params,
+  default ports or trailing slashes), persisted in the ingestion state so an
+  interrupted crawl resumes where it stopped
+- robots.txt respected (Disallow and Crawl-delay) for the fetcher's user agent
+- Per-host politeness: at most `ingest_per_host_limit` concurrent requests and
+  at least `crawl_delay` seconds between request starts
+- Conditional GETs like the fixed URL list; a 304 page reuses its stored links
+
+`Crawler.crawl()` yields FetchResults in discovery order, so it replaces
+`fetch_ordered` as the source stage of the ingestion pipeline. The crawled
+pages ("done" in the frontier) form the crawl manifest used for validation.
+"""
+
+import gzip
+import logging
+import threading
+import time
+import urllib.robotparser
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+import lxml.etree
+import lxml.html
+import requests
+
+from src.config import settings
+from src.rag.fetcher import USER_AGENT, FetchResult, HostLimiter, create_session, fetch_url
+from src.rag.state import IngestState
+
+logger = logging.getLogger(__name__)
+
+TRACKING_PARAMS = {"gclid", "fbclid", "msclkid", "ref", "mc_cid", "mc_eid"}
+
+# Links to these are never HTML pages
+SKIP_EXTENSIONS = (
+    ".pdf", ".jpg", ".jpeg", ".png", ".gif", ".svg", ".webp", ".ico", ".mp4", ".mp3",
+    ".zip", ".css", ".js", ".json", ".xml", ".txt", ".woff", ".woff2",
+)
+
+SITEMAP_NS = "{http://www.sitemaps.org/schemas/sitemap/0.9}"
+
+# Nested sitemap indexes followed at most this deep
+MAX_SITEMAP_DEPTH = 3
+
+
+def canonicalize_url(url: str, base: Optional[str] = None) -> Optional[str]:
+    """
+    Canonical form of a (possibly relative) URL, or None if it is not crawlable
+
+    Lowercases scheme/host, drops fragments, default ports, tracking
+    parameters (utm_*, gclid, ...) and trailing slashes, sorts the query.
+    """
+    url = urljoin(base, url.strip()) if base else url.strip()
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme not in ("http", "https") or not parts.hostname:
+        return None
+
+    host = parts.hostname.lower()
+    if parts.port and parts.port != {"http": 80, "https": 443}[scheme]:
+        host = f"{host}:{parts.port}"
+
+    path = parts.path or "/"
+    while "//" in path:
+        path = path.replace("//", "/")
+    if len(path) > 1:
+        path = path.rstrip("/")
+
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    ))
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+def extract_links(html_content: bytes, url: str) -> List[str]:
+    """Canonical, de-duplicated <a href> targets of a page (document order)"""
+    try:
+        document = lxml.html.fromstring(html_content)
+    except (lxml.etree.ParserError, ValueError):
+        return []
+    base = document.xpath("string(//base/@href)") or url
+    links = []
+    for href in document.xpath("//a/@href"):
+        link = canonicalize_url(href, base)
+        if link and not link.lower().endswith(SKIP_EXTENSIONS):
+            links.append(link)
+    return list(dict.fromkeys(links))
+
+
+def parse_sitemap(content: bytes) -> Tuple[List[str], List[str]]:
+    """
+    <loc> entries of a sitemap (gzip accepted)
+
+    Returns:
+        Tuple (page_urls, nested_sitemap_urls)
+    """
+    if content[:2] == b"\x1f\x8b":
+        content = gzip.decompress(content)
+    root = lxml.etree.fromstring(content, parser=lxml.etree.XMLParser(resolve_entities=False, no_network=True))
+    locs = [loc.text.strip() for loc in root.iter(f"{SITEMAP_NS}loc", "loc") if loc.text]
+    if root.tag in (f"{SITEMAP_NS}sitemapindex", "sitemapindex"):
+        return [], locs
+    return locs, []
+
+
+class PoliteHostLimiter(HostLimiter):
+    """HostLimiter that also spaces request starts per host (crawl delay)"""
+
+    def __init__(self, per_host: int, delay_for: Callable[[str], float]):
+        super().__init__(per_host)
+        self.delay_for = delay_for
+        self._next_start: Dict[str, float] = {}
+
+    @contextmanager
+    def for_url(self, url: str):
+        host = urlsplit(url).netloc.lower()
+        delay = self.delay_for(url)
+        with super().for_url(url):
+            with self._lock:
+                now = time.monotonic()
+                start = max(now, self._next_start.get(host, 0.0))
+                self._next_start[host] = start + delay
+            if start > now:
+                time.sleep(start - now)
+            yield
+
+
+class Crawler:
+    """
+    Crawls a site into the ingestion state; see module docstring
+
+    Args:
+        state: Ingestion state (frontier, links, page validators)
+        seed: Root URL (default: settings.crawl_seed)
+        session: Shared session (created if omitted)
+    """
+
+    def __init__(
+        self,
+        state: IngestState,
+        seed: Optional[str] = None,
+        session: Optional[requests.Session] = None,
+    ):
+        self.state = state
+        self.seed = canonicalize_url(seed or settings.crawl_seed)
+        if self.seed is None:
+            raise ValueError(f"URL de seed invalida: {seed or settings.crawl_seed}")
+        self.host = urlsplit(self.seed).netloc
+        self.path_prefix = settings.crawl_path_prefix
+        self.max_pages = settings.crawl_max_pages
+        self.max_depth = settings.crawl_max_depth
+        self.max_workers = settings.ingest_max_workers
+        self._own_session = session is None
+        self.session = session or create_session(self.max_workers)
+        self.limiter = PoliteHostLimiter(settings.ingest_per_host_limit, self._crawl_delay)
+        self._robots: Dict[str, Optional[urllib.robotparser.RobotFileParser]] = {}
+        self._robots_lock = threading.Lock()
+
+    def in_scope(self, url: str) -> bool:
+        parts = urlsplit(url)
+        if parts.netloc != self.host:
+            return False
+        return not self.path_prefix or parts.path.startswith(self.path_prefix)
+
+    def allowed(self, url: str) -> bool:
+        robots = self._robots_for(url)
+        return robots is None or robots.can_fetch(USER_AGENT, url)
+
+    def crawl(self) -> Iterator[FetchResult]:
+        """
+        Yields every crawled HTML page, in discovery order
+
+        Resuming an interrupted crawl first replays the pages it already
+        crawled (as 304s, served from the state) so downstream stages still
+        see the whole site.
+        """
+        start = time.perf_counter()
+        if self.state.frontier_open():
+            self.state.frontier_requeue()
+            done = self.state.frontier_urls('done')
+            logger.info(f"Retomando crawl: {len(done)} paginas feitas, {self.state.frontier_open()} pendentes")
+            for url in done:
+                if self.state.get_page(url) is None:
+                    self.state.frontier_mark(url, 'pending')
+                    continue
+                yield FetchResult(url=url, content=b"", status=304, elapsed=0.0, attempts=0)
+        else:
+            self.state.frontier_reset()
+            self._seed()
+
+        window = 2 * self.max_workers
+        pending = deque()
+        crawled = 0
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="crawl")
+        try:
+            while True:
+                if len(pending) < window:
+                    for row in self.state.frontier_claim(window - len(pending)):
+                        pending.append((row['url'], row['depth'], executor.submit(self._fetch, row['url'])))
+                if not pending:
+                    break
+
+                url, depth, future = pending.popleft()
+                status, result = future.result()
+                if status != 'done':
+                    self.state.frontier_mark(url, status, None if result is None else str(result))
+                    continue
+
+                if result.not_modified:
+                    links = self.state.get_links(url)
+                else:
+                    links = [link for link in extract_links(result.content, url) if self.in_scope(link)]
+                    self.state.save_links(url, links)
+                if depth < self.max_depth:
+                    self.state.frontier_add(links, depth + 1, max_size=self.max_pages)
+
+                self.state.frontier_mark(url, 'done')
+                crawled += 1
+                yield result
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+            if self._own_session:
+                self.session.close()
+
+        logger.info(f"[OK] Crawl: {crawled} paginas em {time.perf_counter() - start:.1f}s")
+
+    def _seed(self) -> None:
+        urls = [self.seed]
+        if settings.crawl_use_sitemap:
+            urls += [url for url in self._sitemap_urls() if self.in_scope(url)]
+        added = self.state.frontier_add(list(dict.fromkeys(urls)), depth=0, max_size=self.max_pages)
+        logger.info(f"Crawl iniciado em {self.seed}: {added} URLs semente")
+
+    def _sitemap_urls(self) -> List[str]:
+        robots = self._robots_for(self.seed)
+        roots = (robots.site_maps() if robots else None) or [urljoin(self.seed, "/sitemap.xml")]
+        queue = deque((sitemap, 0) for sitemap in roots)
+        seen, urls = set(), []
+        while queue:
+            sitemap, depth = queue.popleft()
+            if sitemap in seen:
+                continue
+            seen.add(sitemap)
+            try:
+                response = self.session.get(sitemap, timeout=settings.ingest_fetch_timeout)
+                response.raise_for_status()
+                pages, nested = parse_sitemap(response.content)
+            except (requests.RequestException, lxml.etree.XMLSyntaxError, OSError) as e:
+                logger.warning(f"Sitemap ignorado ({sitemap}): {e}")
+                continue
+            urls += [url for url in map(canonicalize_url, pages) if url]
+            if depth < MAX_SITEMAP_DEPTH:
+                queue.extend((url, depth + 1) for url in nested)
+        logger.info(f"[OK] {len(urls)} URLs em {len(seen)} sitemap(s)")
+        return urls
+
+    def _robots_for(self, url: str) -> Optional[urllib.robotparser.RobotFileParser]:
+        if not settings.crawl_respect_robots:
+            return None
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        with self._robots_lock:
+            if origin in self._robots:
+                return self._robots[origin]
+            robots = urllib.robotparser.RobotFileParser(f"{origin}/robots.txt")
+            try:
+                response = self.session.get(robots.url, timeout=settings.ingest_fetch_timeout)
+                if response.status_code in (401, 403):
+                    robots.disallow_all = True
+                elif response.ok:
+                    robots.parse(response.text.splitlines())
+                else:
+                    robots = None   # no robots.txt: everything allowed
+            except requests.RequestException as e:
+                logger.warning(f"robots.txt indisponivel em {origin}: {e}")
+                robots = None
+            self._robots[origin] = robots
+            return robots
+
+    def _crawl_delay(self, url: str) -> float:
+        robots = self._robots_for(url)
+        delay = robots.crawl_delay(USER_AGENT) if robots else None
+        return max(settings.crawl_delay, float(delay or 0))
+
+    def _fetch(self, url: str) -> Tuple[str, Optional[object]]:
+        """(frontier status, FetchResult | error)"""
+        if not self.allowed(url):
+            logger.info(f"Bloqueada por robots.txt: {url}")
+            return 'blocked', None
+        try:
+            result = fetch_url(
+                self.session, url,
+                limiter=self.limiter,
+                headers=self.state.conditional_headers(url),
+            )
+        except requests.RequestException as e:
+            # Broken links are expected while crawling: record and move on
+            logger.warning(f"Crawl: falha em {url}: {e}")
+            return 'failed', e
+        content_type = next(
+            (value for key, value in result.headers.items() if key.lower() == 'content-type'), 'text/html'
+        )
+        if not result.not_modified and 'html' not in content_type:
+            return 'skipped', content_type
+        return 'done', result
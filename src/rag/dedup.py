@@ -0,0 +1,183 @@
+"""
+Near-duplicate chunk detection - MinHash + LSH
+
+"Alternative" pages (gestao-de-cobranca vs gestao-de-cobranca-2, conta-digital
+vs conta-pj, ...) share most of their sections. Each chunk is reduced to a
+set of word shingles, summarized by a MinHash signature and bucketed by LSH
+bands; candidate pairs whose estimated Jaccard similarity reaches the
+threshold are merged (union-find, so A~B~C forms one cluster).
+
+The first chunk of a cluster (ingestion order) survives and records every
+URL of the cluster in `metadata['sources']` (comma separated; Chroma
+metadata cannot hold lists).
+
+Everything is deterministic (crc32 shingle hashes, seeded permutations), so
+re-runs keep the same survivors and chunk IDs.
+"""
+
+import logging
+import re
+import zlib
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Prime just above 2^32: (a * x + b) stays below 2^64 for 32-bit a, b, x
+MERSENNE_PRIME = np.uint64(4294967311)
+MAX_HASH = np.uint64(0xFFFFFFFF)
+
+_WORD = re.compile(r"\w+")
+
+
+def shingle_hashes(text: str, size: int) -> np.ndarray:
+    """crc32 hashes of the word `size`-shingles of a text"""
+    words = _WORD.findall(text.lower())
+    if len(words) <= size:
+        grams = [" ".join(words)]
+    else:
+        grams = [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+    return np.unique(np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64))
+
+
+class NearDuplicateIndex:
+    """
+    Streaming MinHash/LSH index
+
+    `add(key, text)` returns the surviving key of the cluster the text joins,
+    or None if it starts a new one. Items can be added one at a time, so the
+    index works inside a streaming pipeline.
+    """
+
+    def __init__(
+        self,
+        threshold: Optional[float] = None,
+        num_perm: Optional[int] = None,
+        bands: Optional[int] = None,
+        shingle_size: Optional[int] = None,
+        seed: int = 1,
+    ):
+        self.threshold = settings.dedup_threshold if threshold is None else threshold
+        self.num_perm = num_perm or settings.dedup_num_perm
+        self.bands = bands or settings.dedup_bands
+        self.shingle_size = shingle_size or settings.dedup_shingle_size
+        if self.num_perm % self.bands:
+            raise ValueError(f"num_perm ({self.num_perm}) must be a multiple of bands ({self.bands})")
+        self.rows = self.num_perm // self.bands
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 2 ** 32, size=self.num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 2 ** 32, size=self.num_perm, dtype=np.uint64)
+
+        self._buckets: Dict[Tuple[int, bytes], List[str]] = {}
+        self._signatures: Dict[str, np.ndarray] = {}
+        self._parent: Dict[str, str] = {}
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = shingle_hashes(text, self.shingle_size)
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % MERSENNE_PRIME & MAX_HASH
+        return permuted.min(axis=1).astype(np.uint32)
+
+    def _root(self, key: str) -> str:
+        while self._parent[key] != key:
+            self._parent[key] = self._parent[self._parent[key]]
+            key = self._parent[key]
+        return key
+
+    def add(self, key: str, text: str) -> Optional[str]:
+        signature = self.signature(text)
+        band_keys = [
+            (band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+            for band in range(self.bands)
+        ]
+
+        match = None
+        checked = set()
+        for band_key in band_keys:
+            for other in self._buckets.get(band_key, ()):
+                if other in checked:
+                    continue
+                checked.add(other)
+                if np.mean(self._signatures[other] == signature) >= self.threshold:
+                    match = self._root(other)
+                    break
+            if match:
+                break
+
+        self._signatures[key] = signature
+        self._parent[key] = match or key
+        for band_key in band_keys:
+            self._buckets.setdefault(band_key, []).append(key)
+        return match
+
+
+@dataclass
+class DedupStats:
+    chunks_in: int = 0
+    chunks_out: int = 0
+    clusters_merged: int = 0       # clusters with more than one chunk
+    cross_page: int = 0            # duplicates found on a different URL
+
+    @property
+    def duplicates_removed(self) -> int:
+        return self.chunks_in - self.chunks_out
+
+
+def add_source(metadata: Dict, source: str) -> None:
+    """Records another URL on a surviving chunk (metadata['sources'])"""
+    sources = metadata.get('sources', metadata.get('source', '')).split(',')
+    if source and source not in sources:
+        metadata['sources'] = ','.join(s for s in sources + [source] if s)
+
+
+def chunk_sources(metadata: Dict) -> List[str]:
+    """Every URL a (possibly merged) chunk came from"""
+    if metadata.get('sources'):
+        return metadata['sources'].split(',')
+    return [metadata['source']] if metadata.get('source') else []
+
+
+def deduplicate_chunks(
+    chunks: List[Dict],
+    index: Optional[NearDuplicateIndex] = None
+) -> Tuple[List[Dict], DedupStats]:
+    """
+    Collapses near-duplicate chunks, keeping the first of each cluster
+
+    Args:
+        chunks: Dicts with 'id', 'content' and 'metadata', in ingestion order
+        index: Index to use (a fresh one by default)
+
+    Returns:
+        Tuple (surviving_chunks, stats)
+    """
+    index = index or NearDuplicateIndex()
+    stats = DedupStats(chunks_in=len(chunks))
+    survivors: Dict[str, Dict] = {}
+    merged_clusters = set()
+
+    for chunk in chunks:
+        match = index.add(chunk['id'], chunk['content'])
+        if match is None:
+            survivors[chunk['id']] = {**chunk, 'metadata': dict(chunk['metadata'])}
+            continue
+
+        survivor = survivors[match]
+        merged_clusters.add(match)
+        source = chunk['metadata'].get('source', '')
+        if source not in chunk_sources(survivor['metadata']):
+            stats.cross_page += 1
+        add_source(survivor['metadata'], source)
+
+    stats.chunks_out = len(survivors)
+    stats.clusters_merged = len(merged_clusters)
+    if stats.duplicates_removed:
+        logger.info(
+            f"[OK] Dedup: {stats.chunks_in} -> {stats.chunks_out} chunks "
+            f"({stats.duplicates_removed} quase-duplicados, {stats.cross_page} entre paginas)"
+        )
+    return list(survivors.values()), stats
@@ -0,0 +1,243 @@
+"""
+Embeddings factory and content-addressed embedding store
+
+Single place where the OpenAI embeddings client is configured, so that
+ingestion and search always agree on model and dimensions.
+
+Ingestion goes through `CachedEmbedder`: vectors are persisted in a SQLite
+store keyed by hash(model, dimensions, text), so identical texts (re-runs,
+"alternative" pages sharing sections) are only ever paid for once. Misses
+are deduplicated and sent in large batches with bounded concurrency,
+backing off on rate limits.
+"""
+
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import openai
+from langchain_openai import OpenAIEmbeddings
+
+from src.config import settings
+from src.rag.fetcher import backoff_delay
+
+logger = logging.getLogger(__name__)
+
+# Max characters per request (~4 chars/token, well under the 300k token request limit)
+MAX_BATCH_CHARS = 600_000
+
+# Keys per SELECT ... IN (...) (SQLite variable limit)
+LOOKUP_CHUNK = 500
+
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.APITimeoutError,
+    openai.InternalServerError,
+)
+
+
+def create_embeddings() -> OpenAIEmbeddings:
+    """
+    Creates the embeddings client used for both ingestion and queries
+
+    When `settings.embedding_dimensions` is set, the model is asked for
+    reduced (Matryoshka-truncated) vectors. Changing it requires re-ingestion.
+    """
+    return OpenAIEmbeddings(
+        model=settings.embedding_model,
+        dimensions=settings.embedding_dimensions,
+        openai_api_key=settings.openai_api_key
+    )
+
+
+def embedding_key(text: str, model: str, dimensions: Optional[int]) -> str:
+    """Content address of an embedding: hash(model, dimensions, text)"""
+    return hashlib.sha256(f"{model}\n{dimensions or ''}\n{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    """SQLite-backed map of embedding key -> float32 vector"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or settings.embedding_cache_path
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+            )
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "EmbeddingStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        found = {}
+        with self._lock:
+            for i in range(0, len(keys), LOOKUP_CHUNK):
+                chunk = keys[i:i + LOOKUP_CHUNK]
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def put_many(self, items: Dict[str, np.ndarray]) -> None:
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in items.items()]
+            )
+
+
+@dataclass
+class EmbedderStats:
+    texts: int = 0
+    cache_hits: int = 0    # texts served without an API call (stored or duplicated)
+    embedded: int = 0      # unique texts sent to the API
+    requests: int = 0
+    retries: int = 0
+
+
+class CachedEmbedder:
+    """
+    Embeds documents through the embedding store
+
+    Only texts missing from the store reach the API: deduplicated, packed
+    into batches of up to `batch_size` texts, at most `max_concurrency`
+    requests in flight, retrying rate limits (honoring Retry-After) and
+    transient errors with jittered exponential backoff.
+    """
+
+    def __init__(
+        self,
+        store: Optional[EmbeddingStore] = None,
+        client: Optional[openai.OpenAI] = None,
+        model: Optional[str] = None,
+        dimensions: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        max_retries: Optional[int] = None,
+    ):
+        self.store = store if store is not None else EmbeddingStore()
+        if client is None:
+            client = openai.OpenAI(api_key=settings.openai_api_key, max_retries=0)
+        self.client = client
+        self.model = model or settings.embedding_model
+        self.dimensions = dimensions if dimensions is not None else settings.embedding_dimensions
+        self.batch_size = batch_size or settings.embedding_batch_size
+        self.max_concurrency = max_concurrency or settings.embedding_max_concurrency
+        self.max_retries = max_retries or settings.embedding_max_retries
+        self.stats = EmbedderStats()
+        self._stats_lock = threading.Lock()  # embed_documents may run on several threads
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [embedding_key(text, self.model, self.dimensions) for text in texts]
+        vectors = self.store.get_many(list(dict.fromkeys(keys)))
+
+        misses = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors:
+                misses.setdefault(key, text)
+
+        with self._stats_lock:
+            self.stats.texts += len(texts)
+            self.stats.cache_hits += len(texts) - len(misses)
+
+        if misses:
+            batches = self._batches(list(misses.items()))
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="embed") as executor:
+                futures = [executor.submit(self._embed_batch, batch) for batch in batches]
+                for future in as_completed(futures):
+                    embedded = future.result()
+                    # Persist each batch as it lands: a failure later keeps the paid-for vectors
+                    self.store.put_many(embedded)
+                    vectors.update(embedded)
+            with self._stats_lock:
+                self.stats.embedded += len(misses)
+            logger.info(
+                f"[OK] {len(misses)} embeddings novos em {len(batches)} requests "
+                f"({time.perf_counter() - start:.1f}s), {self.stats.cache_hits} do cache"
+            )
+
+        return [vectors[key].tolist() for key in keys]
+
+    def _batches(self, items: List[tuple]) -> List[List[tuple]]:
+        batches, current, chars = [], [], 0
+        for key, text in items:
+            if current and (len(current) >= self.batch_size or chars + len(text) > MAX_BATCH_CHARS):
+                batches.append(current)
+                current, chars = [], 0
+            current.append((key, text))
+            chars += len(text)
+        if current:
+            batches.append(current)
+        return batches
+
+    def _embed_batch(self, batch: List[tuple]) -> Dict[str, np.ndarray]:
+        kwargs = {"dimensions": self.dimensions} if self.dimensions else {}
+        for attempt in range(self.max_retries):
+            try:
+                response = self.client.embeddings.create(
+                    model=self.model,
+                    input=[text for _, text in batch],
+                    **kwargs
+                )
+                with self._stats_lock:
+                    self.stats.requests += 1
+                ordered = sorted(response.data, key=lambda item: item.index)
+                return {
+                    key: np.asarray(item.embedding, dtype=np.float32)
+                    for (key, _), item in zip(batch, ordered)
+                }
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries - 1:
+                    raise
+                with self._stats_lock:
+                    self.stats.retries += 1
+                delay = _retry_after(e) or backoff_delay(attempt, base=1.0)
+                logger.warning(
+                    f"Embeddings request falhou ({type(e).__name__}), "
+                    f"tentativa {attempt + 1}/{self.max_retries}, aguardando {delay:.1f}s"
+                )
+                time.sleep(delay)
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    value = response.headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = response.headers.get("retry-after")
+    if value:
+        try:
+            return float(value)
+        except ValueError:
+            pass
+    return None
@@ -0,0 +1,254 @@
+"""
+Concurrent URL fetcher for RAG ingestion
+
+- One shared keep-alive `requests.Session` (connection pool sized to the workers)
+- Bounded thread pool, with a per-host concurrency limit
+- Exponential backoff with full jitter between retries (honors Retry-After)
+- Conditional requests (If-None-Match / If-Modified-Since -> 304)
+- Ordered, windowed variant for streaming ingestion (fetch_ordered)
+- Per-URL timing in the logs
+"""
+
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.config import settings
+from src.rag.pipeline import ordered_map
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = "CloudWalkAgentSwarm-Ingest/1.0"
+
+# Status codes worth retrying (everything else in 4xx fails immediately)
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+
+@dataclass
+class FetchResult:
+    """Outcome of fetching one URL"""
+    url: str
+    content: bytes
+    status: int
+    elapsed: float
+    attempts: int
+    headers: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def not_modified(self) -> bool:
+        return self.status == 304
+
+
+class HostLimiter:
+    """Caps concurrent requests per host"""
+
+    def __init__(self, per_host: int):
+        self.per_host = per_host
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def for_url(self, url: str) -> threading.BoundedSemaphore:
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self.per_host)
+            return self._semaphores[host]
+
+
+def create_session(pool_size: Optional[int] = None) -> requests.Session:
+    """Keep-alive session whose connection pool matches the fetch concurrency"""
+    pool_size = pool_size or settings.ingest_max_workers
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = USER_AGENT
+    return session
+
+
+def backoff_delay(attempt: int, base: float, cap: float = 30.0) -> float:
+    """Full-jitter exponential backoff: uniform(0, min(cap, base * 2^attempt))"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def _retry_after(response: Optional[requests.Response]) -> Optional[float]:
+    if response is None:
+        return None
+    value = response.headers.get("Retry-After")
+    if value and value.isdigit():
+        return float(value)
+    return None
+
+
+def fetch_url(
+    session: requests.Session,
+    url: str,
+    max_retries: Optional[int] = None,
+    timeout: Optional[float] = None,
+    backoff_base: Optional[float] = None,
+    limiter: Optional[HostLimiter] = None,
+    headers: Optional[Dict[str, str]] = None,
+) -> FetchResult:
+    """
+    Fetches a URL with retries, failing hard after the last attempt
+
+    Args:
+        session: Shared session
+        url: URL to fetch
+        max_retries: Attempts (default: settings.ingest_max_retries)
+        timeout: Per-request timeout in seconds (default: settings.ingest_fetch_timeout)
+        backoff_base: Base backoff in seconds (default: settings.ingest_backoff_base)
+        limiter: Per-host concurrency limiter (optional)
+        headers: Extra request headers (optional)
+
+    Returns:
+        FetchResult
+
+    Raises:
+        requests.RequestException: If every attempt fails
+    """
+    max_retries = max_retries or settings.ingest_max_retries
+    timeout = timeout or settings.ingest_fetch_timeout
+    backoff_base = settings.ingest_backoff_base if backoff_base is None else backoff_base
+
+    start = time.perf_counter()
+    for attempt in range(max_retries):
+        response = None
+        try:
+            if limiter:
+                with limiter.for_url(url):
+                    response = session.get(url, timeout=timeout, headers=headers)
+            else:
+                response = session.get(url, timeout=timeout, headers=headers)
+            response.raise_for_status()
+
+            elapsed = time.perf_counter() - start
+            if response.status_code == 304:
+                logger.info(f"[OK] URL nao modificada (304) em {elapsed * 1000:.0f}ms: {url}")
+            else:
+                logger.info(f"[OK] URL carregada em {elapsed * 1000:.0f}ms ({attempt + 1} tentativa(s)): {url}")
+            return FetchResult(
+                url=url,
+                content=response.content,
+                status=response.status_code,
+                elapsed=elapsed,
+                attempts=attempt + 1,
+                headers=dict(response.headers),
+            )
+        except requests.RequestException as e:
+            status = response.status_code if response is not None else None
+            retryable = status is None or status in RETRYABLE_STATUS
+
+            logger.warning(f"Tentativa {attempt + 1}/{max_retries} para {url}: {e}")
+            if not retryable or attempt == max_retries - 1:
+                logger.error(f"[ERRO CRITICO] {url} nao carregou apos {attempt + 1} tentativas")
+                raise
+
+            delay = _retry_after(response) or backoff_delay(attempt, backoff_base)
+            time.sleep(delay)
+
+
+def fetch_all(
+    urls: List[str],
+    session: Optional[requests.Session] = None,
+    max_workers: Optional[int] = None,
+    per_host_limit: Optional[int] = None,
+    headers_for: Optional[Callable[[str], Dict[str, str]]] = None,
+    **fetch_kwargs,
+) -> Iterator[FetchResult]:
+    """
+    Fetches URLs concurrently, yielding results as they complete
+
+    Args:
+        urls: URLs to fetch
+        session: Shared session (created if omitted)
+        max_workers: Thread pool size (default: settings.ingest_max_workers)
+        per_host_limit: Concurrent requests per host (default: settings.ingest_per_host_limit)
+        headers_for: Function url -> extra headers (e.g. conditional request validators)
+        **fetch_kwargs: Passed to fetch_url (max_retries, timeout, backoff_base)
+
+    Yields:
+        FetchResult for each URL, in completion order
+
+    Raises:
+        requests.RequestException: On the first URL that fails (pending fetches are cancelled)
+    """
+    max_workers = max_workers or settings.ingest_max_workers
+    limiter = HostLimiter(per_host_limit or settings.ingest_per_host_limit)
+    own_session = session is None
+    session = session or create_session(max_workers)
+
+    start = time.perf_counter()
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fetch")
+    try:
+        futures = [
+            executor.submit(
+                fetch_url, session, url,
+                limiter=limiter,
+                headers=headers_for(url) if headers_for else None,
+                **fetch_kwargs
+            )
+            for url in urls
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        if own_session:
+            session.close()
+
+    logger.info(f"[OK] {len(urls)} URLs carregadas em {time.perf_counter() - start:.1f}s")
+
+
+def fetch_ordered(
+    urls: Iterable[str],
+    session: Optional[requests.Session] = None,
+    max_workers: Optional[int] = None,
+    per_host_limit: Optional[int] = None,
+    headers_for: Optional[Callable[[str], Dict[str, str]]] = None,
+    window: Optional[int] = None,
+    **fetch_kwargs,
+) -> Iterator[FetchResult]:
+    """
+    Fetches URLs concurrently, yielding results in input order
+
+    At most `window` pages are in flight or fetched-but-not-consumed, so a
+    slow consumer throttles fetching (bounded memory for any number of URLs).
+
+    Args:
+        window: Max outstanding pages (default: 2 x max_workers)
+        (others as in fetch_all)
+
+    Raises:
+        requests.RequestException: On the first URL that fails
+    """
+    max_workers = max_workers or settings.ingest_max_workers
+    window = window or 2 * max_workers
+    limiter = HostLimiter(per_host_limit or settings.ingest_per_host_limit)
+    own_session = session is None
+    session = session or create_session(max_workers)
+
+    def submit(url: str):
+        return executor.submit(
+            fetch_url, session, url,
+            limiter=limiter,
+            headers=headers_for(url) if headers_for else None,
+            **fetch_kwargs
+        )
+
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fetch")
+    try:
+        for _, result in ordered_map(submit, urls, window):
+            yield result
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        if own_session:
+            session.close()
@@ -1,26 +1,43 @@
 """
 RAG Ingestion Pipeline
 
-Pipeline completo:
-1. Load URLs com retry
-2. Semantic chunking
-3. Generate embeddings (OpenAI)
-4. Store in ChromaDB
-5. Validate completeness
+Pipeline incremental em streaming (etapas concorrentes, filas limitadas):
+1. Load URLs em paralelo (sessao compartilhada, backoff com jitter, GET condicional)
+2. Semantic chunking (so paginas alteradas) no parse pool
+3. Dedup de quase-duplicados + diff por chunk ID, em lotes
+4. Embeddings so dos chunks novos (embedding store por hash do texto)
+5. Upsert em lotes na nova versao da collection (blue/green), inalterados copiados da atual
+6. Validate completeness e troca atomica do ponteiro "current"
 """
 
-import time
-import requests
 import chromadb
-from typing import List
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Dict, Iterable, Iterator, List, Optional, Set
 import logging
-from langchain_openai import OpenAIEmbeddings
-from langchain_community.vectorstores import Chroma
 from langchain_core.documents import Document
 
 from src.config import settings
 from src.rag.urls import INFINITEPAY_URLS, EXPECTED_URL_COUNT
 from src.rag.semantic_chunker import process_html_to_chunks
+from src.rag.crawler import Crawler
+from src.rag.fetcher import FetchResult, create_session, fetch_all, fetch_ordered, fetch_url
+from src.rag.parse_pool import create_parse_pool, parse_page, parse_workers
+from src.rag.pipeline import Pipeline, StageStats, completed, ordered_map
+from src.rag.dedup import NearDuplicateIndex, add_source, chunk_sources
+from src.rag.embeddings import CachedEmbedder
+from src.rag.quantization import build_quantized_index, quantized_index_dir
+from src.rag.store import (
+    activate_collection,
+    collect_retired_collections,
+    current_collection_name,
+    get_chroma_client,
+    hnsw_collection_metadata,
+    new_collection_name,
+)
+from src.rag.state import IngestState, chunk_id, content_hash
 
 logger = logging.getLogger(__name__)
 
@@ -40,43 +57,40 @@ def load_url_with_retry(url: str, max_retries: int = 3, timeout: int = 30) -> by
     Raises:
         Exception: Se falhar após max_retries tentativas
     """
-    for attempt in range(max_retries):
-        try:
-            response = requests.get(url, timeout=timeout)
-            response.raise_for_status()
-            logger.info(f"[OK] URL carregada: {url}")
-            return response.content
-        except Exception as e:
-            logger.warning(f"Tentativa {attempt+1}/{max_retries} para {url}: {e}")
-            if attempt == max_retries - 1:
-                logger.error(f"[ERRO CRITICO] {url} nao carregou apos {max_retries} tentativas")
-                raise
-            time.sleep(2)  # Aguardar antes de retry
+    with create_session(pool_size=1) as session:
+        return fetch_url(session, url, max_retries=max_retries, timeout=timeout).content
 
 
-def load_infinitepay_docs() -> List[Document]:
+def load_infinitepay_docs(urls: Optional[List[str]] = None) -> List[Document]:
     """
     Carrega e processa todas URLs com semantic chunking
     
+    As URLs são baixadas em paralelo (fetcher); o processamento segue a
+    ordem original da lista para manter a saída determinística.
+    
+    Args:
+        urls: URLs para ingerir (padrão: INFINITEPAY_URLS)
+    
     Returns:
         List[Document] - chunks prontos para embedding
     
     Raises:
         Exception: Se qualquer URL falhar
     """
+    urls = urls or INFINITEPAY_URLS
     all_documents = []
     
-    logger.info(f"Iniciando ingestao de {len(INFINITEPAY_URLS)} URLs...")
+    logger.info(f"Iniciando ingestao de {len(urls)} URLs...")
+    
+    # 1. Carregar HTML de todas URLs em paralelo (falha se qualquer uma falhar)
+    pages = {result.url: result.content for result in fetch_all(urls)}
     
-    for i, url in enumerate(INFINITEPAY_URLS, 1):
-        logger.info(f"[{i}/{len(INFINITEPAY_URLS)}] Processando {url}...")
+    for i, url in enumerate(urls, 1):
+        logger.info(f"[{i}/{len(urls)}] Processando {url}...")
         
         try:
-            # 1. Carregar HTML com retry
-            html_content = load_url_with_retry(url)
-            
             # 2. Processar com semantic chunker
-            chunks = process_html_to_chunks(html_content, url)
+            chunks = process_html_to_chunks(pages[url], url)
             
             if not chunks:
                 logger.warning(f"URL {url} nao gerou chunks!")
@@ -96,21 +110,28 @@ def load_infinitepay_docs() -> List[Document]:
             logger.error(f"  [FALHA] Erro ao processar {url}: {e}")
             raise  # FAIL HARD - não skip
     
-    logger.info(f"[SUCESSO] Total de {len(all_documents)} chunks de {len(INFINITEPAY_URLS)} URLs")
+    logger.info(f"[SUCESSO] Total de {len(all_documents)} chunks de {len(urls)} URLs")
     return all_documents
 
 
-def create_chroma_client() -> chromadb.PersistentClient:
-    """Cria/carrega ChromaDB persistente"""
-    client = chromadb.PersistentClient(path=settings.chroma_persist_dir)
-    logger.info(f"ChromaDB client criado: {settings.chroma_persist_dir}")
-    return client
+def create_chroma_client() -> chromadb.ClientAPI:
+    """Retorna o handle ChromaDB compartilhado do processo"""
+    return get_chroma_client()
 
 
-def validate_rag_completeness() -> bool:
+def validate_rag_completeness(
+    collection_name: Optional[str] = None,
+    expected_urls: Optional[Iterable[str]] = None
+) -> bool:
     """
     Valida que ingestão está completa
     
+    Args:
+        collection_name: Versão a validar (padrão: a collection atual)
+        expected_urls: URLs que devem estar presentes (padrão: no modo
+            "crawl", as páginas com chunks do manifest do crawl; no modo
+            "urls", EXPECTED_URL_COUNT)
+    
     Checks:
     - ChromaDB não está vazio
     - Todas as URLs esperadas foram ingeridas
@@ -123,11 +144,11 @@ def validate_rag_completeness() -> bool:
         ValueError: Se dados incompletos
         Exception: Se ChromaDB não existe
     """
+    collection_name = collection_name or current_collection_name()
     try:
-        client = chromadb.PersistentClient(path=settings.chroma_persist_dir)
-        collection = client.get_collection("infinitepay_docs")
+        collection = get_chroma_client().get_collection(collection_name)
     except Exception as e:
-        raise ValueError(f"ChromaDB collection 'infinitepay_docs' nao existe: {e}")
+        raise ValueError(f"ChromaDB collection '{collection_name}' nao existe: {e}")
     
     # Check 1: Não vazio
     total_chunks = collection.count()
@@ -135,13 +156,25 @@ def validate_rag_completeness() -> bool:
         raise ValueError("[ERRO] ChromaDB vazio apos ingestao!")
     
     # Check 2: Todas URLs presentes
-    all_docs = collection.get()
+    all_docs = collection.get(include=["metadatas"])
     unique_sources = set()
     for metadata in all_docs['metadatas']:
-        if metadata and 'source' in metadata:
-            unique_sources.add(metadata['source'])
+        if metadata:
+            # Chunks deduplicados carregam todas as URLs em 'sources'
+            unique_sources.update(chunk_sources(metadata))
+    
+    if expected_urls is None and settings.ingest_mode == "crawl":
+        expected_urls = crawl_manifest_urls()
     
-    if len(unique_sources) < EXPECTED_URL_COUNT:
+    if expected_urls is not None:
+        missing = [url for url in expected_urls if url not in unique_sources]
+        if missing:
+            raise ValueError(
+                f"[ERRO] Ingestao incompleta! "
+                f"Faltam {len(missing)} URLs do manifest do crawl "
+                f"(ex.: {', '.join(missing[:5])})"
+            )
+    elif len(unique_sources) < EXPECTED_URL_COUNT:
         missing = EXPECTED_URL_COUNT - len(unique_sources)
         raise ValueError(
             f"[ERRO] Ingestao incompleta! "
@@ -156,70 +189,504 @@ def validate_rag_completeness() -> bool:
     return True
 
 
-def ingest_documents() -> int:
+def crawl_manifest_urls(state: Optional[IngestState] = None) -> List[str]:
+    """Páginas do último crawl que geraram chunks (o que a collection deve conter)"""
+    if state is not None:
+        manifest = state.crawl_manifest()
+    else:
+        with IngestState() as own_state:
+            manifest = own_state.crawl_manifest()
+    return [url for url, chunks in manifest.items() if chunks]
+
+
+@dataclass
+class IngestSummary:
+    """Resumo de uma execução de ingestão incremental"""
+    pages_total: int = 0
+    pages_not_modified: int = 0     # 304 - nem baixadas de novo
+    pages_unchanged: int = 0        # 200 com o mesmo hash - não re-processadas
+    pages_changed: int = 0          # novas ou alteradas - re-chunked
+    chunks_total: int = 0
+    chunks_deduplicated: int = 0    # quase-duplicados colapsados (MinHash/LSH)
+    chunks_unchanged: int = 0
+    chunks_added: int = 0
+    chunks_removed: int = 0
+    embeddings_from_cache: int = 0  # chunks novos cujo texto já estava no embedding store
+    embedding_calls_avoided: int = 0
+    duration: float = 0.0
+    stage_seconds: Dict[str, float] = field(default_factory=dict)  # etapas fora do pipeline
+    pipeline_stats: List[StageStats] = field(default_factory=list)  # throughput por etapa do pipeline
+
+    def __str__(self) -> str:
+        return (
+            f"paginas: {self.pages_total} ({self.pages_not_modified} nao modificadas, "
+            f"{self.pages_unchanged} iguais, {self.pages_changed} alteradas) | "
+            f"chunks: {self.chunks_total} ({self.chunks_unchanged} inalterados, "
+            f"+{self.chunks_added}, -{self.chunks_removed}, {self.chunks_deduplicated} duplicados) | "
+            f"embeddings do cache: {self.embeddings_from_cache} | "
+            f"embeddings evitados: {self.embedding_calls_avoided} | {self.duration:.1f}s"
+        )
+    
+    def format_stages(self) -> str:
+        parts = [str(stats) for stats in self.pipeline_stats]
+        parts += [f"{stage} {seconds:.2f}s" for stage, seconds in self.stage_seconds.items()]
+        return " | ".join(parts)
+
+
+@dataclass
+class PageChunks:
+    """Chunks atuais de uma página, como saem da etapa de parse"""
+    url: str
+    chunks: List[Dict]
+    changed: bool       # re-parseada (nova ou alterada)
+
+
+@dataclass
+class ChunkBatch:
     """
-    Pipeline completo de ingestão
+    Lote de chunks para embed/upsert
     
-    1. Load docs (semantic chunking)
-    2. Generate embeddings (OpenAI)
-    3. Store in ChromaDB
-    4. Validate completeness
+    'new': chunks sem vetor na versão atual (content preenchido).
+    'kept': chunks já na versão atual; content e vetor são copiados dela na
+    etapa de embed (o diff guarda só id + metadata).
+    """
+    kind: str
+    chunks: List[Dict]
+    embeddings: Optional[List] = None
+
+
+def assign_chunk_ids(chunks: List[Dict], url: str) -> List[Dict]:
+    """
+    IDs derivados do conteúdo para os chunks de uma página
     
-    Returns:
-        int: Número de chunks ingeridos
+    Chunks idênticos dentro da mesma página são colapsados (mesmo ID).
+    """
+    with_ids = []
+    seen = set()
+    for chunk in chunks:
+        cid = chunk_id(url, chunk['content'])
+        if cid in seen:
+            continue
+        seen.add(cid)
+        with_ids.append({'id': cid, 'content': chunk['content'], 'metadata': chunk['metadata']})
+    return with_ids
+
+
+def chunk_page(html: bytes, url: str) -> List[Dict]:
+    """Chunking de uma página (no processo atual) com IDs derivados do conteúdo"""
+    return assign_chunk_ids(process_html_to_chunks(html, url), url)
+
+
+def parse_pages(
+    results: Iterable[FetchResult],
+    state: IngestState,
+    summary: IngestSummary,
+    total: Optional[int] = None
+) -> Iterator[PageChunks]:
+    """
+    Etapa de parse: FetchResult -> PageChunks, na ordem das URLs
     
-    Raises:
-        Exception: Se falhar em carregar URLs ou validação falhar
+    Páginas com 304 ou com o mesmo hash reaproveitam os chunks do estado
+    sem re-processar o HTML. As demais são parseadas no parse pool
+    (processos), com no máximo 2 páginas por worker em andamento; com
+    poucas URLs o parse roda no próprio processo. `total` é None no modo
+    crawl (número de páginas desconhecido).
     """
-    logger.info("="*80)
-    logger.info("INICIANDO INGESTAO RAG")
-    logger.info("="*80)
+    use_pool = total is None or total >= settings.ingest_parse_pool_min_pages
+    workers = parse_workers(total) if use_pool else 1
+    pool = None
+    parse_cpu = 0.0
     
-    # 1. Load documents
-    logger.info("Etapa 1: Carregando documentos...")
-    documents = load_infinitepay_docs()
+    def submit(result: FetchResult) -> Future:
+        nonlocal pool
+        url = result.url
+        page = state.get_page(url)
+        
+        if result.not_modified and page:
+            state.touch_page(url)
+            summary.pages_not_modified += 1
+            return completed((state.get_chunks(url), None))
+        
+        page_hash = content_hash(result.content)
+        if page and page['content_hash'] == page_hash:
+            chunks = state.get_chunks(url)
+            summary.pages_unchanged += 1
+            _save_page(state, result, page_hash, chunks)
+            return completed((chunks, None))
+        
+        summary.pages_changed += 1
+        if not use_pool:
+            return completed(parse_page(result.content, url))
+        if pool is None:
+            pool = create_parse_pool(workers)
+        return pool.submit(parse_page, result.content, url)
     
-    if not documents:
-        raise ValueError("Nenhum documento foi carregado!")
+    try:
+        for i, (result, (chunks, cpu_seconds)) in enumerate(ordered_map(submit, results, 2 * workers), 1):
+            url = result.url
+            changed = cpu_seconds is not None
+            if changed:
+                parse_cpu += cpu_seconds
+                chunks = assign_chunk_ids(chunks, url)
+                _save_page(state, result, content_hash(result.content), chunks)
+                logger.info(f"[{i}/{total or '?'}] {len(chunks)} chunks de {url}")
+            else:
+                logger.info(f"[{i}/{total or '?'}] Sem mudancas ({len(chunks)} chunks): {url}")
+            if not chunks:
+                logger.warning(f"URL {url} nao gerou chunks!")
+            summary.pages_total += 1
+            yield PageChunks(url=url, chunks=chunks, changed=changed)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+        summary.stage_seconds['parse_cpu'] = parse_cpu
+
+
+def _save_page(state: IngestState, result: FetchResult, page_hash: str, chunks: List[Dict]) -> None:
+    state.save_page(
+        result.url, page_hash, chunks,
+        etag=result.headers.get('ETag'),
+        last_modified=result.headers.get('Last-Modified')
+    )
+
+
+def collect_chunks(
+    urls: List[str],
+    state: IngestState,
+    summary: IngestSummary
+) -> List[Dict]:
+    """
+    Baixa as URLs (GET condicional) e retorna os chunks atuais de todas
     
-    logger.info(f"[OK] {len(documents)} documentos carregados")
+    Roda só as etapas fetch -> parse do pipeline e junta o resultado.
+    """
+    all_chunks = []
     
-    # 2. Setup embeddings
-    logger.info("Etapa 2: Configurando embeddings OpenAI...")
-    embeddings = OpenAIEmbeddings(
-        model="text-embedding-3-small",
-        openai_api_key=settings.openai_api_key
+    def gather(pages: Iterator[PageChunks]) -> None:
+        for page in pages:
+            all_chunks.extend(page.chunks)
+    
+    pipeline = Pipeline()
+    fetched = pipeline.stage(
+        "fetch", lambda: fetch_ordered(urls, headers_for=state.conditional_headers), unit_name="paginas"
+    )
+    parsed = pipeline.stage(
+        "parse", lambda results: parse_pages(results, state, summary, len(urls)), fetched, unit_name="paginas"
     )
-    logger.info("[OK] Embeddings configurados")
+    pipeline.sink("collect", gather, parsed)
+    summary.pipeline_stats = list(pipeline.run().values())
+    return all_chunks
+
+
+class ChunkDiff:
+    """
+    Etapa de diff: dedup em streaming + classificação contra a versão atual
     
-    # 3. Create/load Chroma vectorstore
-    logger.info("Etapa 3: Criando ChromaDB vectorstore...")
+    Emite lotes de `batch_size` chunks. Chunks inalterados ficam retidos
+    (só id + metadata) até aparecer a primeira mudança; se nada mudou, nenhum
+    lote é emitido e a versão atual continua servindo.
     
-    # Deletar collection existente se houver (fresh start)
-    client = create_chroma_client()
+    Memória por chunk: o ID e a assinatura MinHash (não o texto/vetor).
+    """
+    
+    def __init__(self, existing_ids: Set[str], summary: IngestSummary, batch_size: Optional[int] = None):
+        self.summary = summary
+        self.batch_size = batch_size or settings.ingest_batch_size
+        self.index = NearDuplicateIndex() if settings.dedup_enabled else None
+        self.remaining = set(existing_ids)        # ao final: chunks removidos
+        self.changed = not existing_ids
+        self.sources: Dict[str, str] = {}         # survivor id -> URL (dedup)
+        self.merged: Dict[str, Dict] = {}         # survivor id -> {'sources': ...}
+        self.cross_page = 0
+    
+    def run(self, pages: Iterable[PageChunks]) -> Iterator[ChunkBatch]:
+        added: List[Dict] = []
+        kept: List[Dict] = []
+        
+        for page in pages:
+            self.changed = self.changed or page.changed
+            for chunk in page.chunks:
+                if self._is_duplicate(chunk):
+                    continue
+                
+                self.summary.chunks_total += 1
+                if chunk['id'] in self.remaining:
+                    self.remaining.discard(chunk['id'])
+                    kept.append({'id': chunk['id'], 'metadata': chunk['metadata']})
+                    self.summary.chunks_unchanged += 1
+                else:
+                    added.append(chunk)
+                    self.changed = True
+                    self.summary.chunks_added += 1
+                
+                if len(added) >= self.batch_size:
+                    yield ChunkBatch('new', added)
+                    added = []
+                while self.changed and len(kept) >= self.batch_size:
+                    yield ChunkBatch('kept', kept[:self.batch_size])
+                    kept = kept[self.batch_size:]
+        
+        self.summary.chunks_removed = len(self.remaining)
+        self.changed = self.changed or bool(self.remaining)
+        if self.merged:
+            logger.info(
+                f"[OK] Dedup: {self.summary.chunks_deduplicated} quase-duplicados "
+                f"({self.cross_page} entre paginas)"
+            )
+        if not self.changed:
+            return
+        
+        for i in range(0, len(kept), self.batch_size):
+            yield ChunkBatch('kept', kept[i:i + self.batch_size])
+        if added:
+            yield ChunkBatch('new', added)
+    
+    def _is_duplicate(self, chunk: Dict) -> bool:
+        source = chunk['metadata'].get('source', '')
+        if self.index is None:
+            return False
+        
+        survivor = self.index.add(chunk['id'], chunk['content'])
+        if survivor is None:
+            self.sources[chunk['id']] = source
+            return False
+        
+        metadata = self.merged.setdefault(survivor, {'source': self.sources[survivor]})
+        if source not in chunk_sources(metadata):
+            self.cross_page += 1
+        add_source(metadata, source)
+        self.summary.chunks_deduplicated += 1
+        return True
+
+
+def embed_batches(
+    batches: Iterable[ChunkBatch],
+    embedder: CachedEmbedder,
+    current_collection,
+    summary: IngestSummary
+) -> Iterator[ChunkBatch]:
+    """
+    Etapa de embed: preenche os vetores de cada lote, na ordem
+    
+    Lotes 'new' passam pelo embedding store (OpenAI só para texto inédito);
+    lotes 'kept' copiam documento + vetor da versão atual. Até
+    `embedding_max_concurrency` lotes em andamento.
+    """
+    concurrency = settings.embedding_max_concurrency
+    
+    def embed(batch: ChunkBatch) -> None:
+        if batch.kind == 'new':
+            batch.embeddings = embedder.embed_documents([chunk['content'] for chunk in batch.chunks])
+            return
+        ids = [chunk['id'] for chunk in batch.chunks]
+        stored = current_collection.get(ids=ids, include=["embeddings", "documents"])
+        stored = dict(zip(stored['ids'], zip(stored['embeddings'], stored['documents'])))
+        batch.embeddings = []
+        for chunk in batch.chunks:
+            vector, document = stored[chunk['id']]
+            batch.embeddings.append(vector)
+            chunk['content'] = document
+    
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="embed")
     try:
-        client.delete_collection("infinitepay_docs")
-        logger.info("[OK] Collection antiga deletada")
-    except:
-        pass
-    
-    # Criar nova collection e adicionar documentos
-    vectorstore = Chroma.from_documents(
-        documents=documents,
-        embedding=embeddings,
-        collection_name="infinitepay_docs",
-        persist_directory=settings.chroma_persist_dir
-    )
+        for batch, _ in ordered_map(lambda batch: executor.submit(embed, batch), batches, concurrency):
+            yield batch
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        summary.embeddings_from_cache = embedder.stats.cache_hits
+
+
+class VersionWriter:
+    """Etapa de upsert: cria a nova versão no primeiro lote e grava cada lote"""
     
-    logger.info(f"[OK] ChromaDB populado com {len(documents)} chunks")
+    def __init__(self, client: chromadb.ClientAPI):
+        self.client = client
+        self.name: Optional[str] = None
+        self.collection = None
     
-    # 4. Validação obrigatória
-    logger.info("Etapa 4: Validando completeness...")
-    validate_rag_completeness()
+    def write(self, batches: Iterable[ChunkBatch], diff: ChunkDiff) -> None:
+        for batch in batches:
+            if self.collection is None:
+                self.name = new_collection_name()
+                logger.info(f"Construindo {self.name}...")
+                self.collection = self.client.create_collection(self.name, metadata=hnsw_collection_metadata())
+            _add_chunks(self.collection, batch.chunks, batch.embeddings)
+        
+        # URLs dos quase-duplicados: o diff só as conhece por completo no final
+        merged = {cid: metadata['sources'] for cid, metadata in diff.merged.items() if 'sources' in metadata}
+        if self.collection is not None and merged:
+            ids = list(merged)
+            for i in range(0, len(ids), settings.ingest_batch_size):
+                batch_ids = ids[i:i + settings.ingest_batch_size]
+                stored = self.collection.get(ids=batch_ids, include=["metadatas"])
+                metadatas = []
+                for cid, metadata in zip(stored['ids'], stored['metadatas']):
+                    metadatas.append({**metadata, 'sources': merged[cid]})
+                self.collection.update(ids=stored['ids'], metadatas=metadatas)
+    
+    def discard(self) -> None:
+        if self.collection is not None:
+            self.client.delete_collection(self.name)
+
+
+def ingest_documents(full_rebuild: bool = False, urls: Optional[List[str]] = None) -> IngestSummary:
+    """
+    Pipeline incremental de ingestão em streaming, com troca blue/green da collection
+    
+    Etapas concorrentes ligadas por filas limitadas (backpressure; a memória
+    não cresce com o corpus):
+    
+        fetch -> parse -> diff -> embed -> upsert
+    
+    - fetch: GET condicional, em paralelo, na ordem das URLs
+    - parse: semantic chunking só do que mudou (parse pool)
+    - diff: quase-duplicados (MinHash/LSH) + classificação por chunk ID
+      contra a versão atual, em lotes de `ingest_batch_size`
+    - embed: embedding store (OpenAI só para texto inédito); inalterados
+      copiam o vetor da versão atual
+    - upsert: grava cada lote na nova versão da collection
+    
+    Depois: validate completeness da nova versão, troca atômica do ponteiro
+    "current" e remoção de versões antigas. A collection servindo buscas
+    nunca é apagada nem fica parcial; se qualquer etapa falhar, a versão
+    nova é descartada.
+    
+    No modo crawl (settings.ingest_mode == "crawl", sem `urls`), a etapa
+    fetch é o Crawler (sitemap + links, frontier persistido e retomável) e
+    a validação usa o manifest do crawl em vez de EXPECTED_URL_COUNT.
+    
+    Args:
+        full_rebuild: Ignora o estado salvo e não reaproveita vetores da versão atual
+        urls: URLs para ingerir (padrão: INFINITEPAY_URLS, ou o crawl no modo crawl)
+    
+    Returns:
+        IngestSummary: Contagens de páginas/chunks, embeddings evitados e throughput por etapa
+    
+    Raises:
+        Exception: Se falhar em carregar URLs ou validação falhar
+    """
+    start = time.perf_counter()
+    crawl = urls is None and settings.ingest_mode == "crawl"
+    urls = None if crawl else (urls or INFINITEPAY_URLS)
+    summary = IngestSummary()
+    expected_urls = None
     
     logger.info("="*80)
-    logger.info(f"INGESTAO COMPLETA: {len(documents)} chunks")
+    logger.info(
+        f"INICIANDO INGESTAO RAG ({'completa' if full_rebuild else 'incremental'}, "
+        f"{'crawl de ' + settings.crawl_seed if crawl else f'{len(urls)} URLs'})"
+    )
     logger.info("="*80)
     
-    return len(documents)
+    client = create_chroma_client()
+    current_name = current_collection_name()
+    try:
+        current_collection = None if full_rebuild else client.get_collection(current_name)
+    except Exception:
+        current_collection = None
+    
+    diff = ChunkDiff(_collection_ids(current_collection), summary)
+    writer = VersionWriter(client)
+    embedder = CachedEmbedder(max_concurrency=1)  # concorrência entre lotes, na etapa de embed
+    
+    try:
+        with IngestState() as state:
+            if full_rebuild:
+                state.clear()
+            
+            if crawl:
+                fetch = Crawler(state).crawl
+            else:
+                fetch = partial(fetch_ordered, urls, headers_for=state.conditional_headers)
+            total = None if crawl else len(urls)
+            
+            pipeline = Pipeline()
+            fetched = pipeline.stage("fetch", fetch, unit_name="paginas")
+            parsed = pipeline.stage(
+                "parse", lambda results: parse_pages(results, state, summary, total), fetched,
+                unit_name="paginas"
+            )
+            batches = pipeline.stage(
+                "diff", diff.run, parsed,
+                weight=lambda batch: len(batch.chunks), unit_name="chunks"
+            )
+            embedded = pipeline.stage(
+                "embed", lambda items: embed_batches(items, embedder, current_collection, summary), batches,
+                weight=lambda batch: len(batch.chunks), unit_name="chunks"
+            )
+            pipeline.sink(
+                "upsert", lambda items: writer.write(items, diff), embedded,
+                weight=lambda batch: len(batch.chunks), unit_name="chunks"
+            )
+            
+            logger.info("Pipeline: fetch -> parse -> diff -> embed -> upsert")
+            summary.pipeline_stats = list(pipeline.run().values())
+            if crawl:
+                expected_urls = crawl_manifest_urls(state)
+        
+        summary.embedding_calls_avoided = summary.chunks_unchanged + summary.embeddings_from_cache
+        if not summary.chunks_total:
+            raise ValueError("Nenhum documento foi carregado!")
+        
+        # Nada mudou: a versão atual continua servindo
+        if writer.collection is None:
+            logger.info(f"[OK] Nenhuma mudanca; collection {current_name} mantida")
+            validate_rag_completeness(current_name, expected_urls)
+            return _finish(summary, start)
+        
+        logger.info(
+            f"[OK] {writer.name}: {summary.chunks_added} adicionados, {summary.chunks_removed} removidos, "
+            f"{summary.chunks_unchanged} inalterados "
+            f"(HNSW space={settings.hnsw_space}, M={settings.hnsw_m}, "
+            f"ef_construction={settings.hnsw_construction_ef}, ef_search={settings.hnsw_search_ef})"
+        )
+        
+        # Copia compacta (float16/int8) usada pelo RAGSearcher
+        if settings.embedding_storage != "float32":
+            stage_start = time.perf_counter()
+            build_quantized_index(writer.collection, settings.embedding_storage, quantized_index_dir(writer.name))
+            summary.stage_seconds['quantize'] = time.perf_counter() - stage_start
+        
+        # Validação obrigatória (antes de servir)
+        logger.info("Validando completeness...")
+        stage_start = time.perf_counter()
+        validate_rag_completeness(writer.name, expected_urls)
+        summary.stage_seconds['validate'] = time.perf_counter() - stage_start
+    except Exception:
+        if writer.collection is not None:
+            logger.error(f"[ERRO] Versao {writer.name} descartada; {current_name} continua ativa")
+            writer.discard()
+        raise
+    finally:
+        embedder.store.close()
+    
+    # Troca atômica + limpeza de versões antigas (após o grace period)
+    activate_collection(writer.name)
+    collect_retired_collections()
+    
+    return _finish(summary, start)
+
 
+def _collection_ids(collection) -> Set[str]:
+    """IDs de todos os chunks de uma collection (vazio se None)"""
+    if collection is None:
+        return set()
+    return set(collection.get(include=[])['ids'])
+
+
+def _add_chunks(collection, chunks: List[Dict], embeddings: List) -> None:
+    collection.add(
+        ids=[chunk['id'] for chunk in chunks],
+        embeddings=embeddings,
+        documents=[chunk['content'] for chunk in chunks],
+        metadatas=[chunk['metadata'] for chunk in chunks]
+    )
+
+
+def _finish(summary: IngestSummary, start: float) -> IngestSummary:
+    summary.duration = time.perf_counter() - start
+    logger.info("="*80)
+    logger.info(f"INGESTAO COMPLETA: {summary}")
+    logger.info(f"Etapas: {summary.format_stages()}")
+    logger.info("="*80)
+    return summary
@@ -0,0 +1,47 @@
+"""
+Parse pool - HTML parsing/chunking on all cores
+
+Parsing and chunking are CPU-bound (lxml walk, regex normalization), so
+ingestion runs them in a process pool while the fetch threads keep
+downloading. Only bytes and plain dicts cross the process boundary.
+
+Workers are started with "spawn": the parent already runs fetch threads,
+and forking a multi-threaded process can deadlock on inherited locks. This
+module only imports the chunker, so spawned workers start quickly.
+"""
+
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from src.config import settings
+from src.rag.semantic_chunker import process_html_to_chunks
+
+logger = logging.getLogger(__name__)
+
+
+def parse_workers(pages: Optional[int] = None) -> int:
+    """Pool size: settings.ingest_parse_workers or the CPU count, never more than the pages"""
+    workers = settings.ingest_parse_workers or os.cpu_count() or 1
+    return max(1, min(workers, pages)) if pages else workers
+
+
+def create_parse_pool(max_workers: Optional[int] = None) -> ProcessPoolExecutor:
+    workers = max_workers or parse_workers()
+    logger.info(f"Parse pool: {workers} processos")
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def parse_page(html_content: bytes, source_url: str) -> Tuple[List[Dict], float]:
+    """
+    Worker: HTML -> chunks (plain dicts)
+
+    Returns:
+        Tuple (chunks, cpu_seconds spent in the worker)
+    """
+    start = time.process_time()
+    chunks = process_html_to_chunks(html_content, source_url)
+    return chunks, time.process_time() - start
@@ -0,0 +1,224 @@
+"""
+Streaming pipeline - Bounded, concurrent stages connected by queues
+
+Each stage is a generator function running in its own thread: it consumes
+the previous stage's output and yields items to the next one. Queues are
+bounded, so a slow stage blocks its producers (backpressure) and memory stays
+proportional to queue_size x item size instead of the corpus size.
+
+Per stage the pipeline records items, elapsed time and how long the stage
+waited for input (starved) or on a full output queue (backpressured). The
+busiest stage is the bottleneck.
+
+Any stage error stops every stage and is re-raised by `Pipeline.run()`.
+"""
+
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+_END = object()
+
+# How often blocked stages check whether the pipeline was stopped (seconds)
+POLL_INTERVAL = 0.1
+
+
+class PipelineStopped(Exception):
+    """Raised inside a stage when another stage failed"""
+
+
+def ordered_map(
+    submit: Callable[[Any], Future],
+    items: Iterable,
+    window: int
+) -> Iterator[Tuple[Any, Any]]:
+    """
+    Runs `submit(item)` with at most `window` futures outstanding and yields
+    (item, result) in input order
+
+    Items are pulled lazily, so a consumer that stops pulling stops new
+    submissions (backpressure) and output order is deterministic.
+    """
+    pending = deque()
+    for item in items:
+        pending.append((item, submit(item)))
+        if len(pending) >= window:
+            item, future = pending.popleft()
+            yield item, future.result()
+    while pending:
+        item, future = pending.popleft()
+        yield item, future.result()
+
+
+def completed(value) -> Future:
+    """Already resolved future (for items that need no background work)"""
+    future = Future()
+    future.set_result(value)
+    return future
+
+
+@dataclass
+class StageStats:
+    name: str
+    items_in: int = 0
+    items_out: int = 0
+    units: int = 0              # domain units (e.g. chunks) when the stage reports them
+    unit_name: str = "itens"
+    wait_input: float = 0.0
+    wait_output: float = 0.0
+    started: float = 0.0
+    finished: float = 0.0
+
+    @property
+    def elapsed(self) -> float:
+        return max(0.0, self.finished - self.started)
+
+    @property
+    def busy(self) -> float:
+        return max(0.0, self.elapsed - self.wait_input - self.wait_output)
+
+    @property
+    def throughput(self) -> float:
+        count = self.units or self.items_out or self.items_in
+        return count / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self) -> str:
+        count = self.units or self.items_out or self.items_in
+        busy_pct = 100 * self.busy / self.elapsed if self.elapsed else 0.0
+        return (
+            f"{self.name}: {count} {self.unit_name} em {self.elapsed:.2f}s "
+            f"({self.throughput:.1f}/s, ocupado {busy_pct:.0f}%)"
+        )
+
+
+class Pipeline:
+    """Threads + bounded queues; see module docstring"""
+
+    def __init__(self, queue_size: Optional[int] = None):
+        self.queue_size = queue_size or settings.ingest_queue_size
+        self.stats: Dict[str, StageStats] = {}
+        self._threads: List[threading.Thread] = []
+        self._errors: List[BaseException] = []
+        self._stop = threading.Event()
+
+    def stage(
+        self,
+        name: str,
+        func: Callable,
+        inbox: Optional[queue.Queue] = None,
+        weight: Optional[Callable[[Any], int]] = None,
+        unit_name: str = "itens",
+    ) -> queue.Queue:
+        """
+        Adds a stage and returns its output queue
+
+        Args:
+            name: Stage name (stats, thread name)
+            func: Generator function; called with the input iterator, or with
+                no arguments for a source stage (inbox=None)
+            inbox: Output queue of the previous stage
+            weight: item -> units, to report throughput in domain units
+            unit_name: Label of those units
+        """
+        outbox = queue.Queue(maxsize=self.queue_size)
+        self._add(name, func, inbox, outbox, weight, unit_name)
+        return outbox
+
+    def sink(
+        self,
+        name: str,
+        func: Callable,
+        inbox: queue.Queue,
+        weight: Optional[Callable[[Any], int]] = None,
+        unit_name: str = "itens",
+    ) -> None:
+        """Adds a final stage; `func` consumes the input iterator"""
+        self._add(name, func, inbox, None, weight, unit_name)
+
+    def run(self) -> Dict[str, StageStats]:
+        """Runs every stage to completion; re-raises the first stage error"""
+        for thread in self._threads:
+            thread.start()
+        for thread in self._threads:
+            thread.join()
+        if self._errors:
+            raise self._errors[0]
+        return self.stats
+
+    def _add(self, name, func, inbox, outbox, weight, unit_name) -> None:
+        stats = StageStats(name=name, unit_name=unit_name)
+        self.stats[name] = stats
+        self._threads.append(threading.Thread(
+            target=self._run_stage,
+            args=(stats, func, inbox, outbox, weight),
+            name=f"ingest-{name}",
+            daemon=True,
+        ))
+
+    def _run_stage(self, stats, func, inbox, outbox, weight) -> None:
+        stats.started = time.perf_counter()
+        try:
+            if inbox is None:
+                outputs = func()
+            else:
+                outputs = func(self._consume(inbox, stats, weight if outbox is None else None))
+
+            if outbox is None:
+                # Sinks may be plain functions or generators
+                for _ in outputs or ():
+                    pass
+            else:
+                for item in outputs:
+                    stats.items_out += 1
+                    if weight:
+                        stats.units += weight(item)
+                    self._put(outbox, item, stats)
+                self._put(outbox, _END, stats)
+        except PipelineStopped:
+            pass
+        except BaseException as e:
+            logger.error(f"[ERRO] Etapa '{stats.name}' falhou: {e}")
+            self._errors.append(e)
+            self._stop.set()
+        finally:
+            stats.finished = time.perf_counter()
+
+    def _consume(self, inbox: queue.Queue, stats: StageStats, weight) -> Iterator:
+        while True:
+            start = time.perf_counter()
+            while True:
+                if self._stop.is_set():
+                    raise PipelineStopped()
+                try:
+                    item = inbox.get(timeout=POLL_INTERVAL)
+                    break
+                except queue.Empty:
+                    continue
+            stats.wait_input += time.perf_counter() - start
+            if item is _END:
+                return
+            stats.items_in += 1
+            if weight:
+                stats.units += weight(item)
+            yield item
+
+    def _put(self, outbox: queue.Queue, item, stats: StageStats) -> None:
+        start = time.perf_counter()
+        while True:
+            if self._stop.is_set():
+                raise PipelineStopped()
+            try:
+                outbox.put(item, timeout=POLL_INTERVAL)
+                break
+            except queue.Full:
+                continue
+        stats.wait_output += time.perf_counter() - start
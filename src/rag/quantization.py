@@ -0,0 +1,199 @@
+"""
+Quantized vector index - Compact in-memory copy of the stored embeddings
+
+Stores unit-normalized vectors as float32, float16 or int8 (with one scale
+factor per vector) and runs blockwise dot products over the compact matrix.
+The top candidates can be re-scored in full float precision by the caller.
+"""
+
+import json
+import logging
+from collections.abc import Sequence
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+STORAGE_MODES = ("float32", "float16", "int8")
+
+# Rows converted to float32 at a time during search (bounds temporary memory)
+SEARCH_BLOCK_ROWS = 8192
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalizes rows (OpenAI vectors are already unit length, this is a safety net)"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def quantize(vectors: np.ndarray, mode: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Converts float vectors to the requested storage mode
+
+    Args:
+        vectors: (n, d) float matrix
+        mode: float32, float16 or int8
+
+    Returns:
+        Tuple (stored_vectors, scales). `scales` is only set for int8,
+        where vector ≈ stored_vector * scale.
+    """
+    if mode not in STORAGE_MODES:
+        raise ValueError(f"Unknown embedding storage mode '{mode}'. Use one of {STORAGE_MODES}")
+
+    vectors = normalize(vectors)
+
+    if mode == "float32":
+        return vectors, None
+    if mode == "float16":
+        return vectors.astype(np.float16), None
+
+    # int8: symmetric per-vector scaling to [-127, 127]
+    max_abs = np.abs(vectors).max(axis=1)
+    scales = np.where(max_abs > 0, max_abs / 127.0, 1.0).astype(np.float32)
+    quantized = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return quantized, scales
+
+
+def distance_from_dot(dot: float, space: str = "l2") -> float:
+    """
+    Converts a unit-vector dot product to the distance Chroma reports for `space`
+    (lower is more similar), so quantized and HNSW results share one scale
+    """
+    if space == "l2":
+        return max(0.0, 2.0 - 2.0 * dot)
+    return 1.0 - dot
+
+
+def dequantize(vectors: np.ndarray, scales: Optional[np.ndarray]) -> np.ndarray:
+    """Converts stored vectors back to float32"""
+    result = np.asarray(vectors, dtype=np.float32)
+    if scales is not None:
+        result = result * np.asarray(scales, dtype=np.float32)[:, None]
+    return result
+
+
+class QuantizedIndex:
+    """Brute-force dot product index over quantized, unit-normalized vectors"""
+
+    def __init__(
+        self,
+        ids: List[str],
+        vectors: np.ndarray,
+        scales: Optional[np.ndarray],
+        mode: str
+    ):
+        if len(ids) != len(vectors):
+            raise ValueError(f"ids ({len(ids)}) and vectors ({len(vectors)}) must align")
+        # Lazy sequences (e.g. memory-mapped artifact ids) are kept as they are
+        self.ids = ids if isinstance(ids, Sequence) else list(ids)
+        self.vectors = vectors
+        self.scales = scales
+        self.mode = mode
+
+    @classmethod
+    def from_float(cls, ids: List[str], embeddings, mode: str) -> "QuantizedIndex":
+        """Builds an index from full precision embeddings"""
+        vectors, scales = quantize(np.asarray(embeddings, dtype=np.float32), mode)
+        return cls(ids, vectors, scales, mode)
+
+    @property
+    def dimensions(self) -> int:
+        return int(self.vectors.shape[1]) if len(self.vectors) else 0
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the vectors (and scales)"""
+        total = self.vectors.nbytes
+        if self.scales is not None:
+            total += self.scales.nbytes
+        return int(total)
+
+    def scores(self, query: np.ndarray) -> np.ndarray:
+        """Approximate dot product between the query and every stored vector"""
+        query = normalize(np.asarray(query, dtype=np.float32))
+        result = np.empty(len(self.vectors), dtype=np.float32)
+
+        for start in range(0, len(self.vectors), SEARCH_BLOCK_ROWS):
+            block = self.vectors[start:start + SEARCH_BLOCK_ROWS]
+            result[start:start + len(block)] = block.astype(np.float32) @ query
+
+        if self.scales is not None:
+            result *= self.scales
+        return result
+
+    def search(self, query: np.ndarray, top_k: int = 5) -> List[Tuple[str, float]]:
+        """
+        Returns the top_k (id, dot_product) pairs, best first
+        """
+        if not self.ids:
+            return []
+
+        scores = self.scores(query)
+        k = min(top_k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.ids[i], float(scores[i])) for i in top]
+
+    def save(self, directory: str) -> None:
+        """Persists the index as raw .npy files (memory-mappable) plus ids"""
+        path = Path(directory)
+        path.mkdir(parents=True, exist_ok=True)
+
+        np.save(path / "vectors.npy", self.vectors)
+        if self.scales is not None:
+            np.save(path / "scales.npy", self.scales)
+        elif (path / "scales.npy").exists():
+            (path / "scales.npy").unlink()
+
+        with open(path / "index.json", "w", encoding="utf-8") as f:
+            json.dump({"mode": self.mode, "ids": self.ids}, f)
+
+        logger.info(
+            f"Quantized index saved: {path} ({len(self.ids)} vectors, {self.mode}, "
+            f"{self.nbytes / 1024:.0f} KiB)"
+        )
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = False) -> "QuantizedIndex":
+        """Loads an index written by save()"""
+        path = Path(directory)
+        with open(path / "index.json", encoding="utf-8") as f:
+            info = json.load(f)
+
+        mmap_mode = "r" if mmap else None
+        vectors = np.load(path / "vectors.npy", mmap_mode=mmap_mode)
+        scales = None
+        if (path / "scales.npy").exists():
+            scales = np.load(path / "scales.npy", mmap_mode=mmap_mode)
+
+        return cls(info["ids"], vectors, scales, info["mode"])
+
+
+def quantized_index_dir(collection_name: str) -> str:
+    """Directory holding the quantized copy of a collection"""
+    return str(Path(settings.chroma_persist_dir) / "quantized" / collection_name)
+
+
+def build_quantized_index(collection, mode: str, directory: str) -> QuantizedIndex:
+    """
+    Builds and saves a quantized index from every embedding in a Chroma collection
+
+    Args:
+        collection: chromadb Collection
+        mode: float32, float16 or int8
+        directory: Output directory
+
+    Returns:
+        QuantizedIndex
+    """
+    data = collection.get(include=["embeddings"])
+    index = QuantizedIndex.from_float(data["ids"], data["embeddings"], mode)
+    index.save(directory)
+    return index
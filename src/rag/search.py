@@ -1,20 +1,50 @@
 """
 RAG Searcher - Interface for semantic search in ChromaDB
 
-Provides semantic search with context formatting for LLM usage
+Provides semantic search with context formatting for LLM usage.
+Both a sync API (search/search_and_format) and a native async API
+(asearch/asearch_and_format) are available.
+
+Each search resolves the current collection version once (see store.py) and
+runs entirely against it, so a blue/green swap during a search is harmless.
+
+When `settings.rag_index_artifact` is set, searches are served from the
+memory-mapped index artifact (see artifact.py) and ChromaDB is not opened.
 """
 
-import chromadb
+import asyncio
+import threading
+import time
+from dataclasses import dataclass
 from typing import List, Dict, Optional
 import logging
-from langchain_openai import OpenAIEmbeddings
+import numpy as np
 from langchain_community.vectorstores import Chroma
 
 from src.config import settings
+from src.rag.artifact import IndexArtifact
+from src.rag.context_packer import pack_documents
+from src.rag.dedup import chunk_sources
+from src.rag.embeddings import create_embeddings
+from src.rag.quantization import (
+    QuantizedIndex,
+    build_quantized_index,
+    distance_from_dot,
+    quantized_index_dir,
+)
+from src.rag.store import current_collection_name, get_chroma_client
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class CollectionVersion:
+    """Handles for one physical collection version"""
+    name: str
+    vectorstore: Chroma
+    quantized_index: Optional[QuantizedIndex] = None
+
+
 class RAGSearcher:
     """Interface for searching documents in ChromaDB"""
     
@@ -23,19 +53,72 @@ class RAGSearcher:
         logger.info("Initializing RAGSearcher...")
         
         # Setup embeddings
-        self.embeddings = OpenAIEmbeddings(
-            model=settings.embedding_model,
-            openai_api_key=settings.openai_api_key
-        )
+        self.embeddings = create_embeddings()
+        
+        self._versions: Dict[str, CollectionVersion] = {}
+        self._versions_lock = threading.Lock()
+        self.artifact: Optional[IndexArtifact] = None
         
-        # Load vectorstore
-        self.vectorstore = Chroma(
-            collection_name="infinitepay_docs",
+        if settings.rag_index_artifact:
+            # Memory-mapped artifact: opening reads only the manifest
+            self.artifact = IndexArtifact(settings.rag_index_artifact)
+            self.artifact.check_compatible()
+            logger.info(f"Serving artifact '{self.artifact.version}' ({len(self.artifact)} chunks, mmap)")
+        else:
+            # Open the current collection version (reopened when the pointer moves)
+            self.current_version()
+        
+        logger.info("RAGSearcher ready")
+    
+    @property
+    def vectorstore(self) -> Chroma:
+        return self.current_version().vectorstore
+    
+    @property
+    def quantized_index(self) -> Optional[QuantizedIndex]:
+        return self.current_version().quantized_index
+    
+    def current_version(self) -> CollectionVersion:
+        """Handles for the collection the "current" pointer names right now"""
+        name = current_collection_name()
+        with self._versions_lock:
+            version = self._versions.get(name)
+            if version is None:
+                version = self._open_version(name)
+                # Searches already running keep their own reference to the old version
+                self._versions = {name: version}
+            return version
+    
+    def _open_version(self, name: str) -> CollectionVersion:
+        vectorstore = Chroma(
+            collection_name=name,
             embedding_function=self.embeddings,
-            persist_directory=settings.chroma_persist_dir
+            client=get_chroma_client()
         )
+        version = CollectionVersion(name=name, vectorstore=vectorstore)
         
-        logger.info("RAGSearcher ready")
+        # Optional compact (float16/int8) serving copy of the vectors
+        if settings.embedding_storage != "float32":
+            version.quantized_index = self._load_quantized_index(vectorstore, name)
+        
+        logger.info(f"Serving collection '{name}'")
+        return version
+    
+    def _load_quantized_index(self, vectorstore: Chroma, collection_name: str) -> QuantizedIndex:
+        """Loads the quantized index, rebuilding it if missing or stale"""
+        collection = vectorstore._collection
+        directory = quantized_index_dir(collection_name)
+        
+        try:
+            index = QuantizedIndex.load(directory)
+            if index.mode == settings.embedding_storage and len(index.ids) == collection.count():
+                logger.info(f"Quantized index loaded ({index.mode}, {index.nbytes / 1024:.0f} KiB)")
+                return index
+        except FileNotFoundError:
+            pass
+        
+        logger.info(f"Building {settings.embedding_storage} quantized index for '{collection_name}'...")
+        return build_quantized_index(collection, settings.embedding_storage, directory)
     
     def search(
         self, 
@@ -60,18 +143,89 @@ class RAGSearcher:
         """
         logger.debug(f"Searching: '{query}' (top_k={top_k})")
         
-        # Similarity search
-        if filter_by:
-            results = self.vectorstore.similarity_search_with_score(
-                query,
-                k=top_k,
-                filter=filter_by
-            )
-        else:
-            results = self.vectorstore.similarity_search_with_score(
-                query,
-                k=top_k
-            )
+        query_embedding = self.embeddings.embed_query(query)
+        formatted_results = self._search_by_vector(query_embedding, top_k, filter_by)
+        
+        logger.info(f"Found {len(formatted_results)} results")
+        return formatted_results
+    
+    async def asearch(
+        self,
+        query: str,
+        top_k: int = 5,
+        filter_by: Optional[Dict] = None
+    ) -> List[Dict]:
+        """
+        Async semantic search in ChromaDB
+        
+        The query embedding uses the async OpenAI client and the vector lookup
+        runs in a worker thread, so the event loop is never blocked.
+        
+        Args:
+            query: Query text
+            top_k: Number of results to return (default: 5)
+            filter_by: Metadata filters (optional)
+        
+        Returns:
+            Same structure as search()
+        """
+        logger.debug(f"Async searching: '{query}' (top_k={top_k})")
+        
+        query_embedding = await self.embeddings.aembed_query(query)
+        formatted_results = await asyncio.to_thread(
+            self._search_by_vector, query_embedding, top_k, filter_by
+        )
+        
+        logger.info(f"Found {len(formatted_results)} results")
+        return formatted_results
+    
+    async def warmup(self, queries: List[str]) -> Dict[str, float]:
+        """
+        Runs warmup queries so the HNSW index, embeddings client and
+        connection pools are loaded before the first real request
+        
+        Args:
+            queries: Warmup queries (the first one is timed cold and warm)
+        
+        Returns:
+            Dict with cold_query_ms and warm_query_ms for the first query
+        """
+        timings: Dict[str, float] = {}
+        if not queries:
+            return timings
+        
+        for i, query in enumerate(queries):
+            start = time.perf_counter()
+            await self.asearch(query)
+            if i == 0:
+                timings["cold_query_ms"] = (time.perf_counter() - start) * 1000
+        
+        start = time.perf_counter()
+        await self.asearch(queries[0])
+        timings["warm_query_ms"] = (time.perf_counter() - start) * 1000
+        return timings
+    
+    def _search_by_vector(
+        self,
+        query_embedding: List[float],
+        top_k: int,
+        filter_by: Optional[Dict] = None
+    ) -> List[Dict]:
+        """Runs the vector lookup for an already embedded query"""
+        if self.artifact is not None:
+            return self.artifact.search(query_embedding, top_k, filter_by)
+        
+        version = self.current_version()
+        
+        # Metadata filters are only supported by Chroma itself
+        if version.quantized_index is not None and not filter_by:
+            return self._search_quantized(version, query_embedding, top_k)
+        
+        results = version.vectorstore.similarity_search_by_vector_with_relevance_scores(
+            query_embedding,
+            k=top_k,
+            filter=filter_by
+        )
         
         # Format results
         formatted_results = []
@@ -82,13 +236,69 @@ class RAGSearcher:
                 'score': float(score)
             })
         
-        logger.info(f"Found {len(formatted_results)} results")
         return formatted_results
     
+    def _search_quantized(
+        self,
+        version: CollectionVersion,
+        query_embedding: List[float],
+        top_k: int
+    ) -> List[Dict]:
+        """
+        Quantized dot product search with optional float re-scoring
+        
+        The compact index selects candidates; if re-scoring is enabled, the
+        candidates' full precision vectors are fetched from Chroma (in the same
+        call that fetches their text) and ranked by exact similarity.
+        """
+        rescore = settings.quantized_rescore_candidates > 0
+        n_candidates = max(top_k, settings.quantized_rescore_candidates) if rescore else top_k
+        candidates = version.quantized_index.search(np.asarray(query_embedding), top_k=n_candidates)
+        if not candidates:
+            return []
+        
+        ids = [doc_id for doc_id, _ in candidates]
+        include = ["documents", "metadatas"] + (["embeddings"] if rescore else [])
+        collection = version.vectorstore._collection
+        data = collection.get(ids=ids, include=include)
+        
+        by_id = {}
+        for i, doc_id in enumerate(data["ids"]):
+            by_id[doc_id] = {
+                'content': data["documents"][i],
+                'metadata': data["metadatas"][i] or {},
+                'embedding': data["embeddings"][i] if rescore else None
+            }
+        
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+        space = (collection.metadata or {}).get("hnsw:space", "l2")
+        
+        formatted_results = []
+        for doc_id, approx_dot in candidates:
+            doc = by_id.get(doc_id)
+            if doc is None:
+                continue
+            dot = approx_dot
+            if rescore:
+                vector = np.asarray(doc['embedding'], dtype=np.float32)
+                dot = float(vector @ query / (np.linalg.norm(vector) or 1.0))
+            formatted_results.append({
+                'content': doc['content'],
+                'metadata': doc['metadata'],
+                'score': distance_from_dot(dot, space)
+            })
+        
+        formatted_results.sort(key=lambda r: r['score'])
+        return formatted_results[:top_k]
+    
     def format_context(self, documents: List[Dict], include_metadata: bool = True) -> str:
         """
         Formats documents as context for LLM
         
+        Duplicate and overlapping chunks are collapsed and the result is
+        limited to settings.rag_context_token_budget (see context_packer).
+        
         Args:
             documents: List of documents (search() result)
             include_metadata: If True, includes header and source
@@ -96,22 +306,45 @@ class RAGSearcher:
         Returns:
             Formatted string for context usage
         """
+        context, _ = self.pack_and_format(documents, include_metadata=include_metadata)
+        return context
+    
+    def pack_and_format(
+        self,
+        documents: List[Dict],
+        include_metadata: bool = True
+    ) -> tuple[str, Dict]:
+        """
+        Packs documents into the token budget and formats them
+        
+        Returns:
+            Tuple (formatted_context, packing_stats) where packing_stats holds
+            context_tokens, tokens_saved, duplicates_removed, etc.
+        """
         if not documents:
-            return "No relevant documents found."
+            return "No relevant documents found.", {}
         
-        context_parts = []
+        def render(i: int, doc: Dict) -> str:
+            return self._render_document(i, doc, include_metadata)
         
-        for i, doc in enumerate(documents, 1):
-            content = doc['content']
-            metadata = doc.get('metadata', {})
+        packed = pack_documents(documents, render)
+        context_parts = [render(i, doc) for i, doc in enumerate(packed.documents, 1)]
+        
+        return '\n'.join(context_parts), packed.stats()
+    
+    @staticmethod
+    def _render_document(i: int, doc: Dict, include_metadata: bool) -> str:
+        """Formats a single document block"""
+        content = doc['content']
+        metadata = doc.get('metadata', {})
+        
+        if include_metadata:
+            header = metadata.get('section', 'Untitled')
+            source = ', '.join(chunk_sources(metadata)) or 'Unknown source'
+            product = metadata.get('product', '')
             
-            if include_metadata:
-                header = metadata.get('section', 'Untitled')
-                source = metadata.get('source', 'Unknown source')
-                product = metadata.get('product', '')
-                
-                # Format each document
-                doc_text = f"""
+            # Format each document
+            return f"""
 [DOCUMENT {i}]
 Product: {product}
 Section: {header}
@@ -120,12 +353,7 @@ Source: {source}
 {content}
 ---
 """
-            else:
-                doc_text = f"\n[DOCUMENT {i}]\n{content}\n---\n"
-            
-            context_parts.append(doc_text)
-        
-        return '\n'.join(context_parts)
+        return f"\n[DOCUMENT {i}]\n{content}\n---\n"
     
     def search_and_format(
         self, 
@@ -147,4 +375,19 @@ Source: {source}
         documents = self.search(query, top_k=top_k)
         context = self.format_context(documents, include_metadata=include_metadata)
         return context, documents
-
+    
+    async def asearch_and_format(
+        self,
+        query: str,
+        top_k: int = 5,
+        include_metadata: bool = True
+    ) -> tuple[str, List[Dict]]:
+        """
+        Async version of search_and_format
+        
+        Returns:
+            Tuple (formatted_context, raw_documents)
+        """
+        documents = await self.asearch(query, top_k=top_k)
+        context = self.format_context(documents, include_metadata=include_metadata)
+        return context, documents
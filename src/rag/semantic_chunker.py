@@ -2,14 +2,16 @@
 Semantic Chunker - Parse HTML por seções para RAG de alta qualidade
 
 Estratégia:
-- Parse por headers H2/H3 (preserva contexto semântico)
+- Parse por headers H2/H3 (preserva contexto semântico), em uma passada sobre lxml
 - Chunks entre 300-2000 caracteres
 - Metadata enriquecida (produto, seção, pricing info)
 """
 
 import re
 from typing import List, Dict
-from bs4 import BeautifulSoup
+from bs4 import UnicodeDammit
+import lxml.html
+from lxml import etree
 import logging
 
 logger = logging.getLogger(__name__)
@@ -19,11 +21,26 @@ MIN_CHUNK_SIZE = 300
 MAX_CHUNK_SIZE = 2000
 OVERLAP_SIZE = 400
 
+# Elementos ignorados por completo (com todo o conteúdo)
+SKIP_TAGS = {'script', 'style', 'nav', 'footer', 'header'}
+
+# Headers que delimitam seções (H1 só encerra a seção anterior)
+BOUNDARY_TAGS = {'h1', 'h2', 'h3'}
+
+# Só texto dentro destes elementos entra no conteúdo da seção
+CONTENT_TAGS = {'p', 'div', 'li', 'ul', 'ol', 'span', 'a'}
+
 
 def parse_html_sections(html_content: bytes, source_url: str) -> List[Dict]:
     """
     Parse HTML em seções baseado em H2/H3 headers
     
+    Um único percurso em ordem de documento sobre a árvore lxml: cada nó de
+    texto é atribuído uma única vez à seção que o contém (o último H2/H3
+    aberto), desde que esteja dentro de um elemento de conteúdo (p, div, li,
+    ul, ol, span, a). H1 encerra a seção corrente. Custo linear no tamanho
+    da página, sem re-extrair texto de containers aninhados.
+    
     Args:
         html_content: Conteúdo HTML da página (bytes)
         source_url: URL de origem
@@ -37,63 +54,82 @@ def parse_html_sections(html_content: bytes, source_url: str) -> List[Dict]:
             'source': URL
         }
     """
-    soup = BeautifulSoup(html_content, 'lxml')
-    
-    # Remover elementos não relevantes
-    for element in soup(['script', 'style', 'nav', 'footer', 'header']):
-        element.decompose()
+    encoding = UnicodeDammit(html_content, is_html=True).original_encoding
+    parser = lxml.html.HTMLParser(encoding=encoding, remove_comments=True, remove_pis=True)
+    try:
+        root = lxml.html.document_fromstring(html_content, parser=parser)
+    except etree.ParserError:
+        logger.warning(f"HTML vazio ou invalido em {source_url}")
+        return []
     
     sections = []
+    current = None          # seção aberta: {'level', 'header_parts', 'parts'}
+    header_element = None   # H2/H3 cujo texto está sendo lido
+    skip_depth = 0          # profundidade dentro de script/style/nav/footer/header
+    content_depth = 0       # elementos de conteúdo abertos
     
-    # Encontrar todos headers H2 e H3
-    headers = soup.find_all(['h2', 'h3'])
-    
-    logger.debug(f"Encontrados {len(headers)} headers em {source_url}")
-    
-    for i, header in enumerate(headers):
-        header_text = header.get_text(strip=True)
+    def close_section():
+        if current is None:
+            return
+        header_text = ''.join(part.strip() for part in current['header_parts'])
         if not header_text:
-            continue
-        
-        # Coletar todo texto até o próximo header do mesmo nível ou superior
-        content_parts = [header_text]  # Incluir header no conteúdo
-        
-        # Determinar onde parar (próximo header)
-        next_header = None
-        if i < len(headers) - 1:
-            next_header = headers[i + 1]
-        
-        # Coletar elementos entre este header e o próximo
-        current = header.find_next()
-        while current:
-            # Se chegou no próximo header, para
-            if next_header and current == next_header:
-                break
-            
-            # Se é um header qualquer que apareceu antes do esperado, para
-            if hasattr(current, 'name') and current.name in ['h1', 'h2', 'h3'] and current != header:
-                break
-            
-            # Coletar texto de elementos de conteúdo
-            if hasattr(current, 'name') and current.name in ['p', 'div', 'li', 'ul', 'ol', 'span', 'a']:
-                text = current.get_text(strip=True, separator=' ')
-                if text and len(text) > 3:
-                    content_parts.append(text)
-            
-            current = current.find_next()
-        
-        # Limpar e juntar conteúdo
-        content = ' '.join(content_parts)
+            return
+        content = ' '.join([header_text] + current['parts'])
         content = re.sub(r'\s+', ' ', content).strip()
-        
         if len(content) >= 50:  # Mínimo viável
             sections.append({
                 'content': content,
                 'header': header_text,
-                'level': header.name,
+                'level': current['level'],
                 'source': source_url
             })
     
+    def add_text(text):
+        if not text or current is None:
+            return
+        if header_element is not None:
+            current['header_parts'].append(text)
+        elif content_depth and not text.isspace():
+            current['parts'].append(text)
+    
+    headers = 0
+    for event, element in etree.iterwalk(root, events=("start", "end")):
+        tag = element.tag
+        
+        if event == "start":
+            if skip_depth or tag in SKIP_TAGS:
+                skip_depth += 1
+                continue
+            
+            if tag in BOUNDARY_TAGS and header_element is None:
+                close_section()
+                if tag == 'h1':
+                    current = None
+                else:
+                    headers += 1
+                    current = {'level': tag, 'header_parts': [], 'parts': []}
+                    header_element = element
+            
+            if tag in CONTENT_TAGS:
+                content_depth += 1
+            add_text(element.text)
+        
+        else:
+            if skip_depth:
+                skip_depth -= 1
+                if skip_depth == 0:
+                    add_text(element.tail)
+                continue
+            
+            if tag in CONTENT_TAGS:
+                content_depth -= 1
+            if element is header_element:
+                header_element = None
+            add_text(element.tail)
+    
+    close_section()
+    
+    logger.debug(f"Encontrados {headers} headers em {source_url}")
     logger.info(f"Extraídas {len(sections)} seções de {source_url}")
     return sections
 
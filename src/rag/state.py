@@ -0,0 +1,257 @@
+"""
+Ingestion state - What was fetched and chunked on previous runs
+
+Stored in a small SQLite file (settings.ingest_state_path):
+- pages: ETag / Last-Modified / content hash per URL (for conditional GETs)
+- chunks: the chunks produced from each page, keyed by content-derived ID
+- frontier / page_links: crawler queue and outgoing links (crawl mode)
+
+This lets ingestion skip unchanged pages entirely (no parse, no embedding),
+and lets an interrupted crawl resume where it stopped.
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    content_hash TEXT NOT NULL,
+    fetched_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS chunks (
+    id TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    content TEXT NOT NULL,
+    metadata TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_chunks_url ON chunks(url, position);
+
+CREATE TABLE IF NOT EXISTS frontier (
+    seq INTEGER PRIMARY KEY,
+    url TEXT UNIQUE NOT NULL,
+    depth INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    error TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_frontier_status ON frontier(status, seq);
+
+CREATE TABLE IF NOT EXISTS page_links (
+    url TEXT NOT NULL,
+    target TEXT NOT NULL,
+    PRIMARY KEY (url, target)
+);
+"""
+
+# Frontier statuses: pending -> in_flight -> done | failed | blocked (robots) | skipped (not HTML)
+FRONTIER_OPEN = ('pending', 'in_flight')
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def chunk_id(source: str, content: str) -> str:
+    """Deterministic chunk ID: same page + same text -> same ID across runs"""
+    return hashlib.sha256(f"{source}\n{content}".encode("utf-8")).hexdigest()[:32]
+
+
+class IngestState:
+    """SQLite-backed record of fetched pages and their chunks"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or settings.ingest_state_path
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "IngestState":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def get_page(self, url: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM pages WHERE url = ?", (url,)).fetchone()
+        return dict(row) if row else None
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """If-None-Match / If-Modified-Since headers for a previously fetched URL"""
+        page = self.get_page(url)
+        headers = {}
+        if page and page["etag"]:
+            headers["If-None-Match"] = page["etag"]
+        if page and page["last_modified"]:
+            headers["If-Modified-Since"] = page["last_modified"]
+        return headers
+
+    def get_chunks(self, url: str) -> List[Dict]:
+        """Chunks stored for a URL, in page order"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, content, metadata FROM chunks WHERE url = ? ORDER BY position",
+                (url,)
+            ).fetchall()
+        return [
+            {"id": row["id"], "content": row["content"], "metadata": json.loads(row["metadata"])}
+            for row in rows
+        ]
+
+    def save_page(
+        self,
+        url: str,
+        page_hash: str,
+        chunks: List[Dict],
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> None:
+        """Replaces the stored validators and chunks of a URL"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT INTO pages (url, etag, last_modified, content_hash, fetched_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    etag = excluded.etag,
+                    last_modified = excluded.last_modified,
+                    content_hash = excluded.content_hash,
+                    fetched_at = excluded.fetched_at
+                """,
+                (url, etag, last_modified, page_hash, datetime.now().isoformat())
+            )
+            self._conn.execute("DELETE FROM chunks WHERE url = ?", (url,))
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO chunks (id, url, position, content, metadata) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (chunk["id"], url, position, chunk["content"], json.dumps(chunk["metadata"]))
+                    for position, chunk in enumerate(chunks)
+                ]
+            )
+
+    def touch_page(self, url: str) -> None:
+        """Records that a URL was re-validated (304) without changes"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE pages SET fetched_at = ? WHERE url = ?",
+                (datetime.now().isoformat(), url)
+            )
+
+    def clear(self) -> None:
+        """Forgets everything (full rebuild)"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM chunks")
+            self._conn.execute("DELETE FROM pages")
+            self._conn.execute("DELETE FROM frontier")
+            self._conn.execute("DELETE FROM page_links")
+
+    # Crawl frontier
+
+    def frontier_open(self) -> int:
+        """URLs still to crawl (an interrupted crawl leaves these behind)"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM frontier WHERE status IN (?, ?)", FRONTIER_OPEN
+            ).fetchone()[0]
+
+    def frontier_reset(self) -> None:
+        """Starts a new crawl (pages and chunks are kept for conditional GETs)"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM frontier")
+
+    def frontier_requeue(self) -> None:
+        """Puts URLs claimed by an interrupted crawl back in the queue"""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE frontier SET status = 'pending' WHERE status = 'in_flight'")
+
+    def frontier_add(self, urls: List[str], depth: int, max_size: Optional[int] = None) -> int:
+        """Queues new URLs (already known ones are ignored); returns how many were added"""
+        with self._lock, self._conn:
+            if max_size is not None:
+                size = self._conn.execute("SELECT COUNT(*) FROM frontier").fetchone()[0]
+                urls = urls[:max(0, max_size - size)]
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO frontier (url, depth) VALUES (?, ?)",
+                [(url, depth) for url in urls]
+            )
+            return self._conn.total_changes - before
+
+    def frontier_claim(self, limit: int) -> List[Dict]:
+        """Next pending URLs in discovery order, marked in_flight"""
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT url, depth FROM frontier WHERE status = 'pending' ORDER BY seq LIMIT ?",
+                (limit,)
+            ).fetchall()
+            self._conn.executemany(
+                "UPDATE frontier SET status = 'in_flight' WHERE url = ?",
+                [(row["url"],) for row in rows]
+            )
+        return [dict(row) for row in rows]
+
+    def frontier_mark(self, url: str, status: str, error: Optional[str] = None) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE frontier SET status = ?, error = ? WHERE url = ?",
+                (status, error, url)
+            )
+
+    def frontier_urls(self, status: str) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT url FROM frontier WHERE status = ? ORDER BY seq", (status,)
+            ).fetchall()
+        return [row["url"] for row in rows]
+
+    def crawl_manifest(self) -> Dict[str, int]:
+        """Crawled pages -> number of chunks stored for each (discovery order)"""
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT f.url, COUNT(c.id) AS chunks
+                FROM frontier f LEFT JOIN chunks c ON c.url = f.url
+                WHERE f.status = 'done'
+                GROUP BY f.url
+                ORDER BY f.seq
+                """
+            ).fetchall()
+        return {row["url"]: row["chunks"] for row in rows}
+
+    def get_links(self, url: str) -> List[str]:
+        """Outgoing links recorded for a page (used when it answers 304)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT target FROM page_links WHERE url = ?", (url,)
+            ).fetchall()
+        return [row["target"] for row in rows]
+
+    def save_links(self, url: str, links: List[str]) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM page_links WHERE url = ?", (url,))
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO page_links (url, target) VALUES (?, ?)",
+                [(url, target) for target in links]
+            )
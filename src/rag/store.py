@@ -0,0 +1,177 @@
+"""
+Vector store handle - One shared ChromaDB client per process
+
+Ingestion, validation and search all go through `get_chroma_client()`, so the
+persistence directory is opened once. The FastAPI lifespan opens the handle at
+startup and releases it at shutdown.
+
+Collections are versioned for zero-downtime re-indexing (blue/green):
+ingestion builds `infinitepay_docs__v<timestamp>`, validates it and then
+atomically replaces the "current" pointer file (`current_collection.json`
+in the persistence directory) that searches follow. Replaced versions are
+kept for a grace period so in-flight searches finish against the version
+they started on, then garbage-collected.
+"""
+
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import chromadb
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Logical collection name (also the pre-versioning physical name, used as fallback)
+COLLECTION_NAME = "infinitepay_docs"
+
+POINTER_FILE = "current_collection.json"
+
+_client: Optional[chromadb.ClientAPI] = None
+_client_lock = threading.Lock()
+_pointer_lock = threading.Lock()
+
+
+def get_chroma_client() -> chromadb.ClientAPI:
+    """Returns the shared persistent ChromaDB client, opening it on first use"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = chromadb.PersistentClient(path=settings.chroma_persist_dir)
+            logger.info(f"ChromaDB handle opened: {settings.chroma_persist_dir}")
+        return _client
+
+
+def close_chroma_client() -> None:
+    """Releases the shared client (called on application shutdown)"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            return
+        clear_cache = getattr(_client, "clear_system_cache", None)
+        if clear_cache:
+            clear_cache()
+        _client = None
+        logger.info("ChromaDB handle closed")
+
+
+def hnsw_collection_metadata() -> Dict:
+    """HNSW construction/search parameters from Settings, as Chroma collection metadata"""
+    return {
+        "hnsw:space": settings.hnsw_space,
+        "hnsw:M": settings.hnsw_m,
+        "hnsw:construction_ef": settings.hnsw_construction_ef,
+        "hnsw:search_ef": settings.hnsw_search_ef,
+    }
+
+
+def _pointer_path() -> Path:
+    return Path(settings.chroma_persist_dir) / POINTER_FILE
+
+
+def _read_pointer() -> Dict:
+    try:
+        with open(_pointer_path(), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"current": None, "retired": []}
+
+
+def _write_pointer(pointer: Dict) -> None:
+    """Writes the pointer atomically (temp file + os.replace)"""
+    path = _pointer_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".tmp{os.getpid()}")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(pointer, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def current_collection_name() -> str:
+    """Physical collection currently serving searches"""
+    return _read_pointer().get("current") or COLLECTION_NAME
+
+
+def new_collection_name() -> str:
+    """Name for a new collection version"""
+    return f"{COLLECTION_NAME}__v{time.time_ns() // 1_000_000}"
+
+
+def activate_collection(name: str) -> Optional[str]:
+    """
+    Atomically points searches at `name`
+
+    The previously current collection is marked as retired (deleted later by
+    `collect_retired_collections`, after the grace period).
+
+    Returns:
+        Name of the previously current collection (None if there was none)
+    """
+    with _pointer_lock:
+        pointer = _read_pointer()
+        previous = pointer.get("current")
+        if previous == name:
+            return previous
+
+        retired = [r for r in pointer.get("retired", []) if r["name"] != name]
+        if previous is None and _collection_exists(COLLECTION_NAME):
+            previous = COLLECTION_NAME
+        if previous:
+            retired.append({"name": previous, "retired_at": time.time()})
+
+        _write_pointer({"current": name, "activated_at": time.time(), "retired": retired})
+
+    logger.info(f"[OK] Collection ativa: {name} (anterior: {previous or '-'})")
+    return previous
+
+
+def collect_retired_collections(grace_seconds: Optional[float] = None) -> List[str]:
+    """
+    Deletes retired collection versions older than the grace period
+
+    Args:
+        grace_seconds: Minimum age after retirement (default: settings.rag_collection_grace_seconds)
+
+    Returns:
+        Names of the deleted collections
+    """
+    grace = settings.rag_collection_grace_seconds if grace_seconds is None else grace_seconds
+    now = time.time()
+    deleted = []
+
+    with _pointer_lock:
+        pointer = _read_pointer()
+        keep = []
+        for retired in pointer.get("retired", []):
+            if now - retired["retired_at"] < grace or retired["name"] == pointer.get("current"):
+                keep.append(retired)
+                continue
+            try:
+                get_chroma_client().delete_collection(retired["name"])
+            except Exception as e:
+                logger.warning(f"Collection {retired['name']} nao removida: {e}")
+            shutil.rmtree(Path(settings.chroma_persist_dir) / "quantized" / retired["name"], ignore_errors=True)
+            deleted.append(retired["name"])
+
+        if deleted:
+            pointer["retired"] = keep
+            _write_pointer(pointer)
+            logger.info(f"[OK] Versoes antigas removidas: {', '.join(deleted)}")
+
+    return deleted
+
+
+def _collection_exists(name: str) -> bool:
+    try:
+        get_chroma_client().get_collection(name)
+        return True
+    except Exception:
+        return False
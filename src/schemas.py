@@ -1,6 +1,6 @@
 """Pydantic Models para validação de API"""
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import List, Literal, Optional
 
 
 class ChatRequest(BaseModel):
@@ -81,3 +81,48 @@ class UserResponse(BaseModel):
     }
 
 
+
+
+class BulkUserCreateRequest(BaseModel):
+    """Request for creating many users at once (POST /users/bulk)"""
+    users: List[UserCreateRequest] = Field(..., description="Users to create", min_length=1)
+    
+    model_config = {
+        "json_schema_extra": {
+            "examples": [{
+                "users": [
+                    {"name": "João Silva", "user_id": "joao_silva_123"},
+                    {"name": "Maria Souza"}
+                ]
+            }]
+        }
+    }
+
+
+class BulkUserResult(BaseModel):
+    """Outcome of one item of a bulk creation, in request order"""
+    user_id: str = Field(..., description="User identifier (generated if not provided)")
+    name: str = Field(..., description="User's name")
+    status: Literal["created", "duplicate"] = Field(..., description="Created now or not created")
+    reason: Optional[str] = Field(None, description="Why a duplicate: 'already exists' or 'repeated in request'")
+
+
+class BulkUserResponse(BaseModel):
+    """Response of POST /users/bulk (JSON mode)"""
+    created: int = Field(..., description="Users created")
+    duplicates: int = Field(..., description="Items not created (existing or repeated user_id)")
+    results: List[BulkUserResult] = Field(..., description="One result per requested user, in order")
+    
+    model_config = {
+        "json_schema_extra": {
+            "examples": [{
+                "created": 1,
+                "duplicates": 1,
+                "results": [
+                    {"user_id": "joao_silva_123", "name": "João Silva", "status": "duplicate",
+                     "reason": "already exists"},
+                    {"user_id": "5f0c2a9e1b7d", "name": "Maria Souza", "status": "created", "reason": None}
+                ]
+            }]
+        }
+    }
@@ -1,22 +1,49 @@
 from crewai.tools import BaseTool
 from src.rag.search import RAGSearcher
+import asyncio
 import logging
-from typing import Any, Type
+import threading
+import time
+from typing import Any, Dict, List, Type
 from pydantic import BaseModel, Field
 
 logger = logging.getLogger(__name__)
 
 # Global searcher instance
 _searcher = None
+_searcher_lock = threading.Lock()
 
 def get_rag_searcher():
-    """Lazy initialization of RAGSearcher"""
-    # ... (same)
+    """Lazy initialization of RAGSearcher (eagerly warmed at startup)"""
     global _searcher
-    if _searcher is None:
-        _searcher = RAGSearcher()
-        logger.info("RAG Searcher initialized")
-    return _searcher
+    with _searcher_lock:
+        if _searcher is None:
+            _searcher = RAGSearcher()
+            logger.info("RAG Searcher initialized")
+        return _searcher
+
+def reset_rag_searcher():
+    """Drops the global searcher (called on shutdown, before closing the vector store)"""
+    global _searcher
+    with _searcher_lock:
+        _searcher = None
+
+async def warmup_rag_searcher(queries: List[str]) -> Dict[str, float]:
+    """
+    Builds the global searcher and runs warmup queries before readiness.
+    Logs init time plus cold vs warm latency of the first query.
+    """
+    start = time.perf_counter()
+    searcher = await asyncio.to_thread(get_rag_searcher)
+    timings = {"init_ms": (time.perf_counter() - start) * 1000}
+    timings.update(await searcher.warmup(queries))
+    
+    logger.info(
+        f"[OK] RAG warm: init {timings['init_ms']:.0f}ms | "
+        f"first query cold {timings.get('cold_query_ms', 0):.0f}ms -> "
+        f"warm {timings.get('warm_query_ms', 0):.0f}ms"
+    )
+    return timings
 
 class RagToolInput(BaseModel):
     query: str = Field(..., description="The search query. This is the ONLY accepted argument.")
@@ -33,28 +60,43 @@ class RagTool(BaseTool):
         logger.info(f"RAG Tool executing search: '{query}'")
         try:
             searcher = get_rag_searcher()
-            context, documents = searcher.search_and_format(
-                query=query,
-                top_k=5,
-                include_metadata=True
-            )
-            sources = set([doc['metadata'].get('source', 'unknown') for doc in documents])
-            from src.utils.debug_tracker import log_tool_usage
-            
-            logger.info(f"RAG Tool returned {len(documents)} documents from {len(sources)} URLs")
-            
-            log_tool_usage(
-                tool_name="RAG (InfinitePay)",
-                input_str=query,
-                output_str=f"Found {len(documents)} docs. Sources: {list(sources)}",
-                metadata={"docs_count": len(documents), "sources": list(sources)}
-            )
-            
+            documents = searcher.search(query, top_k=5)
+            context, pack_stats = searcher.pack_and_format(documents, include_metadata=True)
+            self._log_results(query, documents, pack_stats)
             return context
         except Exception as e:
             logger.error(f"Error executing RAG search: {e}", exc_info=True)
             return f"Error searching information: {str(e)}"
 
+    async def _arun(self, query: str) -> str:
+        logger.info(f"RAG Tool executing async search: '{query}'")
+        try:
+            searcher = get_rag_searcher()
+            documents = await searcher.asearch(query, top_k=5)
+            context, pack_stats = searcher.pack_and_format(documents, include_metadata=True)
+            self._log_results(query, documents, pack_stats)
+            return context
+        except Exception as e:
+            logger.error(f"Error executing async RAG search: {e}", exc_info=True)
+            return f"Error searching information: {str(e)}"
+
+    def _log_results(self, query: str, documents: list, pack_stats: dict) -> None:
+        sources = set([doc['metadata'].get('source', 'unknown') for doc in documents])
+        from src.utils.debug_tracker import log_tool_usage
+        
+        logger.info(
+            f"RAG Tool returned {len(documents)} documents from {len(sources)} URLs "
+            f"({pack_stats.get('context_tokens', 0)} context tokens, "
+            f"{pack_stats.get('tokens_saved', 0)} saved by packing)"
+        )
+        
+        log_tool_usage(
+            tool_name="RAG (InfinitePay)",
+            input_str=query,
+            output_str=f"Found {len(documents)} docs. Sources: {list(sources)}",
+            metadata={"docs_count": len(documents), "sources": list(sources), **pack_stats}
+        )
+
 # Instantiate for import
 rag_search_tool = RagTool()
 
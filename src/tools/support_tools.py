@@ -3,9 +3,104 @@ Customer Support Tools
 Exposes database functions as CrewAI tools.
 """
 
+import json
+from datetime import date, datetime, timedelta
+from typing import Optional, Tuple
+
 from crewai.tools import tool
 from src.db.client import db_client
-from src.utils.session_manager import session_manager
+
+
+def _format_user(user: dict) -> str:
+    status_info = f"Status: {user['account_status'].upper()}"
+    if user['account_status'] == 'blocked':
+        status_info += f" (Reason: {user.get('block_reason')})"
+        
+    return f"""
+    User Info:
+    - Name: {user['name']}
+    - Balance: R$ {user['balance']:.2f}
+    - {status_info}
+    """
+
+
+def _format_transactions(txs: list) -> str:
+    if not txs:
+        return "No recent transactions found."
+    
+    tx_list = []
+    for tx in txs:
+        tx_str = f"- [{tx['created_at']}] {tx['type'].upper()}: R$ {tx['amount']:.2f} ({tx['status']})"
+        
+        if tx['status'] == 'failed':
+            reason = tx.get('failure_reason', 'Unknown')
+            tx_str += f" | Reason: {reason}"
+            
+        counterparty = tx.get('counterparty')
+        if counterparty:
+            tx_str += f" | To/From: {counterparty}"
+            
+        tx_list.append(tx_str)
+    return "\n".join(tx_list)
+
+
+def _format_cards(cards: list) -> str:
+    if not cards:
+        return "No cards registered for this user."
+    
+    card_list = []
+    for card in cards:
+        card_str = (
+            f"- Card *{card['last_4']} ({card['status'].upper()})\n"
+            f"  Limit: R$ {card['limit_amount']:.2f}\n"
+            f"  Used: R$ {card['used_amount']:.2f}\n"
+            f"  Available: R$ {card['limit_amount'] - card['used_amount']:.2f}"
+        )
+        card_list.append(card_str)
+    return "\n".join(card_list)
+
+
+PERIODS = ("today", "7d", "30d", "90d", "this_week", "this_month", "last_month", "this_year", "all")
+
+
+def _period_window(period: str, now: Optional[datetime] = None) -> Tuple[Optional[str], Optional[str]]:
+    """
+    [start, end) ISO bounds for a named period or 'YYYY-MM-DD:YYYY-MM-DD'
+    (both days included); None means open-ended
+
+    Raises:
+        ValueError: Unknown period or malformed dates
+    """
+    now = now or datetime.now()
+    today = now.date()
+    period = (period or "30d").strip().lower()
+
+    if ":" in period:
+        first, last = (date.fromisoformat(part.strip()) for part in period.split(":", 1))
+        return first.isoformat(), (last + timedelta(days=1)).isoformat()
+    if period == "all":
+        return None, None
+    if period == "today":
+        start = today
+    elif period.endswith("d") and period[:-1].isdigit():
+        return (now - timedelta(days=int(period[:-1]))).isoformat(), None
+    elif period == "this_week":
+        start = today - timedelta(days=today.weekday())
+    elif period == "this_month":
+        start = today.replace(day=1)
+    elif period == "last_month":
+        end = today.replace(day=1)
+        return (end - timedelta(days=1)).replace(day=1).isoformat(), end.isoformat()
+    elif period == "this_year":
+        start = today.replace(month=1, day=1)
+    else:
+        raise ValueError(f"unknown period '{period}'")
+    return start.isoformat(), None
+
+
+def _split_filter(value: str) -> list:
+    return [item.strip().lower() for item in (value or "").split(",") if item.strip()]
+
 
 @tool("get_user_info")
 def get_user_info_tool(user_id: str) -> str:
@@ -22,23 +117,7 @@ def get_user_info_tool(user_id: str) -> str:
     if not user:
         return f"User ID '{user_id}' not found in the system."
     
-    # Cache user data in session for future requests
-    session_manager.update_session(user_id, {
-        "name": user['name'],
-        "balance": user['balance'],
-        "account_status": user['account_status']
-    })
-    
-    status_info = f"Status: {user['account_status'].upper()}"
-    if user['account_status'] == 'blocked':
-        status_info += f" (Reason: {user['block_reason']})"
-        
-    result = f"""
-    User Info:
-    - Name: {user['name']}
-    - Balance: R$ {user['balance']:.2f}
-    - {status_info}
-    """
+    result = _format_user(user)
     
     from src.utils.debug_tracker import log_tool_usage
     log_tool_usage(
@@ -63,24 +142,7 @@ def get_user_transactions_tool(user_id: str) -> str:
         List of last 5 transactions with status and details.
     """
     txs = db_client.get_transactions(user_id)
-    
-    if not txs:
-        result = "No recent transactions found."
-    else:
-        tx_list = []
-        for tx in txs:
-            tx_str = f"- [{tx['created_at']}] {tx['type'].upper()}: R$ {tx['amount']:.2f} ({tx['status']})"
-            
-            if tx['status'] == 'failed':
-                reason = tx.get('failure_reason', 'Unknown')
-                tx_str += f" | Reason: {reason}"
-                
-            counterparty = tx.get('counterparty')
-            if counterparty:
-                tx_str += f" | To/From: {counterparty}"
-                
-            tx_list.append(tx_str)
-        result = "\n".join(tx_list)
+    result = _format_transactions(txs)
 
     from src.utils.debug_tracker import log_tool_usage
     log_tool_usage(
@@ -105,20 +167,7 @@ def get_user_cards_tool(user_id: str) -> str:
         List of cards with limits and status.
     """
     cards = db_client.get_cards(user_id)
-    
-    if not cards:
-        result = "No cards registered for this user."
-    else:
-        card_list = []
-        for card in cards:
-            card_str = (
-                f"- Card *{card['last_4']} ({card['status'].upper()})\n"
-                f"  Limit: R$ {card['limit_amount']:.2f}\n"
-                f"  Used: R$ {card['used_amount']:.2f}\n"
-                f"  Available: R$ {card['limit_amount'] - card['used_amount']:.2f}"
-            )
-            card_list.append(card_str)
-        result = "\n".join(card_list)
+    result = _format_cards(cards)
 
     from src.utils.debug_tracker import log_tool_usage
     log_tool_usage(
@@ -129,3 +178,144 @@ def get_user_cards_tool(user_id: str) -> str:
     )
         
     return result
+
+@tool("get_account_snapshot")
+def get_account_snapshot_tool(user_id: str) -> str:
+    """
+    Get everything about the customer's account in ONE call:
+    personal info and account status, recent transactions and cards.
+    Prefer this over calling the separate user/transactions/cards tools.
+    
+    Args:
+        user_id: The customer ID.
+        
+    Returns:
+        User info (name, balance, status, block reason), last 5 transactions
+        (with failure reasons) and cards (limits and status).
+    """
+    snapshot = db_client.get_user_snapshot(user_id)
+    if not snapshot:
+        return f"User ID '{user_id}' not found in the system."
+    
+    result = (
+        f"{_format_user(snapshot['user'])}\n"
+        f"Recent Transactions:\n{_format_transactions(snapshot['transactions'])}\n\n"
+        f"Cards:\n{_format_cards(snapshot['cards'])}"
+    )
+
+    from src.utils.debug_tracker import log_tool_usage
+    log_tool_usage(
+        tool_name="DB: Get Account Snapshot",
+        input_str=user_id,
+        output_str=result,
+        metadata={
+            "user_found": True,
+            "status": snapshot['user']['account_status'],
+            "transactions": len(snapshot['transactions']),
+            "cards": len(snapshot['cards'])
+        }
+    )
+    
+    return result
+
+@tool("get_transaction_summary")
+def get_transaction_summary_tool(user_id: str, period: str = "30d", transaction_type: str = "", status: str = "") -> str:
+    """
+    Get EXACT totals of the user's transactions, computed by the database.
+    Use it for "how much did I sell this week?", "how many Pix transfers
+    failed this month?", "quanto recebi em janeiro?". Never add up
+    transactions yourself.
+    
+    Args:
+        user_id: The customer ID.
+        period: today, 7d, 30d, 90d (any Nd), this_week, this_month,
+            last_month, this_year, all, or a date range
+            'YYYY-MM-DD:YYYY-MM-DD' (both days included). Default: 30d.
+        transaction_type: Optional comma-separated types: pix_in, pix_out,
+            card_sale, payout, transfer, credit...
+        status: Optional comma-separated statuses: completed, failed, pending.
+        
+    Returns:
+        Compact JSON: total count/amount, count/amount per type and status,
+        and failure reasons with counts.
+    """
+    try:
+        start, end = _period_window(period)
+    except ValueError as e:
+        return f"Invalid period ({e}). Use one of: {', '.join(PERIODS)} or 'YYYY-MM-DD:YYYY-MM-DD'."
+    
+    types, statuses = _split_filter(transaction_type), _split_filter(status)
+    summary = db_client.get_transaction_summary(user_id, start, end, types, statuses)
+    if summary is None:
+        return "Transaction summary unavailable (database error)."
+    
+    result = json.dumps({
+        "user_id": user_id,
+        "period": period,
+        "from": start,
+        "to": end,
+        "filters": {"type": types, "status": statuses},
+        "total": {"count": summary["count"], "amount": summary["amount"]},
+        "by_type_status": [
+            {key: group[key] for key in ("type", "status", "count", "amount")}
+            for group in summary["groups"]
+        ],
+        "failures": summary["failures"],
+    }, ensure_ascii=False, separators=(",", ":"))
+
+    from src.utils.debug_tracker import log_tool_usage
+    log_tool_usage(
+        tool_name="DB: Transaction Summary",
+        input_str=f"{user_id} period={period} type={transaction_type} status={status}",
+        output_str=result,
+        metadata={"count": summary["count"], "groups": len(summary["groups"])}
+    )
+    
+    return result
+
+@tool("search_transactions")
+def search_transactions_tool(user_id: str, query: str, cursor: str = "") -> str:
+    """
+    Search ALL of the user's transactions by counterparty or failure reason,
+    best matches first. Use it for "what happened to my payment to
+    Fornecedor ABC?" or "transfers that failed for insufficient funds".
+    
+    Args:
+        user_id: The customer ID.
+        query: Only the name or reason to look for (e.g. "Fornecedor ABC",
+            "insufficient funds"), not the whole question.
+        cursor: To see more results, the cursor returned by the previous call.
+        
+    Returns:
+        Matching transactions with status and details, and a cursor if
+        there are more.
+    """
+    mode, _, page = cursor.partition(":") if cursor else ("all", "", "")
+    match_all = mode != "any"
+    try:
+        found = db_client.search_transactions(user_id, query, cursor=page or None, match_all=match_all)
+        # No transaction matches every word: rank those matching any of them
+        if found is not None and not found["results"] and match_all and not page:
+            match_all = False
+            found = db_client.search_transactions(user_id, query, match_all=False)
+    except ValueError:
+        return "Invalid cursor: repeat the search without a cursor."
+    if found is None:
+        return "Transaction search unavailable (database error)."
+    
+    if not found["results"]:
+        result = f"No transactions matching '{query}'."
+    else:
+        result = _format_transactions(found["results"])
+        if found["next_cursor"]:
+            result += f"\nMore results: call again with cursor='{'all' if match_all else 'any'}:{found['next_cursor']}'"
+
+    from src.utils.debug_tracker import log_tool_usage
+    log_tool_usage(
+        tool_name="DB: Search Transactions",
+        input_str=f"{user_id} query={query} cursor={cursor}",
+        output_str=result,
+        metadata={"count": len(found["results"]), "match_all": match_all}
+    )
+    
+    return result
@@ -69,3 +69,57 @@ class TestChatEndpoint:
         assert "agent_used" in data
         assert "sources" in data
         assert isinstance(data["sources"], list)
+
+
+class TestBulkUsersEndpoint:
+    """Tests for POST /users/bulk (against a temporary database)."""
+
+    @pytest.fixture
+    def client(self, tmp_path, monkeypatch):
+        import sqlite3
+        import src.db.client as db_module
+        from scripts.seed_db import create_tables
+        from src.db.client import DatabaseClient
+        from src.main import app
+
+        db_path = str(tmp_path / "customers.db")
+        conn = sqlite3.connect(db_path)
+        create_tables(conn)
+        conn.close()
+        db_client = DatabaseClient(db_path, pool_size=2)
+        db_client.create_user("existing", "Existing")
+        monkeypatch.setattr(db_module, "db_client", db_client)
+        yield TestClient(app)
+        db_client.close()
+
+    def test_reports_each_item_in_order(self, client):
+        """Created, existing and repeated users are reported per item; ids are generated if missing."""
+        users = [{"user_id": "new", "name": "New"}, {"user_id": "existing", "name": "Again"},
+                 {"user_id": "new", "name": "Twice"}, {"name": "No Id"}]
+
+        response = client.post("/users/bulk", json={"users": users})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert (data["created"], data["duplicates"]) == (2, 2)
+        assert [(r["status"], r["reason"]) for r in data["results"]] == [
+            ("created", None), ("duplicate", "already exists"), ("duplicate", "repeated in request"),
+            ("created", None),
+        ]
+        assert data["results"][3]["user_id"] and data["results"][3]["name"] == "No Id"
+        assert client.post("/users/bulk", json={"users": []}).status_code == 422
+
+    def test_streams_ndjson(self, client, monkeypatch):
+        """Accept: application/x-ndjson streams one result per line; oversized requests are rejected."""
+        import json
+        from src.config import settings
+
+        users = [{"user_id": f"u{n}", "name": f"User {n}"} for n in range(2500)] + [{"user_id": "u0", "name": "X"}]
+        response = client.post("/users/bulk", json={"users": users}, headers={"Accept": "application/x-ndjson"})
+
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        assert (response.headers["x-users-created"], response.headers["x-users-duplicates"]) == ("2500", "1")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert len(lines) == 2501 and lines[-1]["reason"] == "repeated in request"
+        monkeypatch.setattr(settings, "users_bulk_max_items", 10)
+        assert client.post("/users/bulk", json={"users": users}).status_code == 413
@@ -73,3 +73,482 @@ class TestSupportTools:
         result = get_user_info_tool.run("nonexistent_user_xyz")
         
         assert "not found" in result.lower() or "não encontrado" in result.lower()
+
+
+@pytest.fixture
+def pooled_client(tmp_path):
+    """DatabaseClient over a fresh temp database (migrated schema)."""
+    import sqlite3
+    from scripts.seed_db import create_tables
+    from src.db.client import DatabaseClient
+
+    db_path = str(tmp_path / "customers.db")
+    conn = sqlite3.connect(db_path)
+    create_tables(conn)
+    conn.close()
+    client = DatabaseClient(db_path, pool_size=4)
+    yield client
+    client.close()
+
+
+class TestConnectionPool:
+    """Tests for the pooled, WAL-mode database access layer."""
+
+    def test_connections_are_tuned_and_reused(self, pooled_client):
+        """Pooled connections run in WAL mode with a busy timeout and are reused."""
+        for _ in range(10):
+            with pooled_client.connection() as conn:
+                journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+                busy_timeout = conn.execute("PRAGMA busy_timeout").fetchone()[0]
+
+        assert journal_mode == "wal"
+        assert busy_timeout > 0
+        assert pooled_client.pool.opened == 1
+
+    def test_parallel_reads_and_writes(self, pooled_client):
+        """Concurrent create_user/get_user calls neither fail nor exceed the pool size."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        def create_and_read(n):
+            created = pooled_client.create_user(f"user_{n}", f"User {n}")
+            return created is not None and pooled_client.get_user(f"user_{n}")["name"] == f"User {n}"
+
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            results = list(executor.map(create_and_read, range(200)))
+
+        assert all(results)
+        assert pooled_client.create_user("user_0", "Duplicate") is None
+        assert pooled_client.pool.opened <= 4
+
+    def test_user_snapshot_in_one_read(self, pooled_client):
+        """get_user_snapshot returns user, recent transactions and cards together."""
+        pooled_client.create_user("snap", "Snap User")
+        with pooled_client.connection() as conn, conn:
+            conn.execute("INSERT INTO cards VALUES ('c1', 'snap', '4242', 'active', 100.0, 10.0)")
+            conn.executemany(
+                "INSERT INTO transactions (transaction_id, user_id, amount, type, status, created_at) "
+                "VALUES (?, 'snap', 1.0, 'pix', 'completed', ?)",
+                [(f"t{i}", f"2024-01-{i + 1:02d}") for i in range(8)]
+            )
+
+        snapshot = pooled_client.get_user_snapshot("snap")
+
+        assert snapshot["user"]["name"] == "Snap User"
+        assert [tx["transaction_id"] for tx in snapshot["transactions"]] == ["t7", "t6", "t5", "t4", "t3"]
+        assert [card["last_4"] for card in snapshot["cards"]] == ["4242"]
+        assert pooled_client.get_user_snapshot("missing") is None
+
+
+class TestMigrations:
+    """Tests for the versioned schema migrations."""
+
+    def test_legacy_init_db_schema_is_reconciled(self, tmp_path):
+        """An init_db-era database (transactions.id, no email/plan) is migrated in place."""
+        import sqlite3
+        from src.db.migrations import LATEST_VERSION, migrate
+
+        conn = sqlite3.connect(tmp_path / "legacy.db")
+        conn.execute("CREATE TABLE users (user_id TEXT PRIMARY KEY, name TEXT NOT NULL, balance REAL, "
+                     "account_status TEXT, block_reason TEXT)")
+        conn.execute("CREATE TABLE transactions (id TEXT PRIMARY KEY, user_id TEXT, type TEXT, amount REAL, "
+                     "status TEXT, failure_reason TEXT, created_at DATETIME, counterparty TEXT)")
+        conn.execute("INSERT INTO users VALUES ('u1', 'Legacy', 10.0, 'blocked', 'Fraud')")
+        conn.execute("INSERT INTO transactions VALUES ('t1', 'u1', 'pix_out', 5.0, 'failed', 'Blocked', "
+                     "'2024-01-01', 'Shop')")
+        conn.commit()
+
+        assert migrate(conn) == LATEST_VERSION
+        conn.row_factory = sqlite3.Row
+        user = dict(conn.execute("SELECT * FROM users").fetchone())
+        transaction = dict(conn.execute("SELECT * FROM transactions").fetchone())
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+        assert transaction["transaction_id"] == "t1" and "id" not in transaction
+        assert user["block_reason"] == "Fraud" and user["plan"] == "basic" and user["created_at"]
+        assert "cards" in tables
+        # A second run is a no-op
+        assert migrate(conn) == LATEST_VERSION
+
+    def test_recent_transactions_use_index(self, pooled_client):
+        """The support lookups are index searches, without a table scan or a temp sort."""
+        from src.db.client import CARDS_SQL, TRANSACTIONS_SQL
+
+        with pooled_client.connection() as conn:
+            plans = [
+                " | ".join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+                for sql, params in ((TRANSACTIONS_SQL, ("u1", 5)), (CARDS_SQL, ("u1",)))
+            ]
+
+        assert "USING INDEX idx_transactions_user_activity" in plans[0]
+        assert "USING INDEX idx_cards_user" in plans[1]
+        assert not any("SCAN" in plan or "TEMP B-TREE" in plan for plan in plans)
+
+
+class TestCustomerGenerator:
+    """Tests for the synthetic load-test data generator."""
+
+    def test_seeded_generation_is_reproducible(self, tmp_path):
+        """Same seed and reference date produce identical, consistent databases."""
+        import sqlite3
+        from datetime import date
+        from scripts.generate_customers import generate
+
+        dumps = []
+        for name in ("a.db", "b.db"):
+            result = generate(str(tmp_path / name), users=500, seed=7, batch_size=200, as_of=date(2025, 1, 1))
+            conn = sqlite3.connect(tmp_path / name)
+            dumps.append(list(conn.iterdump()))
+            orphans = conn.execute(
+                "SELECT COUNT(*) FROM transactions t LEFT JOIN users u USING (user_id) WHERE u.user_id IS NULL"
+            ).fetchone()[0]
+            indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+            conn.close()
+
+        assert result["users"] == 500 and result["transactions"] > 0
+        assert orphans == 0
+        assert {"idx_transactions_user_activity", "idx_cards_user"} <= indexes
+        assert dumps[0] == dumps[1]
+
+
+class TestTransactionSummary:
+    """Tests for SQL-side transaction aggregates and the summary tool's periods."""
+
+    def test_window_aggregates_are_exact(self, pooled_client):
+        """Sums, counts and failure reasons respect the window and the filters."""
+        pooled_client.create_user("merchant", "Merchant")
+        rows = [
+            ("t1", "card_sale", 100.10, "completed", None, "2024-03-01T10:00:00"),
+            ("t2", "card_sale", 200.20, "completed", None, "2024-03-05T10:00:00"),
+            ("t3", "pix_out", 50.00, "failed", "Insufficient funds", "2024-03-06T10:00:00"),
+            ("t4", "pix_out", 70.00, "failed", "Insufficient funds", "2024-03-07T10:00:00"),
+            ("t5", "pix_out", 30.00, "failed", None, "2024-03-08T10:00:00"),
+            ("t6", "card_sale", 999.00, "completed", None, "2024-02-28T23:59:59"),
+        ]
+        with pooled_client.connection() as conn, conn:
+            conn.executemany(
+                "INSERT INTO transactions (transaction_id, user_id, type, amount, status, failure_reason, created_at) "
+                "VALUES (?, 'merchant', ?, ?, ?, ?, ?)", rows
+            )
+
+        march = pooled_client.get_transaction_summary("merchant", "2024-03-01", "2024-04-01")
+        sales = pooled_client.get_transaction_summary("merchant", "2024-03-01", "2024-04-01", types=["card_sale"])
+
+        assert march["count"] == 5 and march["amount"] == 450.30
+        assert {(g["type"], g["status"]): (g["count"], g["amount"]) for g in march["groups"]} == {
+            ("card_sale", "completed"): (2, 300.30),
+            ("pix_out", "failed"): (3, 150.00),
+        }
+        assert [(f["reason"], f["count"]) for f in march["failures"]] == [("Insufficient funds", 2), ("Unknown", 1)]
+        assert sales["count"] == 2 and sales["failures"] == []
+
+    def test_period_windows(self):
+        """Named periods and explicit ranges resolve to [start, end) bounds."""
+        from datetime import datetime
+        from src.tools.support_tools import _period_window
+
+        now = datetime(2024, 3, 14, 15, 30)   # a Thursday
+
+        assert _period_window("this_week", now) == ("2024-03-11", None)
+        assert _period_window("last_month", now) == ("2024-02-01", "2024-03-01")
+        assert _period_window("7d", now) == ("2024-03-07T15:30:00", None)
+        assert _period_window("2024-01-01:2024-01-31", now) == ("2024-01-01", "2024-02-01")
+        assert _period_window("all", now) == (None, None)
+        with pytest.raises(ValueError):
+            _period_window("forever", now)
+
+
+class TestTransactionSearch:
+    """Tests for the FTS5 transaction search."""
+
+    def _insert(self, client, rows):
+        with client.connection() as conn, conn:
+            conn.executemany(
+                "INSERT INTO transactions (transaction_id, user_id, type, amount, status, failure_reason, "
+                "created_at, counterparty) VALUES (?, ?, 'pix_out', 10.0, ?, ?, '2024-01-01', ?)", rows
+            )
+
+    def test_index_follows_writes_and_stays_user_scoped(self, pooled_client):
+        """Inserts, updates and deletes are searchable at once; other users' rows never leak."""
+        self._insert(pooled_client, [
+            ("t1", "happy_customer", "failed", "Saldo insuficiente", "Fornecedor ABC"),
+            ("t2", "happy_customer", "completed", None, "Loja Crédito"),
+            ("t3", "happy_customer_2", "failed", None, "Fornecedor ABC"),
+        ])
+
+        def ids(text):
+            return [r["transaction_id"] for r in pooled_client.search_transactions("happy_customer", text)["results"]]
+
+        assert ids("fornecedor abc") == ["t1"]
+        assert ids("credito") == ["t2"]
+        assert ids("insuficiente") == ["t1"]
+        with pooled_client.connection() as conn, conn:
+            conn.execute("UPDATE transactions SET counterparty = 'Mercado Central' WHERE transaction_id = 't2'")
+            conn.execute("DELETE FROM transactions WHERE transaction_id = 't1'")
+        assert ids("credito") == [] and ids("mercado") == ["t2"]
+        assert ids("fornecedor") == []
+        assert pooled_client.search_transactions("happy_customer", "?!")["results"] == []
+
+    def test_reseeding_keeps_index_consistent(self, pooled_client):
+        """Running the seed again on a populated database leaves a valid FTS index."""
+        from scripts.seed_db import seed_transactions, seed_users
+
+        with pooled_client.connection() as conn:
+            seed_users(conn)
+            seed_transactions(conn)
+            seed_transactions(conn)
+            count = conn.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+            conn.execute("INSERT INTO transactions_fts (transactions_fts, rank) VALUES ('integrity-check', 1)")
+
+        assert count == 11
+        found = pooled_client.search_transactions("blocked_user", "account blocked")["results"]
+        assert [row["transaction_id"] for row in found] == ["tx_blocked_1"]
+
+    def test_ranked_keyset_pagination(self, pooled_client):
+        """Pages are ordered by score, then newest first, without gaps or repeats."""
+        self._insert(pooled_client, [(f"t{i}", "merchant", "completed", None, f"Loja {i % 3}") for i in range(25)])
+        self._insert(pooled_client, [("best", "merchant", "completed", None, "Loja Loja")])
+
+        pages, cursor = [], None
+        while True:
+            found = pooled_client.search_transactions("merchant", "loja", limit=7, cursor=cursor)
+            pages.append([row["transaction_id"] for row in found["results"]])
+            cursor = found["next_cursor"]
+            if cursor is None:
+                break
+        seen = [transaction_id for page in pages for transaction_id in page]
+
+        assert [len(page) for page in pages] == [7, 7, 7, 5]
+        assert seen[0] == "best"
+        assert len(set(seen)) == len(seen) == 26
+        assert seen[1:4] == ["t24", "t23", "t22"]
+        with pytest.raises(ValueError):
+            pooled_client.search_transactions("merchant", "loja", cursor="garbage")
+
+
+class TestReadCache:
+    """Tests for the read-through cache of per-user lookups."""
+
+    def test_hits_and_invalidation_on_writes(self, pooled_client):
+        """Repeated reads are hits; own writes and external commits are never served stale."""
+        import sqlite3
+
+        assert pooled_client.get_user("cached") is None
+        pooled_client.create_user("cached", "Cached User")
+        assert pooled_client.get_user("cached")["balance"] == 0.0
+        user = pooled_client.get_user("cached")
+        user["balance"] = 999.0   # callers get copies
+        assert pooled_client.get_user("cached")["balance"] == 0.0
+
+        external = sqlite3.connect(pooled_client.db_path)
+        with external:
+            external.execute("UPDATE users SET balance = 42.5 WHERE user_id = 'cached'")
+        external.close()
+        assert pooled_client.get_user("cached")["balance"] == 42.5
+        with pooled_client.write("cached") as conn:
+            conn.execute("INSERT INTO cards VALUES ('c1', 'cached', '4242', 'active', 100.0, 10.0)")
+        assert [card["last_4"] for card in pooled_client.get_cards("cached")] == ["4242"]
+
+        stats = pooled_client.cache_stats()
+        assert stats["hits"] >= 2 and stats["invalidations"] >= 2 and stats["flushes"] >= 1
+        assert 0 < stats["hit_rate"] < 1
+
+    def test_own_writes_keep_other_users_cached(self, pooled_client):
+        """A write through the client drops only its users; an outside commit still drops everything."""
+        import sqlite3
+
+        pooled_client.create_user("a", "A")
+        pooled_client.get_user("a")
+        pooled_client.get_user("a")
+        before = pooled_client.cache_stats()
+
+        pooled_client.create_user("z", "Z")
+        pooled_client.insert_users([("y", "Y")])
+        assert pooled_client.get_user("a")["name"] == "A"
+
+        after = pooled_client.cache_stats()
+        assert after["hits"] == before["hits"] + 1 and after["flushes"] == before["flushes"]
+        external = sqlite3.connect(pooled_client.db_path)
+        with external:
+            external.execute("UPDATE users SET name = 'A2' WHERE user_id = 'a'")
+        external.close()
+        assert pooled_client.get_user("a")["name"] == "A2"
+        assert pooled_client.cache_stats()["flushes"] == before["flushes"] + 1
+
+    def test_outside_commit_right_after_own_write_is_seen(self, pooled_client):
+        """An outside commit between the client's commit and written() is not absorbed."""
+        import sqlite3
+
+        pooled_client.create_user("a", "A")
+        assert pooled_client.get_user("a")["name"] == "A"
+        cache = pooled_client.cache
+        original = cache.written
+
+        def outside_commit_first(*args, **kwargs):
+            external = sqlite3.connect(pooled_client.db_path)
+            with external:
+                external.execute("UPDATE users SET name = 'A2' WHERE user_id = 'a'")
+            external.close()
+            original(*args, **kwargs)
+
+        cache.written = outside_commit_first
+        pooled_client.create_user("z", "Z")
+        cache.written = original
+
+        assert pooled_client.get_user("a")["name"] == "A2"
+
+    def test_size_is_bounded(self, tmp_path):
+        """Least recently used entries are evicted beyond the bound; 0 disables the cache."""
+        from scripts.seed_db import create_tables
+        from src.db.client import DatabaseClient
+        import sqlite3
+
+        db_path = str(tmp_path / "customers.db")
+        conn = sqlite3.connect(db_path)
+        create_tables(conn)
+        conn.close()
+        client = DatabaseClient(db_path, pool_size=1, cache_entries=3)
+        client.migrate()   # opens the pooled connection (switching to WAL counts as a commit)
+        for n in range(5):
+            client.get_transactions(f"user_{n}")
+        client.get_transactions("user_4")
+
+        stats = client.cache_stats()
+        assert stats["size"] == 3 and stats["evictions"] == 2 and stats["hits"] == 1
+        client.close()
+        assert DatabaseClient(db_path, cache_entries=0).cache_stats() is None
+
+
+class TestMemoryReplica:
+    """Tests for serving reads from an in-memory copy of the database."""
+
+    def test_reads_follow_writes_and_refreshes(self, tmp_path):
+        """External commits show up after a refresh; the client's own writes immediately."""
+        import sqlite3
+        from scripts.seed_db import create_tables
+        from src.db.client import DatabaseClient
+
+        db_path = str(tmp_path / "customers.db")
+        conn = sqlite3.connect(db_path)
+        create_tables(conn)
+        conn.execute("INSERT INTO users (user_id, name, balance) VALUES ('merchant', 'Merchant', 10.0)")
+        conn.commit()
+        client = DatabaseClient(db_path, pool_size=1, cache_entries=0, memory_replica=True)
+        client.replica.refresh_seconds = 0   # refreshed by hand below
+        client.start_replica()
+
+        assert client.get_user("merchant")["balance"] == 10.0
+        with conn:
+            conn.execute("UPDATE users SET balance = 20.0 WHERE user_id = 'merchant'")
+        assert client.get_user("merchant")["balance"] == 10.0   # lagging copy
+        assert client.replica_stats()["stale"] is True
+        assert client.replica.refresh() is True
+        assert client.get_user("merchant")["balance"] == 20.0
+        assert client.replica.refresh() is False   # nothing committed since
+
+        client.create_user("newbie", "Newbie")
+        assert client.get_user("newbie")["name"] == "Newbie"   # read from disk until the next copy
+        assert client.get_user_snapshot("merchant")["user"]["name"] == "Merchant"
+        client.replica.refresh()
+
+        stats = client.replica_stats()
+        assert stats["disk_reads"] == 1 and stats["dirty_users"] == 0 and stats["lag_seconds"] == 0.0
+        assert stats["replica_reads"] >= 4 and stats["bytes"] > 0
+        with client.replica.connection() as replica:
+            with pytest.raises(sqlite3.OperationalError):
+                replica.execute("DELETE FROM users")
+        conn.close()
+        client.close()
+
+
+    def test_concurrent_reads_across_refreshes(self, tmp_path):
+        """Reads run side by side on the copy; refreshes and stats never hit a closed copy."""
+        import threading
+        import sqlite3
+        from scripts.seed_db import create_tables
+        from src.db.replica import MemoryReplica
+
+        db_path = str(tmp_path / "customers.db")
+        conn = sqlite3.connect(db_path)
+        create_tables(conn)
+        conn.execute("INSERT INTO users (user_id, name, balance) VALUES ('merchant', 'Merchant', 10.0)")
+        conn.commit()
+        conn.close()
+        replica = MemoryReplica(db_path, refresh_seconds=0, readers=2)
+
+        with replica.connection() as first, replica.connection() as second:
+            assert first is not second
+            query = "SELECT name FROM users WHERE user_id = 'merchant'"
+            assert first.execute(query).fetchone()[0] == second.execute(query).fetchone()[0] == "Merchant"
+
+        errors = []
+
+        def read_and_report():
+            try:
+                for _ in range(200):
+                    with replica.connection() as reader:
+                        reader.execute("SELECT COUNT(*) FROM users").fetchone()
+                    replica.stats()
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=read_and_report) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for _ in range(30):
+            replica.refresh(force=True)
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        assert replica.stats()["refreshes"] == 31
+        replica.close()
+
+
+class TestAsyncClient:
+    """Tests for the async facade and grouped sign-up commits."""
+
+    async def test_concurrent_signups_share_commits(self, pooled_client):
+        """Concurrent acreate_user calls commit in a few transactions with per-call results."""
+        import asyncio
+
+        names = [f"user_{n % 150}" for n in range(200)]   # 50 repeated ids
+        results = await asyncio.gather(*(pooled_client.acreate_user(user_id, "Async") for user_id in names))
+
+        assert sum(result is not None for result in results) == 150
+        assert [result["user_id"] for result in results[:150]] == names[:150]
+        assert all(result is None for result in results[150:])
+        stats = pooled_client.group_commit_stats()
+        assert stats["users"] == 200 and stats["batches"] < 10
+        assert (await pooled_client.aget_user("user_7"))["name"] == "Async"
+        assert await pooled_client.acreate_user("user_7", "Again") is None
+
+    def test_signups_survive_a_closed_loop(self, pooled_client):
+        """A flush left scheduled on a closed event loop does not block later sign-ups."""
+        import asyncio
+
+        async def abandon():
+            asyncio.ensure_future(pooled_client.acreate_user("lost", "Lost"))
+            await asyncio.sleep(0)   # queued, flush scheduled; the loop closes before it runs
+
+        asyncio.run(abandon())
+        created = asyncio.run(asyncio.wait_for(pooled_client.acreate_user("later", "Later"), timeout=5))
+
+        assert created["user_id"] == "later"
+
+
+class TestBulkUserInsert:
+    """Tests for the set-based user insert."""
+
+    def test_outcomes_per_item(self, pooled_client):
+        """Existing and repeated ids are detected in one statement; nothing else is touched."""
+        from src.db.client import USER_CREATED, USER_EXISTS, USER_REPEATED
+
+        pooled_client.create_user("old", "Old")
+        assert pooled_client.get_user("fresh") is None   # cached miss, invalidated by the insert
+
+        outcomes = pooled_client.insert_users([("fresh", "Fresh"), ("old", "New Name"), ("fresh", "Again")])
+
+        assert outcomes == [USER_CREATED, USER_EXISTS, USER_REPEATED]
+        assert pooled_client.get_user("fresh")["name"] == "Fresh"
+        assert pooled_client.get_user("old")["name"] == "Old"
+        assert pooled_client.insert_users([]) == []
@@ -0,0 +1,379 @@
+"""
+test_ingest.py - RAG ingestion tests against a local HTTP stand-in server
+No network access to infinitepay.io required.
+"""
+import threading
+import time
+import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+PAGE_TEMPLATE = """
+<html><body>
+<h2>Produto {n}</h2>
+<p>{text}</p>
+<h3>Taxas {n}</h3>
+<p>A taxa do produto {n} é de 1,99% no débito e R$ 0,00 de mensalidade. {text}</p>
+</body></html>
+"""
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Serves /page/<n> (with ETags), a /flaky endpoint and a /missing 404."""
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            server.hits[self.path] = server.hits.get(self.path, 0) + 1
+            hits = server.hits[self.path]
+        try:
+            time.sleep(server.delay)
+            if self.path == "/flaky" and hits <= 2:
+                self.send_response(503)
+                self.end_headers()
+                return
+            if self.path == "/missing":
+                self.send_response(404)
+                self.end_headers()
+                return
+            n = self.path.rsplit("/", 1)[-1]
+            revision = server.revisions.get(n, 0)
+            etag = f'"{n}-{revision}"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+            text = f"Conteúdo de exemplo sobre a InfinitePay (revisão {revision}). " * 10
+            body = PAGE_TEMPLATE.format(n=n, text=text)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("ETag", etag)
+            self.end_headers()
+            self.wfile.write(body.encode("utf-8"))
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stand_in_server():
+    """Local HTTP server standing in for the InfinitePay site."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    server.lock = threading.Lock()
+    server.in_flight = 0
+    server.max_in_flight = 0
+    server.hits = {}
+    server.revisions = {}
+    server.delay = 0.05
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class TestConcurrentFetching:
+    """Tests for the concurrent ingestion fetcher."""
+
+    def test_fetch_all_respects_per_host_limit(self, stand_in_server):
+        """All pages are fetched concurrently, never above the per-host limit."""
+        from src.rag.fetcher import fetch_all
+
+        urls = [f"{stand_in_server.base_url}/page/{i}" for i in range(12)]
+        results = list(fetch_all(urls, max_workers=8, per_host_limit=3, backoff_base=0.01))
+
+        assert sorted(r.url for r in results) == sorted(urls)
+        assert all(r.status == 200 and r.content for r in results)
+        assert 1 < stand_in_server.max_in_flight <= 3
+
+    def test_retryable_errors_are_retried(self, stand_in_server):
+        """503 responses are retried with backoff until the page loads."""
+        from src.rag.fetcher import fetch_all
+
+        [result] = fetch_all([f"{stand_in_server.base_url}/flaky"], max_retries=3, backoff_base=0.01)
+
+        assert result.status == 200
+        assert result.attempts == 3
+
+    def test_client_errors_fail_fast(self, stand_in_server):
+        """A 404 fails immediately instead of burning retries."""
+        import requests
+        from src.rag.fetcher import fetch_all
+
+        with pytest.raises(requests.HTTPError):
+            list(fetch_all([f"{stand_in_server.base_url}/missing"], max_retries=3, backoff_base=0.01))
+
+        assert stand_in_server.hits["/missing"] == 1
+
+    def test_load_docs_keeps_url_order(self, stand_in_server):
+        """load_infinitepay_docs chunks every page, in the original URL order."""
+        from src.rag.ingest import load_infinitepay_docs
+
+        urls = [f"{stand_in_server.base_url}/page/{i}" for i in range(5)]
+        documents = load_infinitepay_docs(urls)
+
+        sources = []
+        for doc in documents:
+            if doc.metadata["source"] not in sources:
+                sources.append(doc.metadata["source"])
+        assert sources == urls
+
+
+class TestIncrementalIngestion:
+    """Tests for conditional fetching and chunk-level diffing."""
+
+    def test_unchanged_pages_reuse_stored_chunks(self, stand_in_server, tmp_path):
+        """A second run gets 304s and the same chunk IDs; an edited page is re-chunked."""
+        from src.rag.ingest import IngestSummary, collect_chunks
+        from src.rag.state import IngestState
+
+        urls = [f"{stand_in_server.base_url}/page/{i}" for i in range(4)]
+        with IngestState(str(tmp_path / "state.db")) as state:
+            first = collect_chunks(urls, state, IngestSummary())
+
+            second_summary = IngestSummary()
+            second = collect_chunks(urls, state, second_summary)
+
+            stand_in_server.revisions["2"] = 1
+            third_summary = IngestSummary()
+            third = collect_chunks(urls, state, third_summary)
+
+        assert first and [c["id"] for c in second] == [c["id"] for c in first]
+        assert second_summary.pages_not_modified == 4
+
+        assert third_summary.pages_not_modified == 3
+        assert third_summary.pages_changed == 1
+        changed_ids = {c["id"] for c in third} - {c["id"] for c in first}
+        assert changed_ids
+        assert all(c["metadata"]["source"] == urls[2] for c in third if c["id"] in changed_ids)
+
+    def test_process_pool_parsing_matches_in_process(self, stand_in_server, tmp_path, monkeypatch):
+        """Pages parsed in the process pool produce the same chunks as in-process parsing."""
+        import requests
+        from src.config import settings
+        from src.rag.ingest import IngestSummary, chunk_page, collect_chunks
+        from src.rag.state import IngestState
+
+        monkeypatch.setattr(settings, "ingest_parse_pool_min_pages", 1)
+        monkeypatch.setattr(settings, "ingest_parse_workers", 2)
+        urls = [f"{stand_in_server.base_url}/page/{i}" for i in range(3)]
+
+        summary = IngestSummary()
+        with IngestState(str(tmp_path / "state.db")) as state:
+            pooled = collect_chunks(urls, state, summary)
+
+        expected = [chunk for url in urls for chunk in chunk_page(requests.get(url).content, url)]
+        assert pooled == expected
+        assert [stats.name for stats in summary.pipeline_stats] == ["fetch", "parse", "collect"]
+        assert summary.pipeline_stats[1].items_out == 3
+        assert "parse_cpu" in summary.stage_seconds
+
+
+class TestStreamingPipeline:
+    """Tests for the bounded-queue stage runner."""
+
+    def test_slow_consumer_bounds_the_producer(self):
+        """A full queue blocks the source, and items arrive in order."""
+        from src.rag.pipeline import Pipeline
+
+        produced = []
+        received = []
+
+        def source():
+            for i in range(50):
+                produced.append(i)
+                yield i
+
+        def slow_sink(items):
+            for item in items:
+                time.sleep(0.005)
+                received.append((item, len(produced)))
+
+        pipeline = Pipeline(queue_size=2)
+        pipeline.sink("sink", slow_sink, pipeline.stage("source", source))
+        stats = pipeline.run()
+
+        assert [item for item, _ in received] == list(range(50))
+        # the producer never runs more than the queue (+ one in hand) ahead
+        assert all(ahead - item <= 4 for item, ahead in received)
+        assert stats["source"].wait_output > 0
+
+    def test_stage_error_stops_every_stage(self):
+        """An error in a downstream stage stops the source and is re-raised."""
+        from src.rag.pipeline import Pipeline
+
+        def endless():
+            i = 0
+            while True:
+                yield i
+                i += 1
+
+        def failing(items):
+            for item in items:
+                if item == 10:
+                    raise RuntimeError("embed failed")
+                yield item
+
+        pipeline = Pipeline(queue_size=2)
+        failed = pipeline.stage("fail", failing, pipeline.stage("source", endless))
+        pipeline.sink("sink", lambda items: list(items), failed)
+
+        with pytest.raises(RuntimeError, match="embed failed"):
+            pipeline.run()
+
+
+@pytest.fixture
+def static_site(tmp_path):
+    """Static site (sitemap, robots.txt, linked pages) served from a temp dir."""
+    import functools
+    from http.server import SimpleHTTPRequestHandler
+
+    root = tmp_path / "site"
+    root.mkdir()
+    pages = {
+        "index.html": '<a href="/a.html#top">A</a> <a href="b.html?utm_source=x">B</a> <a href="/private/p.html">P</a>',
+        "a.html": '<a href="/c.html">C</a> <a href="/index.html">home</a> <a href="https://other.example/x">ext</a>',
+        "b.html": '<a href="/a.html">A</a>',
+        "c.html": '<a href="/missing.html">broken</a>',
+        "d.html": "",  # only in the sitemap
+    }
+    (root / "private").mkdir()
+    pages["private/p.html"] = ""
+    for name, links in pages.items():
+        body = PAGE_TEMPLATE.format(n=name, text=f"Pagina {name} da central de ajuda. " * 10)
+        (root / name).write_text(body.replace("</body>", f"{links}</body>"), encoding="utf-8")
+
+    class Handler(SimpleHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(Handler, directory=str(root)))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    (root / "robots.txt").write_text(f"User-agent: *\nDisallow: /private/\nSitemap: {base}/sitemap.xml\n")
+    (root / "sitemap.xml").write_text(
+        '<?xml version="1.0"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+        f"<url><loc>{base}/d.html</loc></url><url><loc>{base}/a.html/</loc></url></urlset>"
+    )
+    server.base_url = base
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class TestCrawler:
+    """Tests for the sitemap/link crawler against a local static site."""
+
+    @pytest.fixture(autouse=True)
+    def fast_crawl(self, monkeypatch):
+        from src.config import settings
+        monkeypatch.setattr(settings, "crawl_delay", 0)
+
+    def test_crawl_discovers_canonical_pages_and_respects_robots(self, static_site, tmp_path):
+        """Sitemap + links are crawled once each; robots, fragments and tracking params are handled."""
+        from src.rag.crawler import Crawler
+        from src.rag.state import IngestState
+
+        base = static_site.base_url
+        with IngestState(str(tmp_path / "state.db")) as state:
+            crawled = [result.url for result in Crawler(state, seed=f"{base}/index.html").crawl()]
+            blocked = state.frontier_urls("blocked")
+            failed = state.frontier_urls("failed")
+
+        assert set(crawled) == {f"{base}/{name}" for name in ("index.html", "a.html", "b.html", "c.html", "d.html")}
+        assert len(crawled) == len(set(crawled))
+        assert blocked == [f"{base}/private/p.html"]
+        assert failed == [f"{base}/missing.html"]
+
+    def test_interrupted_crawl_resumes_without_refetching(self, static_site, tmp_path):
+        """A resumed crawl replays finished pages from the state and fetches only the rest."""
+        from src.rag.crawler import Crawler
+        from src.rag.state import IngestState
+
+        base = static_site.base_url
+        with IngestState(str(tmp_path / "state.db")) as state:
+            first = Crawler(state, seed=f"{base}/index.html").crawl()
+            # the pipeline stores each page before the crawl is interrupted
+            partial = [next(first), next(first)]
+            for result in partial:
+                state.save_page(result.url, "hash", [])
+            first.close()
+
+            resumed = list(Crawler(state, seed=f"{base}/index.html").crawl())
+            manifest = state.crawl_manifest()
+
+        replayed = [result.url for result in resumed if result.attempts == 0]
+        assert replayed == [result.url for result in partial]
+        assert all(result.not_modified for result in resumed[:2])
+        assert set(manifest) == {result.url for result in resumed}
+        assert len(manifest) == 5
+
+
+class TestSemanticChunker:
+    """Tests for the single-pass section parser."""
+
+    def test_nested_text_is_assigned_once(self):
+        """Text in nested containers appears once, in the section that encloses it."""
+        from src.rag.semantic_chunker import parse_html_sections
+
+        html = """
+        <html><body>
+        <nav><a>Menu principal</a></nav>
+        <div class="wrapper">
+          <h2>Maquininha <span>Smart</span></h2>
+          <div><div><p>Taxa de 1,37% no débito com <a href="#">dinheiro na hora</a>.</p></div></div>
+          <div>
+            <h3>Pix</h3>
+            <ul><li><span>Pix sem taxa</span> para pessoa física e jurídica, sem limite mensal.</li></ul>
+            <script>var x = "ignorado";</script>
+            <h1>Outra página</h1>
+            <p>Texto depois do H1 não pertence a nenhuma seção.</p>
+          </div>
+        </div>
+        </body></html>
+        """.encode("utf-8")
+
+        sections = parse_html_sections(html, "https://www.infinitepay.io/maquininha")
+
+        assert [(s['header'], s['level']) for s in sections] == [("MaquininhaSmart", "h2"), ("Pix", "h3")]
+        assert sections[0]['content'].count("1,37%") == 1
+        assert "dinheiro na hora" in sections[0]['content']
+        assert "Pix sem taxa" in sections[1]['content']
+        assert all("Menu" not in s['content'] and "ignorado" not in s['content'] for s in sections)
+        assert all("depois do H1" not in s['content'] for s in sections)
+        assert set(sections[0]) == {'content', 'header', 'level', 'source'}
+
+
+class TestNearDuplicateDetection:
+    """Tests for MinHash/LSH chunk deduplication."""
+
+    def test_alternative_page_chunks_collapse_keeping_sources(self):
+        """A lightly edited copy on another URL is merged; distinct text survives."""
+        from src.rag.dedup import chunk_sources, deduplicate_chunks
+
+        base = (
+            "A InfinitePay oferece gestão de cobrança com boleto, Pix e link de pagamento. "
+            "Você acompanha cada cobrança em tempo real, envia lembretes automáticos e recebe na hora. "
+            "Sem mensalidade e sem taxa de adesão, com suporte 24 horas pelo aplicativo. "
+        ) * 3
+        chunks = [
+            {"id": "a", "content": base, "metadata": {"source": "https://x/gestao-de-cobranca-2"}},
+            {"id": "b", "content": base + "Conheça também a conta PJ.", "metadata": {"source": "https://x/gestao-de-cobranca"}},
+            {"id": "c", "content": "Maquininha Smart com taxa de 1,37% no débito e bateria que dura o dia todo. " * 3,
+             "metadata": {"source": "https://x/maquininha"}},
+        ]
+
+        kept, stats = deduplicate_chunks(chunks)
+
+        assert [c["id"] for c in kept] == ["a", "c"]
+        assert chunk_sources(kept[0]["metadata"]) == ["https://x/gestao-de-cobranca-2", "https://x/gestao-de-cobranca"]
+        assert "sources" not in kept[1]["metadata"]
+        assert stats.duplicates_removed == 1 and stats.cross_page == 1
+        assert "sources" not in chunks[0]["metadata"]  # input is not mutated
@@ -11,14 +11,22 @@ class TestRAGPipeline:
     def test_chromadb_has_documents(self):
         """ChromaDB should have indexed documents."""
         from src.rag.ingest import create_chroma_client
+        from src.rag.store import current_collection_name
         
         client = create_chroma_client()
-        collection = client.get_collection("infinitepay_docs")
+        collection = client.get_collection(current_collection_name())
         count = collection.count()
         
         assert count > 0, "ChromaDB should have documents"
         print(f"ChromaDB has {count} documents")
     
+    def test_vector_store_handle_is_shared(self):
+        """Ingestion, validation and search should share one ChromaDB client."""
+        from src.rag.ingest import create_chroma_client
+        from src.rag.store import get_chroma_client
+        
+        assert create_chroma_client() is get_chroma_client()
+    
     def test_rag_searcher_returns_results(self):
         """RAGSearcher should return relevant results."""
         from src.rag.search import RAGSearcher
@@ -39,6 +47,17 @@ class TestRAGPipeline:
         assert len(context) > 0
         assert isinstance(context, str)
         assert len(docs) > 0
+    
+    async def test_rag_asearch_and_format(self):
+        """RAGSearcher.asearch_and_format should match the sync contract."""
+        from src.rag.search import RAGSearcher
+        
+        searcher = RAGSearcher()
+        context, docs = await searcher.asearch_and_format("Pix InfinitePay")
+        
+        assert isinstance(context, str)
+        assert len(docs) > 0
+        assert "content" in docs[0]
 
 
 class TestRAGTool:
@@ -58,3 +77,241 @@ class TestRAGTool:
         
         assert isinstance(result, str)
         assert len(result) > 0
+
+
+class TestQuantizedIndex:
+    """Tests for the compact (float16/int8) vector index."""
+    
+    def test_quantized_modes_preserve_top_result(self):
+        """Every storage mode should rank the exact nearest vector first."""
+        import numpy as np
+        from src.rag.quantization import QuantizedIndex, STORAGE_MODES
+        
+        rng = np.random.default_rng(42)
+        vectors = rng.normal(size=(500, 256)).astype(np.float32)
+        ids = [f"doc_{i}" for i in range(len(vectors))]
+        query = vectors[123] + rng.normal(scale=0.05, size=256).astype(np.float32)
+        
+        for mode in STORAGE_MODES:
+            index = QuantizedIndex.from_float(ids, vectors, mode)
+            results = index.search(query, top_k=5)
+            assert results[0][0] == "doc_123", f"{mode} lost the nearest neighbour"
+    
+    def test_int8_uses_quarter_of_float32_memory(self):
+        """int8 storage should be ~4x smaller than float32."""
+        import numpy as np
+        from src.rag.quantization import QuantizedIndex
+        
+        vectors = np.random.default_rng(0).normal(size=(100, 512))
+        ids = [str(i) for i in range(100)]
+        
+        full = QuantizedIndex.from_float(ids, vectors, "float32")
+        compact = QuantizedIndex.from_float(ids, vectors, "int8")
+        
+        assert compact.nbytes < full.nbytes / 3.5
+
+
+class TestContextPacker:
+    """Tests for token-budgeted context packing."""
+    
+    @staticmethod
+    def _render(i, doc):
+        return f"[DOCUMENT {i}]\n{doc['content']}\n---\n"
+    
+    def test_overlapping_splits_are_merged(self):
+        """Adjacent splits of the same section should be sent once, without the overlap."""
+        from src.rag.context_packer import pack_documents
+        
+        text = " ".join(f"palavra{i}" for i in range(600))
+        first, second = text[:2000], text[1600:3600]
+        meta = {"source": "https://www.infinitepay.io/pix", "section": "Pix"}
+        docs = [
+            {"content": first, "metadata": meta, "score": 0.1},
+            {"content": second, "metadata": meta, "score": 0.2},
+        ]
+        
+        packed = pack_documents(docs, self._render, token_budget=10_000)
+        
+        assert len(packed.documents) == 1
+        assert packed.documents[0]["content"] == text[:3600]
+        assert packed.tokens_saved > 0
+    
+    def test_superset_chunk_keeps_its_own_source(self):
+        """A chunk replaced by a longer one from another page cites that page."""
+        from src.rag.context_packer import pack_documents
+        
+        docs = [
+            {"content": "Pix cai na hora.", "metadata": {"source": "a", "section": "Resumo"}, "score": 0.1},
+            {"content": "Com a InfinitePay o Pix cai na hora. Sem taxas.", "metadata": {"source": "b", "section": "Pix"}, "score": 0.2},
+        ]
+        
+        packed = pack_documents(docs, self._render, token_budget=10_000)
+        
+        assert len(packed.documents) == 1
+        assert packed.documents[0]["content"] == docs[1]["content"]
+        assert packed.documents[0]["metadata"] == {"source": "b", "section": "Pix"}
+    
+    def test_duplicates_removed_and_budget_respected(self):
+        """Contained chunks are dropped and the token budget is never exceeded."""
+        from src.rag.context_packer import pack_documents, count_tokens
+        
+        long_text = "taxa de 1,99% no débito e 3,19% no crédito à vista. " * 80
+        docs = [
+            {"content": long_text, "metadata": {"source": "a"}, "score": 0.1},
+            {"content": long_text[:500], "metadata": {"source": "b"}, "score": 0.2},
+            {"content": "Conta digital gratuita " * 60, "metadata": {"source": "c"}, "score": 0.3},
+        ]
+        
+        packed = pack_documents(docs, self._render, token_budget=300)
+        rendered = "".join(self._render(i, d) for i, d in enumerate(packed.documents, 1))
+        
+        assert packed.duplicates_removed == 1
+        assert count_tokens(rendered) <= 300
+
+
+class TestEmbeddingStore:
+    """Tests for the content-addressed embedding store (no API calls)."""
+
+    class FakeEmbeddingsAPI:
+        """Stands in for openai.OpenAI().embeddings; optionally rate-limits the first call."""
+
+        def __init__(self, rate_limit_first=False):
+            self.inputs = []
+            self.rate_limit_first = rate_limit_first
+            self.embeddings = self
+
+        def create(self, model, input, **kwargs):
+            from types import SimpleNamespace
+            import httpx
+            import openai
+
+            if self.rate_limit_first:
+                self.rate_limit_first = False
+                response = httpx.Response(
+                    429, headers={"retry-after-ms": "1"},
+                    request=httpx.Request("POST", "https://api.openai.com/v1/embeddings")
+                )
+                raise openai.RateLimitError("rate limited", response=response, body=None)
+
+            self.inputs.append(list(input))
+            return SimpleNamespace(data=[
+                SimpleNamespace(index=i, embedding=[float(len(text)), 1.0, 0.0])
+                for i, text in enumerate(input)
+            ])
+
+    def test_only_new_unique_texts_reach_the_api(self, tmp_path):
+        """Duplicates and previously embedded texts are served from the store."""
+        from src.rag.embeddings import CachedEmbedder, EmbeddingStore
+
+        api = self.FakeEmbeddingsAPI()
+        with EmbeddingStore(str(tmp_path / "emb.db")) as store:
+            embedder = CachedEmbedder(store=store, client=api, model="m", batch_size=2)
+            first = embedder.embed_documents(["a", "bb", "a", "ccc"])
+            second = embedder.embed_documents(["ccc", "dddd"])
+
+        assert first[0] == first[2] == [1.0, 1.0, 0.0]
+        assert second[0] == first[3]
+        sent = [text for batch in api.inputs for text in batch]
+        assert sorted(sent) == ["a", "bb", "ccc", "dddd"]
+        assert all(len(batch) <= 2 for batch in api.inputs)
+        assert embedder.stats.cache_hits == 2
+
+    def test_rate_limits_are_retried(self, tmp_path):
+        """A 429 is retried after Retry-After instead of failing ingestion."""
+        from src.rag.embeddings import CachedEmbedder, EmbeddingStore
+
+        with EmbeddingStore(str(tmp_path / "emb.db")) as store:
+            embedder = CachedEmbedder(store=store, client=self.FakeEmbeddingsAPI(rate_limit_first=True), model="m")
+            vectors = embedder.embed_documents(["texto"])
+
+        assert vectors == [[5.0, 1.0, 0.0]]
+        assert embedder.stats.retries == 1
+
+
+class TestCollectionVersions:
+    """Tests for blue/green collection versions and the "current" pointer."""
+
+    @pytest.fixture
+    def isolated_store(self, tmp_path, monkeypatch):
+        """Points the shared ChromaDB handle at a temporary directory."""
+        from src.config import settings
+        from src.rag import store
+
+        monkeypatch.setattr(settings, "chroma_persist_dir", str(tmp_path / "chromadb"))
+        monkeypatch.setattr(store, "_client", None)
+        yield store
+        store.close_chroma_client()
+
+    def test_searcher_follows_pointer_and_old_versions_are_collected(self, isolated_store):
+        """Searches move to the activated version; retired ones survive the grace period."""
+        from src.rag.search import RAGSearcher
+
+        store = isolated_store
+        client = store.get_chroma_client()
+        for name in ("infinitepay_docs__v1", "infinitepay_docs__v2"):
+            client.create_collection(name)
+
+        store.activate_collection("infinitepay_docs__v1")
+        searcher = RAGSearcher()
+        in_flight = searcher.current_version()
+        assert in_flight.name == "infinitepay_docs__v1"
+
+        assert store.activate_collection("infinitepay_docs__v2") == "infinitepay_docs__v1"
+        assert searcher.current_version().name == "infinitepay_docs__v2"
+        assert in_flight.vectorstore._collection.count() == 0  # still usable
+
+        assert store.collect_retired_collections(grace_seconds=3600) == []
+        assert store.collect_retired_collections(grace_seconds=0) == ["infinitepay_docs__v1"]
+        assert [c.name for c in client.list_collections()] == ["infinitepay_docs__v2"]
+
+
+class TestIndexArtifact:
+    """Tests for the memory-mapped index artifact (no API calls)."""
+
+    def _write(self, tmp_path, storage):
+        import numpy as np
+        from src.rag.artifact import write_artifact
+        from src.rag.quantization import normalize
+
+        vectors = normalize(np.random.default_rng(7).normal(size=(300, 64)))
+        path = str(tmp_path / f"index-{storage}.tar")
+        write_artifact(
+            path,
+            ids=[f"chunk-{i}" for i in range(300)],
+            embeddings=vectors,
+            documents=[f"Texto do chunk {i} — taxas" for i in range(300)],
+            metadatas=[{"product": f"p{i % 3}", "source": f"https://x/{i % 10}"} for i in range(300)],
+            version="test_v1",
+            storage=storage,
+        )
+        return path, vectors
+
+    @pytest.mark.parametrize("storage", ["float32", "int8"])
+    def test_search_matches_exact_ranking(self, tmp_path, storage):
+        """Searches over the mapped artifact return the exact top-k with text and metadata."""
+        import numpy as np
+        from src.rag.artifact import IndexArtifact
+
+        path, vectors = self._write(tmp_path, storage)
+        artifact = IndexArtifact(path)
+        assert isinstance(artifact.embeddings, np.memmap)
+
+        query = vectors[42] + 0.01
+        results = artifact.search(query, top_k=5, rescore_candidates=20)
+        expected = np.argsort(-(vectors @ (query / np.linalg.norm(query))))[:5]
+
+        assert [r['content'] for r in results] == [f"Texto do chunk {i} — taxas" for i in expected]
+        assert results[0]['metadata'] == {"product": f"p{expected[0] % 3}", "source": f"https://x/{expected[0] % 10}"}
+        assert results[0]['score'] <= results[-1]['score']
+
+    def test_metadata_filter(self, tmp_path):
+        """Equality filters are applied on the dictionary-encoded metadata columns."""
+        from src.rag.artifact import IndexArtifact
+
+        path, vectors = self._write(tmp_path, "float32")
+        artifact = IndexArtifact(path)
+
+        results = artifact.search(vectors[0], top_k=10, filter_by={"product": "p1"})
+        assert len(results) == 10
+        assert all(r['metadata']['product'] == "p1" for r in results)
+        assert artifact.search(vectors[0], filter_by={"product": "nope"}) == []